@@ -0,0 +1 @@
+"""Outils hors production: benchmarks et exécution sans écran."""
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import sys
+import types
+
+
+def _headless_pyautogui() -> types.ModuleType:
+    module = types.ModuleType("pyautogui")
+    module.FAILSAFE = False
+    module.PAUSE = 0.0
+
+    def screenshot(*_args, **_kwargs):
+        raise RuntimeError("Pas d'ecran disponible: configurez vision.set_screen_source()")
+
+    def locateOnScreen(*_args, **_kwargs):
+        return None
+
+    def center(box):
+        x, y, w, h = box
+        return x + w // 2, y + h // 2
+
+    def size():
+        return 1920, 1080
+
+    def _no_input(*_args, **_kwargs):
+        raise RuntimeError("Entrees clavier/souris indisponibles en mode headless")
+
+    module.screenshot = screenshot
+    module.locateOnScreen = locateOnScreen
+    module.center = center
+    module.size = size
+    for name in ("click", "doubleClick", "press", "hotkey", "typewrite", "write", "moveTo"):
+        setattr(module, name, _no_input)
+    return module
+
+
+def install() -> bool:
+    """Make ``import pyautogui`` succeed on a machine without a display.
+
+    The real module is kept whenever it imports; otherwise a screen-less
+    replacement is registered so that ``modules.vision`` and
+    ``modules.waiters`` can run on frames supplied through
+    ``vision.set_screen_source``. Returns ``True`` when the replacement is used.
+    """
+    try:
+        import pyautogui  # noqa: F401
+        return False
+    except Exception:
+        sys.modules["pyautogui"] = _headless_pyautogui()
+        return True
+
+
+__all__ = ["install"]
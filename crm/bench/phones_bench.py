@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la normalisation des téléphones et du mapping entreprises.
+
+Génère un export Kompass synthétique (formats variés, plusieurs numéros par
+cellule, numéros partagés entre entreprises) et compare l'ancienne boucle
+(``_clean_phone_numbers`` + ``df.iterrows()``) à ``phones.build_index``.
+L'ancienne méthode est mesurée sur un échantillon puis extrapolée.
+
+Usage (depuis crm/):
+    python -m bench.phones_bench --rows 1000000
+    python -m bench.phones_bench --rows 200000 --legacy-rows 200000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench import headless
+
+headless.install()
+
+from modules import phones  # noqa: E402
+
+_FORMATS = (
+    "0{a}{b}",
+    "+33 {a} {b2}",
+    "0033{a}{b}",
+    "+33 (0){a} {b2}",
+    "0{a}.{b3}",
+    "0{a}-{b4}",
+    "0{a}{b} / 0{c}{b}",
+    "{a}{b}",
+    "+32 2 {b2}",
+    "n/c",
+)
+
+
+def _legacy_clean(raw_numbers) -> list[str]:
+    """Ancienne normalisation de crm_search (boucle Python par valeur)."""
+    cleaned: list[str] = []
+    for value in raw_numbers:
+        phone_str = str(value).strip()
+        if not phone_str:
+            continue
+        normalized = (
+            phone_str.replace('+33', '')
+            .replace(' ', '')
+            .replace('-', '')
+            .replace('.', '')
+        )
+        digits = ''.join(ch for ch in normalized if ch.isdigit())
+        if digits and len(digits) >= 9:
+            if not digits.startswith('0'):
+                digits = '0' + digits
+            cleaned.append(digits)
+    return cleaned
+
+
+def _legacy_mapping(df: pd.DataFrame) -> tuple[list[str], dict]:
+    phone_numbers = _legacy_clean(df['phone'].dropna().tolist())
+    mapping = {}
+    for _, row in df.iterrows():
+        cleaned = _legacy_clean([row.get('phone', '')])
+        if cleaned:
+            mapping[cleaned[0]] = {
+                'company': str(row.get('company', '')).strip(),
+                'siret': str(row.get('siret', '')).strip() if pd.notna(row.get('siret')) else '',
+            }
+    return phone_numbers, mapping
+
+
+def synthetic_frame(rows: int, *, shared_ratio: float = 0.05, seed: int = 7) -> pd.DataFrame:
+    """Synthetic 'Entreprises' sheet with ``rows`` rows."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 10, rows)
+    b = rng.integers(0, 10**8, rows)
+    c = rng.integers(1, 10, rows)
+    # Une part des lignes réutilise le numéro d'une autre entreprise
+    shared = rng.random(rows) < shared_ratio
+    donors = rng.integers(0, rows, rows)
+    a = np.where(shared, a[donors], a)
+    b = np.where(shared, b[donors], b)
+    kinds = rng.integers(0, len(_FORMATS), rows)
+
+    values = []
+    for kind, ai, bi, ci in zip(kinds, a, b, c):
+        digits = f"{bi:08d}"
+        pairs = " ".join(digits[i:i + 2] for i in range(0, 8, 2))
+        values.append(_FORMATS[kind].format(
+            a=ai, b=digits, c=ci, b2=pairs,
+            b3=".".join(digits[i:i + 2] for i in range(0, 8, 2)),
+            b4="-".join(digits[i:i + 2] for i in range(0, 8, 2)),
+        ))
+    return pd.DataFrame({
+        "company": [f"Entreprise {i}" for i in range(rows)],
+        "siret": rng.integers(10**13, 10**14, rows).astype(str),
+        "phone": values,
+    })
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="lignes synthetiques (defaut: 1 000 000)")
+    parser.add_argument("--legacy-rows", type=int, default=50_000, help="echantillon pour l'ancienne methode")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df = synthetic_frame(args.rows, seed=args.seed)
+    print(f"Generation: {args.rows} lignes en {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    index = phones.build_index(df)
+    vectorized = time.perf_counter() - start
+    print(
+        f"phones.build_index: {vectorized:.2f}s -> {len(index)} numeros distincts, "
+        f"{len(index.shared())} partages, {index.invalid} cellule(s) invalide(s)"
+    )
+
+    sample = df.head(min(args.legacy_rows, args.rows))
+    start = time.perf_counter()
+    legacy_phones, legacy_map = _legacy_mapping(sample)
+    legacy = time.perf_counter() - start
+    estimate = legacy * args.rows / max(1, len(sample))
+    print(
+        f"Ancienne methode: {legacy:.2f}s pour {len(sample)} lignes "
+        f"(~{estimate:.1f}s estime pour {args.rows}), "
+        f"{len(legacy_phones)} numeros dont {len(legacy_phones) - len(set(legacy_phones))} doublon(s) recherches, "
+        f"{len(legacy_map)} entree(s) de mapping (une seule entreprise par numero)"
+    )
+    if vectorized > 0:
+        print(f"Acceleration: x{estimate / vectorized:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,806 @@
+"""
+Simulateur du CRM pour exécuter le workflow sans VM ni écran.
+
+Un navigateur simulé remplace pyautogui, pyperclip et le Notepad des
+snippets: l'écran est composé à partir de la capture CRM ``assets/page.png``
+et des templates de ``assets/`` (bouton 'Interlocuteur', '0 resultat',
+liste de résultats, liste des interlocuteurs, prompt), les clics et la
+frappe font évoluer les onglets (recherche, fiche, Interlocuteurs), et les
+scripts collés dans la console sont exécutés par un exécuteur de snippets
+simulé qui répond sur le canal local (``channel``) ou par un prompt().
+Chaque étape a une latence configurable (``DEFAULT_LATENCIES``).
+
+A importer avant ``modules``:
+    from bench import simulator  # installe pyautogui/pyperclip simulés
+    from modules import workflow
+    with simulator.CrmSimulator(simulator.synthetic_scenario(20)):
+        workflow.process_phone_numbers(...)
+"""
+from __future__ import annotations
+
+import json
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import types
+import urllib.request
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+from PIL import Image
+
+SCREEN_SIZE = (1920, 1080)
+# Éléments de résultat sous l'en-tête du CRM, dans la zone balayée après
+# calibration (en-tête page_top.png + 120 px)
+OUTCOME_POS = (24, 372)
+PROMPT_POS = (860, 380)
+# Hauteur des onglets et de la barre d'adresse dans page.png
+BROWSER_CHROME = 174
+CONSOLE_TOP = 765
+BROWSER_TITLE = "Mozilla Firefox"
+
+# Issue d'une recherche simulée
+FOUND = "found"          # bouton 'Interlocuteur' affiché
+SLOW = "slow"            # liste de résultats sans bouton: fiche ouverte par le pré-fetch
+NO_RESULT = "no_result"  # message '0 resultat'
+OUTCOMES = (FOUND, SLOW, NO_RESULT)
+
+# Latences simulées (secondes, +/- jitter)
+DEFAULT_LATENCIES: Dict[str, float] = {
+    "search": 1.2,     # Entrée -> issue affichée
+    "record": 0.5,     # clic 'Interlocuteur' ou pré-fetch -> onglet fiche
+    "page_load": 0.8,  # window.open -> liste des interlocuteurs
+    "extract": 1.0,    # extraction des interlocuteurs (pagination comprise)
+    "prefetch": 0.4,   # lecture de la liste de résultats
+    "notepad": 0.3,    # lancement de Notepad
+    "clipboard": 0.0,  # Ctrl+C dans la VM -> presse-papiers
+    "input": 0.0,      # aller-retour d'une action clavier/souris
+}
+
+_ACTIVE: "CrmSimulator | None" = None
+
+
+def _active() -> "CrmSimulator":
+    if _ACTIVE is None:
+        raise RuntimeError("Aucun simulateur actif: utilisez CrmSimulator.start()")
+    return _ACTIVE
+
+
+def _fake_pyautogui() -> types.ModuleType:
+    module = types.ModuleType("pyautogui")
+    module.FAILSAFE = False
+    module.PAUSE = 0.0
+
+    def action(name: str) -> Callable:
+        # Comme pyautogui: pause PAUSE après chaque action clavier/souris
+        def call(*args, **kwargs):
+            simulator = _active()
+            simulator.wait("input")
+            result = getattr(simulator, name)(*args, **kwargs)
+            if module.PAUSE:
+                time.sleep(module.PAUSE)
+            return result
+        return call
+
+    def center(box):
+        x, y, w, h = box
+        return x + w // 2, y + h // 2
+
+    def screenshot(*_args, region=None, **_kwargs):
+        return Image.fromarray(_active().capture(region)).convert("RGB")
+
+    for name in ("click", "doubleClick", "press", "hotkey", "typewrite", "moveTo"):
+        setattr(module, name, action(name))
+    module.write = module.typewrite
+    module.center = center
+    module.screenshot = screenshot
+    module.size = lambda: SCREEN_SIZE
+    module.locateOnScreen = lambda *_args, **_kwargs: None
+    module.getActiveWindowTitle = lambda: _active().window_title()
+    return module
+
+
+def _fake_pyperclip() -> types.ModuleType:
+    module = types.ModuleType("pyperclip")
+    module.copy = lambda text: _active().set_clipboard(str(text))
+    module.paste = lambda: _active().get_clipboard()
+    return module
+
+
+def install() -> None:
+    """Register the simulated ``pyautogui`` and ``pyperclip`` (before importing ``modules``)."""
+    if getattr(sys.modules.get("pyautogui"), "__crm_simulated__", False):
+        return
+    if "modules.config" in sys.modules:
+        raise RuntimeError("bench.simulator doit etre importe avant modules (pyautogui deja charge)")
+    fake = _fake_pyautogui()
+    fake.__crm_simulated__ = True
+    sys.modules["pyautogui"] = fake
+    sys.modules["pyperclip"] = _fake_pyperclip()
+
+
+install()
+
+from modules import config, snippet_runtime, snippets, vision  # noqa: E402
+
+
+class Tab:
+    """One simulated browser tab."""
+
+    __slots__ = ("kind", "phone", "view", "variant", "loaded", "closable", "runtime", "console", "console_text", "search", "prompt")
+
+    def __init__(self, kind: str, phone: str = "", *, view: str = "home", closable: bool = True) -> None:
+        self.kind = kind          # "crm" (page du CRM) ou "interlocutors"
+        self.phone = phone
+        # Page du CRM: home, searching, results, slow, no_result, opening (fiche en chargement), record
+        self.view = view
+        self.variant = 0          # variante du bouton 'Interlocuteur' affichée
+        self.loaded = kind != "interlocutors"
+        self.closable = closable
+        self.runtime: str | None = None  # version de window.__crm injectée
+        self.console = False
+        self.console_text = ""
+        self.search = ""
+        self.prompt: "Prompt | None" = None
+
+
+class Prompt:
+    """A prompt() dialog: its text is selected, Enter or Escape closes it."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.closed = threading.Event()
+
+
+def synthetic_scenario(
+    count: int,
+    *,
+    found: float = 0.7,
+    slow: float = 0.1,
+    seed: int = 0,
+) -> Dict[str, dict]:
+    """``count`` phones with their simulated outcome, company and contacts.
+
+    ``found`` and ``slow`` are the shares of phones with an 'Interlocuteur'
+    button and of phones only found by the pre-fetch; the others have no
+    result. A found company has 0 to 3 targeted contacts and 0 to 2 others.
+    """
+    rng = random.Random(seed)
+    scenario = {}
+    for index in range(count):
+        phone = f"0{rng.randint(1, 9)}{rng.randrange(10**8):08d}"
+        draw = rng.random()
+        outcome = FOUND if draw < found else SLOW if draw < found + slow else NO_RESULT
+        contacts = []
+        if outcome != NO_RESULT:
+            for number in range(rng.randint(0, 3) + rng.randint(0, 2)):
+                category = "Ciblé" if number < 3 and rng.random() < 0.7 else "Autre"
+                first, last = f"Prenom{index}", f"Nom{number}"
+                contacts.append({
+                    "name": f"{first} {last}",
+                    "firstName": first,
+                    "lastName": last,
+                    "email": f"{first}.{last}@exemple.fr".lower(),
+                    "mobile": f"06{rng.randrange(10**8):08d}",
+                    "fix": "",
+                    "fonction": "Direction Generale" if category == "Ciblé" else "Comptable",
+                    "category": category,
+                })
+        scenario[phone] = {
+            "outcome": outcome,
+            "company": f"Entreprise {index}",
+            "siret": f"{rng.randrange(10**13, 10**14)}",
+            "contacts": contacts,
+        }
+    return scenario
+
+
+def expected_status(entry: dict) -> str:
+    """Status the workflow should journal for a scenario entry."""
+    if entry.get("outcome") == NO_RESULT:
+        return "NOT_FOUND"
+    return "FOUND" if entry.get("contacts") else "NO_CONTACT_FOUND"
+
+
+def _gray(image: Image.Image) -> np.ndarray:
+    return np.array(image.convert("L"))
+
+
+def _template(path: str) -> np.ndarray:
+    return _gray(Image.open(path))
+
+
+def _paste(frame: np.ndarray, patch: np.ndarray, position: tuple[int, int]) -> tuple[int, int, int, int]:
+    x, y = position
+    h, w = patch.shape
+    frame[y:y + h, x:x + w] = patch
+    return (x, y, w, h)
+
+
+def _inside(point: tuple[int, int], box: tuple[int, int, int, int] | None) -> bool:
+    return box is not None and box[0] <= point[0] < box[0] + box[2] and box[1] <= point[1] < box[1] + box[3]
+
+
+# Appel d'une ligne du runtime (snippet_runtime._CALL)
+_CALL_RE = re.compile(
+    r'window\.__crm&&window\.__crm\.version===("[^"]*")\?window\.__crm\.(\w+)\(.*?\):'
+    r'fetch\(("[^"]*"|null),.*?id:("[^"]*"|null),runtime:"missing"'
+)
+_BUNDLE_RE = re.compile(r'const V=("[^"]*");')
+_PREAMBLE_RE = re.compile(r'window\.__crmChannel=(\{[^\n]*?\});')
+
+
+class CrmSimulator:
+    """Simulated Firefox window with the CRM, driven by the fake input backend.
+
+    ``scenario`` maps each phone to its outcome and contacts (see
+    :func:`synthetic_scenario`). The screen is rebuilt from the recorded
+    CRM page (``page``, default ``assets/page.png``) and the templates of
+    ``assets/``; it is served to ``vision`` through
+    ``vision.set_screen_source``. Snippets pasted in the console run in a
+    background thread per call, like the page's async scripts.
+    ``anomalies`` is the share of searches interrupted by a stray prompt
+    (the lookup must recover and search again).
+    """
+
+    def __init__(
+        self,
+        scenario: Dict[str, dict],
+        *,
+        latencies: Dict[str, float] | None = None,
+        jitter: float = 0.2,
+        anomalies: float = 0.0,
+        seed: int = 0,
+        page: str | None = None,
+    ) -> None:
+        unknown = set(latencies or {}) - set(DEFAULT_LATENCIES)
+        if unknown:
+            raise ValueError(f"Latence inconnue: {', '.join(sorted(unknown))} ({', '.join(DEFAULT_LATENCIES)})")
+        self.scenario = scenario
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.jitter = jitter
+        self.anomalies = anomalies
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self.tabs: List[Tab] = [Tab("crm", closable=False)]
+        self.active = self.tabs[0]
+        self.focus: str | None = None
+        self.selected = False
+        self.notepad: str | None = None
+        self._notepad_title = ""
+        self._clipboard = ""
+        self._clipboard_next: tuple[str, float] | None = None
+        self._generation = 0
+        self._searched: set[str] = set()
+        self.counters: Dict[str, int] = {}
+        self._build_views(page or config.asset("page.png"))
+        self._snippets = self._load_snippets()
+        self._previous_subprocess = None
+
+    # --- écran ---
+
+    def _build_views(self, page_path: str) -> None:
+        page = _template(page_path)
+        width, height = SCREEN_SIZE
+        base = np.full((height, width), 255, dtype=np.uint8)
+        _paste(base, page[:height, :width], (0, 0))
+        blank = np.full((height, width), 255, dtype=np.uint8)
+        blank[:BROWSER_CHROME, :page.shape[1]] = page[:BROWSER_CHROME, :width]
+
+        self._views: Dict[str, np.ndarray] = {"home": base, "record": base, "opening": blank, "loading": blank}
+        self._button_boxes = []
+        for index, path in enumerate(config.INTERLOCUTOR_BUTTON_IMAGES):
+            view = base.copy()
+            self._button_boxes.append(_paste(view, _template(path), OUTCOME_POS))
+            self._views[f"results{index}"] = view
+        self._views["slow"] = base.copy()
+        _paste(self._views["slow"], _template(config.PRE_FETCH_IMAGE), OUTCOME_POS)
+        self._views["no_result"] = base.copy()
+        _paste(self._views["no_result"], _template(config.NO_RESULT_IMAGE), OUTCOME_POS)
+        self._views["interlocutors"] = blank.copy()
+        _paste(self._views["interlocutors"], _template(config.LIST_INTERLOCUTOR_IMAGE), OUTCOME_POS)
+        self._views["notepad"] = np.full((height, width), 240, dtype=np.uint8)
+        self._prompt = _template(config.RESULT_CANCEL_OK_IMAGE)
+        self._search_box = self._locate(page, config.asset("search.png"))
+        if self._search_box is None:
+            raise ValueError(f"Champ de recherche (search.png) absent de la capture {page_path}")
+        self._frames: Dict[tuple, np.ndarray] = {}
+
+    @staticmethod
+    def _locate(frame: np.ndarray, path: str) -> tuple[int, int, int, int] | None:
+        import cv2
+
+        template = _template(path)
+        scores = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(scores)
+        if score < 0.9:
+            return None
+        pad = 8
+        return (x - pad, y - pad, template.shape[1] + 2 * pad, template.shape[0] + 2 * pad)
+
+    def _view_key(self) -> tuple:
+        if self.notepad is not None:
+            return ("notepad", False, False)
+        tab = self.active
+        if tab.kind == "crm":
+            view = "home" if tab.view == "searching" else tab.view
+            if view == "results":
+                view = f"results{tab.variant}"
+        else:
+            view = "interlocutors" if tab.loaded else "loading"
+        return (view, tab.console, tab.prompt is not None)
+
+    def frame(self) -> np.ndarray:
+        """The whole simulated screen (grayscale)."""
+        with self._lock:
+            key = self._view_key()
+            frame = self._frames.get(key)
+            if frame is None:
+                view, console, prompt = key
+                frame = self._views[view].copy()
+                if console:
+                    frame[CONSOLE_TOP:, :] = 40
+                if prompt:
+                    _paste(frame, self._prompt, PROMPT_POS)
+                self._frames[key] = frame
+            return frame
+
+    def capture(self, region=None) -> np.ndarray:
+        """Screen source for ``vision.set_screen_source``."""
+        frame = self.frame()
+        if region is None:
+            return frame
+        x, y, w, h = (int(value) for value in region)
+        return np.ascontiguousarray(frame[max(0, y):y + h, max(0, x):x + w])
+
+    def window_title(self) -> str:
+        with self._lock:
+            if self.notepad is not None:
+                return self._notepad_title
+            tab = self.active
+            title = "Interlocuteurs" if tab.kind == "interlocutors" else "Fiche client" if tab.view == "record" else "Accueil"
+            return f"{title} - CRM GP — {BROWSER_TITLE}"
+
+    # --- latences et exécution en arrière-plan ---
+
+    def delay(self, name: str) -> float:
+        base = self.latencies[name]
+        if base <= 0:
+            return 0.0
+        with self._lock:
+            return base * self._rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def wait(self, name: str) -> bool:
+        """Sleep one simulated latency; ``True`` when the simulator stopped meanwhile."""
+        delay = self.delay(name)
+        return self._stop.wait(delay) if delay > 0 else self._stop.is_set()
+
+    def _spawn(self, target: Callable, *args) -> None:
+        threading.Thread(target=target, args=args, name=f"crm-sim-{target.__name__}", daemon=True).start()
+
+    def _count(self, name: str) -> None:
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+    # --- presse-papiers ---
+
+    def set_clipboard(self, text: str, *, delay: float = 0.0) -> None:
+        with self._lock:
+            if delay > 0:
+                self._clipboard_next = (text, time.monotonic() + delay)
+            else:
+                self._clipboard, self._clipboard_next = text, None
+
+    def get_clipboard(self) -> str:
+        with self._lock:
+            if self._clipboard_next is not None and time.monotonic() >= self._clipboard_next[1]:
+                self._clipboard, self._clipboard_next = self._clipboard_next[0], None
+            return self._clipboard
+
+    # --- champs de saisie ---
+
+    def _field(self) -> str | None:
+        if self.focus == "search":
+            return self.active.search
+        if self.focus == "console":
+            return self.active.console_text
+        if self.focus == "prompt" and self.active.prompt is not None:
+            return self.active.prompt.text
+        if self.focus == "notepad":
+            return self.notepad
+        return None
+
+    def _set_field(self, text: str) -> None:
+        if self.focus == "search":
+            self.active.search = text
+        elif self.focus == "console":
+            self.active.console_text = text
+        elif self.focus == "prompt" and self.active.prompt is not None:
+            self.active.prompt.text = text
+
+    def _insert(self, text: str) -> None:
+        current = self._field()
+        if current is None:
+            return
+        self._set_field(text if self.selected else current + text)
+        self.selected = False
+
+    # --- entrées (appelées par le pyautogui simulé) ---
+
+    def click(self, x=None, y=None, clicks: int = 1, *_args, **_kwargs) -> None:
+        if isinstance(x, (tuple, list)):
+            x, y = x[0], x[1]
+        point = (int(x), int(y))
+        with self._lock:
+            tab = self.active
+            if self.notepad is not None or tab.prompt is not None:
+                # Fenêtre modale au premier plan
+                return
+            self.selected = False
+            if tab.kind == "crm" and tab.view != "opening" and _inside(point, self._search_box):
+                self.focus = "search"
+            elif tab.kind == "crm" and tab.view == "results" and _inside(point, self._button_boxes[tab.variant]):
+                self.focus = None
+                self._count("clics Interlocuteur")
+                self._open_record(tab, tab.phone)
+            elif tab.console and point[1] >= CONSOLE_TOP:
+                self.focus = "console"
+            else:
+                self.focus = None
+
+    def doubleClick(self, x=None, y=None, *_args, **_kwargs) -> None:  # noqa: N802
+        self.click(x, y)
+
+    def moveTo(self, *_args, **_kwargs) -> None:  # noqa: N802
+        pass
+
+    def typewrite(self, message, interval: float = 0.0, *_args, **_kwargs) -> None:
+        for char in message:
+            with self._lock:
+                self._insert(char)
+            if interval:
+                time.sleep(interval)
+
+    def press(self, keys, presses: int = 1, *_args, **_kwargs) -> None:
+        for key in [keys] if isinstance(keys, str) else keys:
+            for _ in range(presses):
+                self._key(key.lower())
+
+    def hotkey(self, *keys, **_kwargs) -> None:
+        combo = tuple(key.lower() for key in keys)
+        with self._lock:
+            if combo in (("ctrl", "a"), ("command", "a")):
+                self.selected = self._field() is not None
+            elif combo in (("ctrl", "c"), ("command", "c")):
+                text = self._field()
+                if self.selected and text:
+                    self.set_clipboard(text, delay=self.delay("clipboard"))
+            elif combo in (("ctrl", "v"), ("command", "v")):
+                self._insert(self.get_clipboard())
+            elif combo in (("ctrl", "shift", "k"), ("ctrl", "shift", "j"), ("command", "option", "j")):
+                if self.notepad is None:
+                    self.active.console = True
+                    self.focus = "console"
+                    self.selected = False
+            elif combo in (("ctrl", "1"), ("command", "1")):
+                if self.notepad is None and self.active.prompt is None:
+                    self.active = self.tabs[0]
+                    self.focus = None
+
+    def _key(self, key: str) -> None:
+        with self._lock:
+            if key in ("backspace", "delete"):
+                text = self._field()
+                if text is not None:
+                    self._set_field("" if self.selected else text[:-1] if key == "backspace" else text)
+                self.selected = False
+            elif key in ("end", "right", "left", "home"):
+                self.selected = False
+            elif key == "escape":
+                if self.focus == "prompt":
+                    self._close_prompt()
+            elif key == "enter":
+                if self.focus == "prompt":
+                    self._close_prompt()
+                elif self.focus == "search":
+                    self._submit(self.active)
+                elif self.focus == "console":
+                    text, self.active.console_text = self.active.console_text, ""
+                    self._execute(self.active, text)
+
+    # --- CRM ---
+
+    def _submit(self, tab: Tab) -> None:
+        phone = "".join(ch for ch in tab.search if ch.isdigit())
+        self._generation += 1
+        generation = self._generation
+        tab.view = "searching"
+        tab.phone = phone
+        # La recherche charge une nouvelle page: plus de window.__crm
+        tab.runtime = None
+        self._count("recherches")
+        # Une anomalie au plus par numéro: la reprise doit aboutir
+        stray = phone not in self._searched and self._rng.random() < self.anomalies
+        self._searched.add(phone)
+        self._spawn(self._show_outcome, tab, phone, generation, stray)
+
+    def _show_outcome(self, tab: Tab, phone: str, generation: int, stray: bool) -> None:
+        if self.wait("search"):
+            return
+        with self._lock:
+            if generation != self._generation or tab not in self.tabs:
+                return
+            if stray:
+                self._count("anomalies")
+                tab.view = "home"
+                self._open_prompt(tab, "Message de la page")
+                return
+            outcome = self.scenario.get(phone, {}).get("outcome", NO_RESULT)
+            if outcome == FOUND:
+                tab.view = "results"
+                tab.variant = self._rng.randrange(len(self._button_boxes))
+            else:
+                tab.view = outcome
+
+    def _open_record(self, opener: Tab, phone: str) -> None:
+        """The record opens in a new tab at once, its page loads after a latency."""
+        with self._lock:
+            if opener not in self.tabs:
+                return
+            record = Tab("crm", phone, view="opening")
+            self.tabs.insert(self.tabs.index(opener) + 1, record)
+            self.active = record
+            self.focus = None
+
+        def load() -> None:
+            if not self.wait("record") and record.view == "opening":
+                record.view = "record"
+
+        self._spawn(load)
+
+    def _close_tab(self, tab: Tab) -> None:
+        with self._lock:
+            if not tab.closable:
+                # window.close() refusé sur un onglet ouvert par l'utilisateur
+                self._count("window.close ignore")
+                return
+            if tab not in self.tabs:
+                return
+            index = self.tabs.index(tab)
+            self.tabs.remove(tab)
+            if self.active is tab:
+                self.active = self.tabs[max(0, index - 1)]
+                self.focus = None
+
+    def _open_prompt(self, tab: Tab, text: str) -> Prompt:
+        prompt = Prompt(text)
+        tab.prompt = prompt
+        self._count("prompts")
+        if tab is self.active:
+            self.focus = "prompt"
+            self.selected = True
+        return prompt
+
+    def _close_prompt(self) -> None:
+        prompt = self.active.prompt
+        self.active.prompt = None
+        self.focus = None
+        self.selected = False
+        if prompt is not None:
+            prompt.closed.set()
+
+    # --- Notepad (subprocess simulé dans snippets) ---
+
+    def open_notepad(self, path: str) -> None:
+        text = Path(path).read_text(encoding="utf-8")
+
+        def show() -> None:
+            if self.wait("notepad"):
+                return
+            with self._lock:
+                self.notepad = text
+                self._notepad_title = f"{Path(path).name} - Bloc-notes"
+                self.focus = "notepad"
+                self.selected = False
+
+        self._count("notepad")
+        self._spawn(show)
+
+    def close_notepad(self) -> None:
+        with self._lock:
+            if self.notepad is not None:
+                self.notepad = None
+                self.focus = None
+
+    def _fake_subprocess(self) -> types.ModuleType:
+        module = types.ModuleType("subprocess")
+        module.__dict__.update({name: getattr(subprocess, name) for name in dir(subprocess) if not name.startswith("__")})
+        simulator = self
+
+        class Popen:
+            def __new__(cls, args, *rest, **kwargs):
+                if str(args[0]).lower().startswith("notepad"):
+                    simulator.open_notepad(str(args[1]))
+                    return types.SimpleNamespace(pid=0, returncode=0, wait=lambda *_a, **_k: 0, poll=lambda: 0, kill=lambda: None)
+                return subprocess.Popen(args, *rest, **kwargs)
+
+        def run(args, *rest, **kwargs):
+            if str(args[0]).lower() == "taskkill":
+                if any("notepad" in str(arg).lower() for arg in args):
+                    simulator.close_notepad()
+                return subprocess.CompletedProcess(args, 0)
+            return subprocess.run(args, *rest, **kwargs)
+
+        module.Popen = Popen
+        module.run = run
+        return module
+
+    # --- exécuteur de snippets ---
+
+    @staticmethod
+    def _load_snippets() -> Dict[str, tuple[str, bool]]:
+        """Runtime function -> (resolved source, posts its own result on the channel)."""
+        loaded = {}
+        for name, file_name in snippet_runtime.RUNTIME_FUNCTIONS.items():
+            path = snippet_runtime.SNIPPET_DIR / file_name
+            source = snippet_runtime.resolve_includes(path.read_text(encoding="utf-8")).lstrip("\ufeff")
+            loaded[name] = (source.strip(), "__crmChannel" in source)
+        return loaded
+
+    def _execute(self, tab: Tab, text: str) -> None:
+        """Run what the console received (runtime bundle, one-line call, full snippet)."""
+        script = text.strip()
+        if script == "window.close()":
+            self._close_tab(tab)
+            return
+        bundle = _BUNDLE_RE.search(script)
+        if bundle is not None and "window.__crm={version:V" in script:
+            tab.runtime = json.loads(bundle.group(1))
+            self._count("runtime injecte")
+        call = _CALL_RE.search(script)
+        if call is not None:
+            version, name = json.loads(call.group(1)), call.group(2)
+            url, request_id = json.loads(call.group(3)), json.loads(call.group(4))
+            channel = {"url": url, "id": request_id} if url else None
+            if tab.runtime != version:
+                self._count("runtime absent")
+                if channel is not None:
+                    self._spawn(self._post, channel, {"id": request_id, "runtime": "missing"})
+                return
+            self._invoke(tab, name, channel, runtime=True)
+            return
+        for name, (source, _) in self._snippets.items():
+            if source in script:
+                preamble = _PREAMBLE_RE.search(script)
+                self._invoke(tab, name, json.loads(preamble.group(1)) if preamble else None, runtime=False)
+                return
+        self._count("scripts inconnus")
+
+    def _invoke(self, tab: Tab, name: str, channel: dict | None, *, runtime: bool) -> None:
+        self._count(f"snippet {name}")
+        posts_result = self._snippets[name][1]
+        if name == "openTab":
+            opened = self._open_interlocutors(tab)
+            if runtime and channel is not None and not posts_result:
+                # Accusé du runtime pour les snippets sans résultat
+                self._spawn(self._post, channel, {"id": channel["id"], "payload": json.dumps(opened)})
+        elif name == "extract":
+            self._spawn(self._extract, tab, channel if posts_result else None)
+        elif name == "prefetch":
+            self._spawn(self._prefetch, tab, channel if posts_result else None)
+        else:
+            self._count("snippets non simules")
+
+    def _open_interlocutors(self, opener: Tab) -> bool:
+        if opener.kind != "crm" or opener.view != "record":
+            return False
+        tab = Tab("interlocutors", opener.phone)
+        self.tabs.insert(self.tabs.index(opener) + 1, tab)
+        self.active = tab
+        self.focus = None
+
+        def load() -> None:
+            if self.wait("page_load"):
+                return
+            tab.loaded = True
+            # t.onload=()=>window.close(): l'onglet fiche se ferme
+            self._close_tab(opener)
+
+        self._spawn(load)
+        return True
+
+    def _post(self, channel: dict, message: dict) -> bool:
+        request = urllib.request.Request(
+            channel["url"],
+            data=json.dumps(message).encode("utf-8"),
+            headers={"Content-Type": "text/plain"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return 200 <= response.status < 300
+        except Exception:
+            return False
+
+    def _deliver(self, tab: Tab, channel: dict | None, text: str) -> None:
+        """Result on the channel, else in a prompt() left open until Enter/Escape."""
+        if channel is not None and self._post(channel, {"id": channel["id"], "payload": text}):
+            return
+        with self._lock:
+            if tab not in self.tabs:
+                return
+            prompt = self._open_prompt(tab, text)
+        while not prompt.closed.wait(0.05):
+            if self._stop.is_set():
+                return
+
+    def _extract(self, tab: Tab, channel: dict | None) -> None:
+        started = time.monotonic()
+        while not tab.loaded:
+            if self._stop.wait(0.02) or time.monotonic() - started > 10:
+                return
+        if self.wait("extract"):
+            return
+        items = self.scenario.get(tab.phone, {}).get("contacts", []) if tab.kind == "interlocutors" else []
+        timing = {"pages": 1, "waitMs": 0, "extractMs": round((time.monotonic() - started) * 1000), "timeouts": 0}
+        self._deliver(tab, channel, json.dumps({"items": items, "timing": timing}, ensure_ascii=False, indent=2))
+        self._close_tab(tab)
+
+    def _prefetch(self, tab: Tab, channel: dict | None) -> None:
+        if self.wait("prefetch"):
+            return
+        entry = self.scenario.get(tab.phone, {})
+        if tab.kind != "crm" or tab.view not in ("results", "slow"):
+            # Pas de liste de résultats: canal seulement, sans prompt
+            if channel is not None:
+                self._post(channel, {"id": channel["id"], "payload": json.dumps({"items": [], "timing": {"timeout": True}})})
+            return
+        items = [{"n": entry.get("company", ""), "s": entry.get("siret", ""), "a": "", "m": "", "g": "Non", "t": "Actif"}]
+        self._deliver(tab, channel, json.dumps({"items": items, "timing": {"waitMs": 0}}, ensure_ascii=False))
+        # l[0].click(): la fiche s'ouvre dans un nouvel onglet
+        self._open_record(tab, tab.phone)
+
+    # --- cycle de vie ---
+
+    def start(self) -> "CrmSimulator":
+        """Serve the screen, input, clipboard and Notepad of the workflow from this simulator."""
+        global _ACTIVE
+        _ACTIVE = self
+        vision.set_screen_source(self.capture)
+        self._previous_subprocess = snippets.subprocess
+        snippets.subprocess = self._fake_subprocess()
+        return self
+
+    def stop(self) -> None:
+        global _ACTIVE
+        self._stop.set()
+        vision.set_screen_source(None)
+        if self._previous_subprocess is not None:
+            snippets.subprocess = self._previous_subprocess
+            self._previous_subprocess = None
+        if _ACTIVE is self:
+            _ACTIVE = None
+
+    def __enter__(self) -> "CrmSimulator":
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.stop()
+
+
+__all__ = [
+    "SCREEN_SIZE",
+    "FOUND",
+    "SLOW",
+    "NO_RESULT",
+    "OUTCOMES",
+    "DEFAULT_LATENCIES",
+    "install",
+    "synthetic_scenario",
+    "expected_status",
+    "CrmSimulator",
+]
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Benchmark et précision de la détection d'images CRM, sans écran.
+
+Rejoue ``vision.locate_on_screen`` et les waiters sur un corpus de captures
+annotées (``labels.json``) et rapporte, par template: latence, faux positifs,
+faux négatifs, et les réglages confiance/échelles recommandés.
+
+Usage (depuis crm/):
+    python -m bench.vision_bench run bench/corpus
+    python -m bench.vision_bench synth bench/corpus --count 40
+    python -m bench.vision_bench record bench/corpus   # sur la VM, écran réel
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+from bench import headless
+
+headless.install()
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from modules import config, stats, vision, waiters  # noqa: E402
+
+LABELS_FILE = "labels.json"
+IOU_THRESHOLD = 0.5
+CONFIDENCE_GRID = tuple(round(0.60 + 0.025 * i, 3) for i in range(15))
+SCALE_GRID = tuple(sorted({*config.DEFAULT_SCALES, 0.9, 0.92, 1.0, 1.08, 1.1}))
+
+
+def _iou(a, b) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def _baseline_settings(template_name: str) -> tuple[float, tuple[float, ...]]:
+    """Confidence and scales used in production for this template."""
+    for spec in (*config.SEARCH_FIELD_TEMPLATES, *config.SEARCH_ICON_TEMPLATES, *config.HEADER_TEMPLATES):
+        if os.path.basename(spec.get("image", "")) == template_name:
+            return (
+                spec.get("confidence", config.IMAGE_CONFIDENCE),
+                tuple(spec.get("scales") or config.DEFAULT_SCALES),
+            )
+    # Issue de recherche: surveillée par le workflow à sa propre confiance
+    outcome_names = {os.path.basename(path) for path in (*config.INTERLOCUTOR_BUTTON_IMAGES, config.NO_RESULT_IMAGE)}
+    if template_name in outcome_names:
+        return config.OUTCOME_CONFIDENCE, tuple(config.DEFAULT_SCALES)
+    return config.IMAGE_CONFIDENCE, tuple(config.DEFAULT_SCALES)
+
+
+def load_corpus(corpus_dir: Path) -> list[dict]:
+    labels_path = corpus_dir / LABELS_FILE
+    if not labels_path.exists():
+        raise FileNotFoundError(f"{labels_path} introuvable")
+    data = json.loads(labels_path.read_text(encoding="utf-8"))
+    entries = []
+    for item in data.get("screenshots", []):
+        image_path = corpus_dir / item["file"]
+        if not image_path.exists():
+            print(f"[WARN] Capture absente: {image_path}")
+            continue
+        entries.append({
+            "file": item["file"],
+            "image": Image.open(image_path).convert("RGB"),
+            "expect": {name: (tuple(box) if box else None) for name, box in item.get("expect", {}).items()},
+        })
+    return entries
+
+
+class _FrameSource:
+    """Screen source serving the current corpus screenshot."""
+
+    def __init__(self) -> None:
+        self.image: Image.Image | None = None
+
+    def __call__(self, region):
+        if region is None:
+            return self.image
+        x, y, w, h = region
+        return self.image.crop((x, y, x + w, y + h))
+
+
+def _classify(expected, found) -> str:
+    if expected is None:
+        return "tn" if found is None else "fp"
+    if found is None:
+        return "fn"
+    return "tp" if _iou(expected, found) >= IOU_THRESHOLD else "fp"
+
+
+def _best_settings(samples: list[tuple[tuple | None, list]]) -> dict:
+    """Pick the cheapest scale set and the confidence with fewest errors.
+
+    ``samples`` holds ``(expected_box, [(scale, score, box), ...])`` per
+    screenshot. Single scales are preferred over the full set when they make
+    no more errors, then the confidence with the widest margin.
+    """
+    candidates = [(scale,) for scale in SCALE_GRID] + [tuple(config.DEFAULT_SCALES)]
+    best = None
+    for scale_set in candidates:
+        pos_scores, neg_scores = [], []
+        for expected, scored in samples:
+            relevant = [item for item in scored if any(abs(item[0] - s) < 1e-3 for s in scale_set)]
+            if not relevant:
+                continue
+            _, score, box = max(relevant, key=lambda item: item[1])
+            if expected is not None and _iou(expected, box) >= IOU_THRESHOLD:
+                pos_scores.append(score)
+            else:
+                if expected is not None:
+                    pos_scores.append(-1.0)
+                neg_scores.append(score)
+        if not pos_scores and not neg_scores:
+            continue
+        for conf in CONFIDENCE_GRID:
+            errors = sum(1 for s in pos_scores if s < conf) + sum(1 for s in neg_scores if s >= conf)
+            margin = min(
+                min((s - conf for s in pos_scores if s >= conf), default=1.0),
+                min((conf - s for s in neg_scores if s < conf), default=1.0),
+            )
+            key = (errors, len(scale_set), -margin)
+            if best is None or key < best[0]:
+                best = (key, {"confidence": conf, "scales": list(scale_set), "errors": errors, "margin": round(margin, 3)})
+    return best[1] if best else {}
+
+
+def run_benchmark(corpus_dir: Path, *, repeat: int = 3) -> dict:
+    entries = load_corpus(corpus_dir)
+    if not entries:
+        raise RuntimeError("Corpus vide")
+
+    source = _FrameSource()
+    vision.set_screen_source(source)
+    previous_cache = config.VISION_FRAME_CACHE
+    previous_calibration = config.CALIBRATION_ENABLED
+    config.VISION_FRAME_CACHE = False  # mesurer le vrai coût de matchTemplate
+    config.CALIBRATION_ENABLED = False  # évaluer les réglages de production
+    latencies = stats.LatencyRecorder(window=100000)
+    waiter_latencies = stats.LatencyRecorder(window=100000)
+    counts: dict[str, dict[str, int]] = {}
+    sweep_samples: dict[str, list] = {}
+
+    try:
+        for entry in entries:
+            source.image = entry["image"]
+            frame = cv2.cvtColor(np.array(entry["image"]), cv2.COLOR_RGB2GRAY)
+            for name, expected in entry["expect"].items():
+                path = config.asset(name)
+                if not os.path.exists(path):
+                    print(f"[WARN] Template inconnu dans le corpus: {name}")
+                    continue
+                confidence, scales = _baseline_settings(name)
+
+                found = None
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    found = vision.locate_on_screen(path, confidence=confidence, scales=scales)
+                    latencies.record(name, time.perf_counter() - start)
+
+                outcome = _classify(expected, found)
+                counts.setdefault(name, {"tp": 0, "tn": 0, "fp": 0, "fn": 0})[outcome] += 1
+                if outcome in ("fp", "fn"):
+                    print(f"   [{outcome.upper()}] {name} sur {entry['file']}: attendu {expected}, obtenu {found}")
+
+                if expected is not None:
+                    start = time.perf_counter()
+                    waiters.wait_for_image_on_screen(
+                        path, timeout=1.0, interval=0.01, confidence=confidence, scales=scales
+                    )
+                    waiter_latencies.record(name, time.perf_counter() - start)
+
+                sweep_samples.setdefault(name, []).append(
+                    (expected, vision.score_in_frame(frame, path, scales=SCALE_GRID))
+                )
+    finally:
+        vision.set_screen_source(None)
+        config.VISION_FRAME_CACHE = previous_cache
+        config.CALIBRATION_ENABLED = previous_calibration
+
+    lat = latencies.summary()
+    wlat = waiter_latencies.summary()
+    report = {}
+    for name, c in sorted(counts.items()):
+        confidence, scales = _baseline_settings(name)
+        report[name] = {
+            **c,
+            "baseline": {"confidence": confidence, "scales": list(scales)},
+            "locate_ms_p50": round(lat[name]["p50"] * 1000, 2),
+            "locate_ms_p95": round(lat[name]["p95"] * 1000, 2),
+            "waiter_ms_p50": round(wlat[name]["p50"] * 1000, 2) if name in wlat else None,
+            "recommended": _best_settings(sweep_samples.get(name, [])),
+        }
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'template':<26}{'TP':>4}{'TN':>4}{'FP':>4}{'FN':>4}{'p50 ms':>9}{'p95 ms':>9}  recommande")
+    for name, r in report.items():
+        rec = r["recommended"]
+        rec_text = f"conf={rec.get('confidence')} scales={rec.get('scales')} err={rec.get('errors')}" if rec else "-"
+        print(
+            f"{name:<26}{r['tp']:>4}{r['tn']:>4}{r['fp']:>4}{r['fn']:>4}"
+            f"{r['locate_ms_p50']:>9.1f}{r['locate_ms_p95']:>9.1f}  {rec_text}"
+        )
+
+
+def synthesize_corpus(corpus_dir: Path, *, count: int, seed: int, backgrounds: list[Path]) -> None:
+    """Build a labelled corpus by pasting templates on backgrounds at known boxes."""
+    rng = random.Random(seed)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    templates = sorted({p.name for p in config.ASSETS_DIR.glob("*.png")})
+    screenshots = []
+    for index in range(count):
+        if backgrounds:
+            canvas = Image.open(rng.choice(backgrounds)).convert("RGB")
+        else:
+            noise = np.random.default_rng(seed + index).integers(180, 256, size=(900, 1440, 3), dtype=np.uint8)
+            canvas = Image.fromarray(noise)
+        expect = {name: None for name in templates}
+        placed = []
+        for name in rng.sample(templates, k=min(3, len(templates))):
+            templ = Image.open(config.asset(name)).convert("RGB")
+            scale = rng.choice(config.DEFAULT_SCALES)
+            w, h = max(1, int(templ.width * scale)), max(1, int(templ.height * scale))
+            if w >= canvas.width or h >= canvas.height:
+                continue
+            for _ in range(20):
+                x, y = rng.randrange(0, canvas.width - w), rng.randrange(0, canvas.height - h)
+                if all(_iou((x, y, w, h), other) == 0 for other in placed):
+                    break
+            else:
+                continue
+            canvas.paste(templ.resize((w, h)), (x, y))
+            placed.append((x, y, w, h))
+            expect[name] = [x, y, w, h]
+        file_name = f"synth_{index:03d}.png"
+        canvas.save(corpus_dir / file_name)
+        screenshots.append({"file": file_name, "expect": expect})
+    (corpus_dir / LABELS_FILE).write_text(json.dumps({"screenshots": screenshots}, indent=2), encoding="utf-8")
+    print(f"{count} captures synthetiques ecrites dans {corpus_dir}")
+
+
+def record_screenshot(corpus_dir: Path, *, name: str | None) -> None:
+    """Capture the real screen into the corpus with an empty label to fill in."""
+    import pyautogui
+
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    file_name = f"{name or time.strftime('capture_%Y%m%d_%H%M%S')}.png"
+    pyautogui.screenshot().save(corpus_dir / file_name)
+    labels_path = corpus_dir / LABELS_FILE
+    data = json.loads(labels_path.read_text(encoding="utf-8")) if labels_path.exists() else {"screenshots": []}
+    data["screenshots"].append({"file": file_name, "expect": {}})
+    labels_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    print(f"Capture ajoutee: {file_name} (completez 'expect' dans {LABELS_FILE})")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="rejouer la detection sur le corpus")
+    run_p.add_argument("corpus", type=Path)
+    run_p.add_argument("--repeat", type=int, default=3)
+    run_p.add_argument("--json", type=Path, help="ecrire le rapport JSON")
+
+    synth_p = sub.add_parser("synth", help="generer un corpus synthetique")
+    synth_p.add_argument("corpus", type=Path)
+    synth_p.add_argument("--count", type=int, default=30)
+    synth_p.add_argument("--seed", type=int, default=0)
+    synth_p.add_argument("--background", type=Path, action="append", default=[])
+
+    rec_p = sub.add_parser("record", help="capturer l'ecran reel dans le corpus")
+    rec_p.add_argument("corpus", type=Path)
+    rec_p.add_argument("--name")
+
+    args = parser.parse_args(argv)
+    if args.command == "synth":
+        synthesize_corpus(args.corpus, count=args.count, seed=args.seed, backgrounds=args.background)
+        return 0
+    if args.command == "record":
+        record_screenshot(args.corpus, name=args.name)
+        return 0
+
+    report = run_benchmark(args.corpus, repeat=args.repeat)
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    errors = sum(r["fp"] + r["fn"] for r in report.values())
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Débit du workflow CRM de bout en bout, sans VM ni écran.
+
+Exécute ``workflow.process_phone_numbers`` sur le CRM simulé de
+``bench.simulator`` (captures de ``assets/``, latences configurables) et
+rapporte le débit en numéros/heure, la durée par numéro et les statuts
+journalisés qui diffèrent du scénario. A relancer après chaque changement
+de timing ou de vision.
+
+Usage (depuis crm/):
+    python -m bench.workflow_bench --phones 30
+    python -m bench.workflow_bench --phones 30 --profile rapide --latency search=2.5
+    python -m bench.workflow_bench --phones 30 --pipeline --anomalies 0.1 --json rapport.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench import simulator
+
+from modules import config, journal as run_journal, stats, workflow  # noqa: E402
+
+# Fichiers d'état redirigés vers le dossier du banc: ceux de production restent intacts
+STATE_FILES = (
+    "VISION_PROFILES_FILE",
+    "HIT_STATS_FILE",
+    "OUTCOME_HISTORY_FILE",
+    "DETECTION_HISTORY_FILE",
+    "CACHE_FILE",
+    "INPUT_SPEEDS_FILE",
+    "WORKER_LAYOUT_FILE",
+)
+
+
+def _isolate_state(state_dir: Path) -> None:
+    state_dir.mkdir(parents=True, exist_ok=True)
+    for name in STATE_FILES:
+        setattr(config, name, str(state_dir / Path(getattr(config, name)).name))
+    config.JOURNAL_DIR = str(state_dir / "crm_journal")
+
+
+def _latency(value: str) -> tuple[str, float]:
+    name, _, seconds = value.partition("=")
+    if name not in simulator.DEFAULT_LATENCIES:
+        raise argparse.ArgumentTypeError(f"latence inconnue: {name} ({', '.join(simulator.DEFAULT_LATENCIES)})")
+    try:
+        return name, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"duree invalide: {value} (nom=secondes)") from None
+
+
+def run_bench(
+    scenario: dict,
+    *,
+    state_dir: Path,
+    latencies: dict | None = None,
+    jitter: float = 0.2,
+    anomalies: float = 0.0,
+    seed: int = 0,
+) -> dict:
+    """Search every phone of ``scenario`` in the simulated CRM; returns the report."""
+    phones = list(scenario)
+    company_info_map = {phone: {"company": entry["company"], "siret": entry["siret"]} for phone, entry in scenario.items()}
+    journal = run_journal.Journal(state_dir / "crm_run.jsonl").open()
+    crm = simulator.CrmSimulator(scenario, latencies=latencies, jitter=jitter, anomalies=anomalies, seed=seed)
+    started = time.time()
+    try:
+        with crm:
+            workflow.process_phone_numbers(phones, company_info_map, refresh=True, journal=journal)
+    finally:
+        elapsed = time.time() - started
+        journal.close()
+
+    records = list(journal.records())
+    durations, previous = [], started
+    mismatches = []
+    for record in records:
+        durations.append(record["ts"] - previous)
+        previous = record["ts"]
+        statuses = sorted({str(row.get("status")) for row in record.get("rows") or ()})
+        expected = simulator.expected_status(scenario.get(record["phone"], {}))
+        if statuses != [expected]:
+            mismatches.append({"phone": record["phone"], "expected": expected, "got": statuses})
+    done = {record["phone"] for record in records}
+    return {
+        "phones": len(phones),
+        "journaled": len(done),
+        "missing": [phone for phone in phones if phone not in done],
+        "elapsed_s": round(elapsed, 1),
+        "phones_per_hour": round(len(done) * 3600 / elapsed, 1) if elapsed > 0 else None,
+        "phone_s_p50": round(stats.percentile(durations, 0.5) or 0.0, 2),
+        "phone_s_p95": round(stats.percentile(durations, 0.95) or 0.0, 2),
+        "mismatches": mismatches,
+        "latencies": crm.latencies,
+        "timing_profile": config.TIMING_PROFILE,
+        "simulator": dict(sorted(crm.counters.items())),
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"\nNumeros: {report['journaled']}/{report['phones']} en {report['elapsed_s'] / 60:.1f} min "
+        f"-> {report['phones_per_hour']} numeros/h "
+        f"(par numero: p50 {report['phone_s_p50']}s, p95 {report['phone_s_p95']}s, profil {report['timing_profile']})"
+    )
+    conform = report["journaled"] - len(report["mismatches"])
+    print(f"Statuts: {conform}/{report['journaled']} conformes au scenario")
+    for item in report["mismatches"]:
+        print(f"   [ECART] {item['phone']}: attendu {item['expected']}, obtenu {', '.join(item['got']) or '-'}")
+    if report["missing"]:
+        print(f"   [WARN] {len(report['missing'])} numero(s) non journalise(s): {', '.join(report['missing'][:10])}")
+    print("Simulateur: " + ", ".join(f"{name} {count}" for name, count in report["simulator"].items()))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phones", type=int, default=20, help="numeros du scenario synthetique (defaut: 20)")
+    parser.add_argument("--found", type=float, default=0.7, help="part des numeros avec bouton 'Interlocuteur'")
+    parser.add_argument("--slow", type=float, default=0.1, help="part des numeros trouves par le pre-fetch seulement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default=config.TIMING_PROFILE, choices=sorted(config.TIMING_PROFILES))
+    parser.add_argument(
+        "--latency", type=_latency, action="append", default=[], metavar="NOM=SECONDES",
+        help=f"latence simulee ({', '.join(f'{k}={v}' for k, v in simulator.DEFAULT_LATENCIES.items())})",
+    )
+    parser.add_argument("--jitter", type=float, default=0.2, help="variation des latences (+/- 20%% par defaut)")
+    parser.add_argument("--anomalies", type=float, default=0.0, help="part des recherches interrompues par un prompt")
+    parser.add_argument("--pipeline", action="store_true", help="extractions en arriere-plan (CRM_PIPELINE)")
+    parser.add_argument("--no-channel", action="store_true", help="resultats par prompt() et copie, sans canal local")
+    parser.add_argument("--state", type=Path, help="dossier des fichiers d'etat (defaut: dossier temporaire)")
+    parser.add_argument("--json", type=Path, help="ecrire le rapport JSON")
+    args = parser.parse_args(argv)
+
+    state_dir = args.state or Path(tempfile.mkdtemp(prefix="crm_bench_"))
+    _isolate_state(state_dir)
+    config.set_timing_profile(args.profile)
+    config.CDP_ENABLED = False
+    config.BATCH_ENABLED = False
+    config.PIPELINE_ENABLED = args.pipeline
+    config.CHANNEL_ENABLED = not args.no_channel
+    print(f"[INFO] Etat du banc: {state_dir}")
+
+    scenario = simulator.synthetic_scenario(args.phones, found=args.found, slow=args.slow, seed=args.seed)
+    report = run_bench(
+        scenario,
+        state_dir=state_dir,
+        latencies=dict(args.latency),
+        jitter=args.jitter,
+        anomalies=args.anomalies,
+        seed=args.seed,
+    )
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 1 if report["mismatches"] or report["missing"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
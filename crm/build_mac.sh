@@ -26,6 +26,9 @@ NAME="CRMSearch"
 ICON_ARG=""
 # If you have an icon, set ICON_ARG="--icon path/to/icon.icns"
 
+echo "[*] Bundling JS snippets..."
+python -m modules.snippet_runtime
+
 echo "[*] Running PyInstaller..."
 pyinstaller run_crm.py --name "$NAME" --onedir --noconfirm \
   --add-data "assets:assets" \
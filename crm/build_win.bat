@@ -25,6 +25,9 @@ if exist dist rmdir /s /q dist
 REM 4) Build
 set NAME=CRMSearch
 set ICON=
+echo [*] Bundling JS snippets...
+python -m modules.snippet_runtime || goto :error
+
 echo [*] Running PyInstaller...
 pyinstaller run_crm.py --name %NAME% --onedir --noconfirm ^
   --add-data "assets;assets" ^
@@ -11,7 +11,6 @@ import signal
 import sys
 from typing import Iterable, List
 import datetime
-import pandas as pd
 import os
 import glob
 import subprocess
@@ -24,10 +23,10 @@ try:
 except Exception:
     HAS_TK = False
 
-from modules import config, filesystem, snippets, ui_actions, workflow
+from modules import config, filesystem, inputs, journal, phones, snippets, ui_actions, workers, workflow
 
-# Variable pour stocker les résultats partiels
-_partial_results: list[dict] = []
+# Journal de l'exécution en cours (source des sauvegardes partielles)
+_run_journal: journal.Journal | None = None
 
 # Callback de nettoyage (sera défini par run_crm.py si disponible)
 _cleanup_callback = None
@@ -40,16 +39,21 @@ def set_cleanup_callback(callback):
 
 
 def _save_partial_results():
-    """Sauvegarde les résultats partiels en cas d'interruption"""
-    global _partial_results
-    if _partial_results:
+    """Sauvegarde les résultats partiels (depuis le journal) en cas d'interruption"""
+    if _run_journal is not None:
         try:
-            df = pd.DataFrame(_partial_results)
-            date_str = datetime.datetime.now().strftime("%Y-%m-%d")
-            partial_file = config.OUTPUT_FILE.replace('.xlsx', f'_partial_{date_str}.xlsx')
-            df.to_excel(partial_file, index=False)
+            date_str = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            # Un fichier par exécution interrompue: journal (fichier d'entrée) + horodatage
+            base_name = config.OUTPUT_FILE.replace('.xlsx', f'_partial_{_run_journal.path.stem}_{date_str}.xlsx')
+            partial_file = base_name
+            counter = 2
+            while os.path.exists(partial_file):
+                partial_file = base_name.replace('.xlsx', f'_{counter}.xlsx')
+                counter += 1
+            count = _run_journal.export_excel(partial_file)
             print(f"\n[SAUVEGARDE PARTIELLE] Résultats sauvegardés dans: {partial_file}")
-            print(f"[SAUVEGARDE PARTIELLE] {len(_partial_results)} résultats sauvegardés")
+            print(f"[SAUVEGARDE PARTIELLE] {count} résultats sauvegardés")
+            print(f"[SAUVEGARDE PARTIELLE] Reprise possible avec --resume (journal: {_run_journal.path})")
         except Exception as e:
             print(f"[ERREUR SAUVEGARDE PARTIELLE] {e}")
 
@@ -72,23 +76,7 @@ def _signal_handler(signum, frame):
 
 
 def _clean_phone_numbers(raw_numbers: Iterable[object]) -> List[str]:
-    cleaned: List[str] = []
-    for value in raw_numbers:
-        phone_str = str(value).strip()
-        if not phone_str:
-            continue
-        normalized = (
-            phone_str.replace('+33', '')
-            .replace(' ', '')
-            .replace('-', '')
-            .replace('.', '')
-        )
-        digits = ''.join(ch for ch in normalized if ch.isdigit())
-        if digits and len(digits) >= 9:
-            if not digits.startswith('0'):
-                digits = '0' + digits
-            cleaned.append(digits)
-    return cleaned
+    return phones.normalize_values(raw_numbers)
 
 
 def _ask_file_osascript_excel() -> str:
@@ -119,7 +107,10 @@ def _select_excel_file() -> str:
             root.withdraw()
             path = filedialog.askopenfilename(
                 title="Sélectionner le fichier Kompass Excel",
-                filetypes=[("Fichiers Excel", "*.xlsx *.xls")],
+                filetypes=[
+                    ("Fichiers Excel", "*.xlsx *.xls"),
+                    ("Autres formats (CSV, JSONL, Parquet)", "*.csv *.jsonl *.ndjson *.parquet"),
+                ],
                 initialdir=str(config.BASE_DIR),
             )
             root.destroy()
@@ -133,8 +124,8 @@ def _select_excel_file() -> str:
     print("Tkinter/AppleScript indisponible. Saisie en console.")
     candidates = []
     for d in [os.getcwd(), str(config.BASE_DIR)]:
-        candidates.extend(glob.glob(os.path.join(d, "*.xlsx")))
-        candidates.extend(glob.glob(os.path.join(d, "*.xls")))
+        for ext in inputs.SUPPORTED_EXTENSIONS:
+            candidates.extend(glob.glob(os.path.join(d, f"*{ext}")))
     if candidates:
         print("Fichiers détectés:")
         for idx, p in enumerate(candidates, 1):
@@ -144,7 +135,7 @@ def _select_excel_file() -> str:
             return candidates[(int(choice) - 1) if choice else 0]
         except Exception:
             return candidates[0]
-    return input("Chemin du fichier Excel (.xlsx/.xls): ").strip()
+    return input(f"Chemin du fichier ({', '.join(inputs.SUPPORTED_EXTENSIONS)}): ").strip()
 
 
 def main() -> None:
@@ -155,10 +146,6 @@ def main() -> None:
     signal.signal(signal.SIGINT, _signal_handler)
     signal.signal(signal.SIGTERM, _signal_handler)
 
-    # Réinitialiser les résultats partiels
-    global _partial_results
-    _partial_results.clear()
-
     # Sélection du fichier Kompass
     input_file = _select_excel_file()
 
@@ -166,47 +153,41 @@ def main() -> None:
         print("Aucun fichier sélectionné. Arrêt du programme.")
         return
 
-    # Vérifier que le fichier est bien un fichier Excel
-    if not input_file.lower().endswith(('.xlsx', '.xls')):
-        print("Erreur: Seuls les fichiers Excel (.xlsx, .xls) sont acceptés.")
+    # Vérifier que le format est pris en charge
+    if not input_file.lower().endswith(tuple(inputs.SUPPORTED_EXTENSIONS)):
+        print(f"Erreur: formats acceptés: {', '.join(inputs.SUPPORTED_EXTENSIONS)}")
         print(f"Fichier sélectionné: {input_file}")
         return
 
     print(f"Fichier sélectionné: {input_file}")
 
-    try:
-        df = pd.read_excel(input_file, sheet_name='Entreprises')
-        print(f"{len(df)} entreprises trouvées dans le fichier Excel")
-    except Exception as exc:
-        print(f"Erreur lors de la lecture du fichier Excel: {exc}")
-        print("Vérifiez que le fichier contient une feuille nommée 'Entreprises'")
-        return
-
-    if 'phone' not in df.columns:
-        print("Colonne 'phone' non trouvée dans le fichier")
+    # Chargement en flux dans un thread: normalisation vectorisée par lots et
+    # index téléphone → entreprises (un numéro peut être partagé par
+    # plusieurs entreprises / SIRET). Les recherches démarrent sur les
+    # premiers numéros pendant que la suite du fichier se charge.
+    phone_stream = inputs.PhoneStream(input_file).start()
+    phone_stream.wait_ready()
+    if phone_stream.error is not None:
+        print(f"Erreur lors de la lecture du fichier: {phone_stream.error}")
+        print(f"Vérifiez la feuille '{inputs.INPUT_SHEET}' (Excel) et la colonne 'phone'")
         return
-
-    phone_numbers = _clean_phone_numbers(df['phone'].dropna().tolist())
-    
-    # Créer un mapping téléphone → infos entreprise (company, siret)
-    phone_to_company_info = {}
-    for _, row in df.iterrows():
-        cleaned_phones = _clean_phone_numbers([row.get('phone', '')])
-        if cleaned_phones:
-            phone_key = cleaned_phones[0]
-            phone_to_company_info[phone_key] = {
-                'company': str(row.get('company', '')).strip(),
-                'siret': str(row.get('siret', '')).strip() if pd.notna(row.get('siret')) else ''
-            }
-    
-    if not phone_numbers:
+    if phone_stream.loaded.is_set() and not len(phone_stream.index):
         print("Aucun numero de telephone trouve")
         return
+    print(f"Chargement: {phone_stream.summary()}")
 
-    print(f"{len(phone_numbers)} numeros de telephone a rechercher")
-    print(f"✅ Mapping créé pour {len(phone_to_company_info)} numéros avec infos entreprise (nom + SIRET)")
+    # Sessions parallèles (CRM_WORKERS / fichier de disposition)
+    try:
+        sessions = workers.layout()
+    except ValueError as exc:
+        print(f"Erreur: {exc}")
+        return
 
     print("\n=== INSTRUCTIONS ===")
+    if len(sessions) > 1:
+        print(f"0. {len(sessions)} sessions: placez une fenetre de VM dans chaque zone de l'ecran:")
+        for item in sessions:
+            print(f"   - {item.name}: {item.region}")
     print("1. Ouvrez votre VM dans le navigateur")
     print("2. Naviguez jusqu'au champ de recherche")
     print("3. Revenez dans la console et appuyez sur Entree")
@@ -223,22 +204,43 @@ def main() -> None:
     print("Demarrage du script dans 3 secondes...")
     time.sleep(3)
 
-    ui_actions.calibrate_search_region()
+    if len(sessions) == 1:
+        ui_actions.calibrate_search_region()
+
+    global _run_journal
+    resume = config.JOURNAL_RESUME or "--resume" in sys.argv[1:]
+    _run_journal = journal.open_journal(input_file, resume=resume)
+    print(f"Journal: {_run_journal.path}{' (reprise)' if resume else ''}")
 
     try:
         # Passer le mapping des infos entreprise au workflow
-        results = workflow.process_phone_numbers(phone_numbers, phone_to_company_info)
-
-        # Stocker les résultats partiels pour sauvegarde d'urgence
-        _partial_results.extend(results)
+        refresh = config.CACHE_REFRESH or "--refresh" in sys.argv[1:]
+        if len(sessions) > 1:
+            written = workers.run(
+                phone_stream,
+                phone_stream.index,
+                sessions=sessions,
+                journal=_run_journal,
+                refresh=refresh,
+                resume=resume,
+            )
+        else:
+            written = workflow.process_phone_numbers(
+                phone_stream,
+                phone_stream.index,
+                refresh=refresh,
+                journal=_run_journal,
+                resume=resume,
+            )
+        print(f"Entrée: {phone_stream.summary()}")
 
-        if not results:
+        if not written and not resume:
             print("\n[X] Aucun resultat - le script s'est arrete prematurely")
             return
 
         try:
-            pd.DataFrame(results).to_excel(config.OUTPUT_FILE, index=False)
-            print(f"\nTermine. Resultats sauvegardes dans {config.OUTPUT_FILE}")
+            count = _run_journal.export_excel(config.OUTPUT_FILE)
+            print(f"\nTermine. {count} resultat(s) sauvegarde(s) dans {config.OUTPUT_FILE}")
         except Exception as exc:
             print(f"Erreur lors de la sauvegarde des resultats: {exc}")
 
@@ -250,6 +252,8 @@ def main() -> None:
         print(f"\n[ERREUR] {exc}")
         _cleanup()
         return
+    finally:
+        _run_journal.close()
 
 
 if __name__ == "__main__":
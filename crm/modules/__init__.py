@@ -1,17 +1,59 @@
-﻿from . import config
+﻿from . import batch
+from . import cache
+from . import calibration
+from . import cdp
+from . import channel
+from . import config
 from . import filesystem
+from . import hitstats
+from . import inputs
+from . import journal
+from . import lookup
+from . import outcomes
+from . import phones
+from . import pipeline
+from . import scheduler
+from . import session
+from . import snippet_runtime
 from . import snippets
+from . import stats
+from . import sync
+from . import text_entry
 from . import ui_actions
 from . import vision
+from . import vision_pool
 from . import waiters
+from . import watcher
+from . import workers
 from . import workflow
 
 __all__ = [
+    "batch",
+    "cache",
+    "calibration",
+    "cdp",
+    "channel",
     "config",
     "filesystem",
+    "hitstats",
+    "inputs",
+    "journal",
+    "lookup",
+    "outcomes",
+    "phones",
+    "pipeline",
+    "scheduler",
+    "session",
+    "snippet_runtime",
     "snippets",
+    "stats",
+    "sync",
+    "text_entry",
     "ui_actions",
     "vision",
+    "vision_pool",
     "waiters",
+    "watcher",
+    "workers",
     "workflow",
 ]
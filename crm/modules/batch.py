@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import queue
+import time
+from typing import Callable, Dict, Iterable, List
+
+from . import cdp
+from . import channel
+from . import config
+from . import snippet_runtime
+from . import snippets
+
+
+def _engine_args(phones: List[str]) -> Dict[str, object]:
+    return {
+        "phones": phones,
+        "searchUrl": config.BATCH_SEARCH_URL,
+        "selectors": dict(config.BATCH_SELECTORS),
+        "concurrency": config.BATCH_CONCURRENCY,
+        "maxPages": config.BATCH_MAX_PAGES,
+    }
+
+
+def _decode(text: str | None) -> List[Dict]:
+    try:
+        records = json.loads(text) if text else []
+    except ValueError:
+        return []
+    return [record for record in records if isinstance(record, dict)] if isinstance(records, list) else []
+
+
+class BatchEngine:
+    """In-page batch lookups (``scripts/batch_lookup.js``) ahead of the GUI loop.
+
+    The engine runs the CRM search, the company page and the interlocutor
+    pages with ``fetch`` in the CRM tab, ``config.BATCH_CONCURRENCY`` phones
+    at a time, and parses them with the extraction rules shared with
+    ``dom_interlocuteurs_snippet.js``. Records come back through the
+    DevTools bridge, or streamed one by one on the local channel. A phone
+    whose record is missing or in error is left to the GUI workflow.
+    """
+
+    def __init__(self) -> None:
+        self._records: Dict[str, Dict] = {}
+        self._attempted: set = set()
+        self.batches = 0
+        self.records = 0
+        self.errors = 0
+
+    @staticmethod
+    def create() -> "BatchEngine | None":
+        """An engine when batch mode is enabled and configured, else ``None``."""
+        if not config.BATCH_ENABLED:
+            return None
+        if not config.BATCH_SEARCH_URL:
+            print("[WARN] Mode lot: CRM_BATCH_SEARCH_URL non configuree, recherches par la GUI")
+            return None
+        return BatchEngine()
+
+    def _run(self, phones: List[str]) -> List[Dict]:
+        args = _engine_args(phones)
+        timeout = config.BATCH_PHONE_TIMEOUT * max(1, -(-len(phones) // max(1, config.BATCH_CONCURRENCY)))
+        bundle = snippet_runtime.load()
+        if cdp.available():
+            try:
+                return _decode(cdp.run_script(bundle.guarded_call("batch", args), timeout=timeout))
+            except cdp.CdpError as exc:
+                cdp.mark_unavailable(exc)
+        receiver = channel.get_channel()
+        if receiver is None:
+            return []
+        stream = receiver.expect_stream()
+        records: List[Dict] = []
+        try:
+            snippets.paste_snipet(str(bundle.with_call(bundle.call("batch", receiver.url, stream.id, args))))
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    payload = stream.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    print(f"[WARN] Mode lot: {len(records)}/{len(phones)} resultat(s) recu(s) avant expiration")
+                    break
+                if payload is None:
+                    break
+                records.extend(_decode(f"[{payload}]"))
+        finally:
+            receiver.discard(stream)
+        return records
+
+    def lookup(self, phone: str, upcoming: Callable[[], Iterable[str]] = lambda: ()) -> Dict | None:
+        """Record of ``phone``, looking it up with the next phones if needed.
+
+        ``upcoming`` gives the phones scheduled next (at most
+        ``config.BATCH_CHUNK`` are sent with ``phone``). Returns ``None``
+        when the engine had no usable answer for ``phone``.
+        """
+        if phone not in self._records and phone not in self._attempted:
+            chunk = [phone]
+            for other in upcoming():
+                if len(chunk) >= config.BATCH_CHUNK:
+                    break
+                if other not in chunk and other not in self._records and other not in self._attempted:
+                    chunk.append(other)
+            self._attempted.update(chunk)
+            start = time.perf_counter()
+            try:
+                records = self._run(chunk)
+            except Exception as exc:
+                print(f"[WARN] Mode lot indisponible pour ce lot: {exc}")
+                records = []
+            self.batches += 1
+            for record in records:
+                if record.get("status") == "ERROR":
+                    self.errors += 1
+                    continue
+                self._records[str(record.get("phone", ""))] = record
+            self.records += len(records)
+            print(
+                f"[INFO] Mode lot: {len(records)}/{len(chunk)} numero(s) en {time.perf_counter() - start:.1f}s"
+            )
+        return self._records.pop(phone, None)
+
+    def print_report(self) -> None:
+        if self.batches:
+            print(
+                f"[INFO] Mode lot: {self.batches} lot(s), {self.records} resultat(s), "
+                f"{self.errors} erreur(s) reprise(s) par la GUI"
+            )
+
+
+__all__ = [
+    "BatchEngine",
+]
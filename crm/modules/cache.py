@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from . import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lookups (
+    phone TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    company TEXT,
+    siret TEXT,
+    checked_at REAL NOT NULL
+)
+"""
+
+
+def phone_key(phone: object) -> str:
+    """Cache key of a phone number: its digits only."""
+    return "".join(ch for ch in str(phone) if ch.isdigit())
+
+
+def status_class(rows: List[Dict]) -> str:
+    """TTL class of a lookup, from the status of its result rows."""
+    statuses = {str(row.get("status", "")) for row in rows}
+    if "FOUND" in statuses:
+        return "FOUND"
+    if "NO_CONTACT_FOUND" in statuses:
+        return "NO_CONTACT_FOUND"
+    if statuses == {"NOT_FOUND"}:
+        return "NOT_FOUND"
+    return "ERROR"
+
+
+class ResultCache:
+    """SQLite store of past lookups, one row per normalized phone.
+
+    Result rows are kept as JSON with their status and the time of the
+    lookup; :meth:`get` only returns them while the TTL of their status
+    class (``config.CACHE_TTL_HOURS``) has not expired.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(_SCHEMA)
+
+    def get(self, phone: object, *, now: float | None = None) -> tuple[List[Dict], float] | None:
+        """Return ``(rows, checked_at)`` for a fresh entry, else ``None``."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, rows, checked_at FROM lookups WHERE phone = ?",
+                (phone_key(phone),),
+            ).fetchone()
+        if row is None:
+            return None
+        status, payload, checked_at = row
+        ttl_hours = config.CACHE_TTL_HOURS.get(status, 0)
+        now = time.time() if now is None else now
+        if ttl_hours <= 0 or now - checked_at > ttl_hours * 3600:
+            return None
+        try:
+            return json.loads(payload), checked_at
+        except ValueError:
+            return None
+
+    def last_checked(self, phone: object) -> float | None:
+        """Time of the last lookup of ``phone``, fresh or not."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT checked_at FROM lookups WHERE phone = ?",
+                (phone_key(phone),),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, phone: object, rows: List[Dict], *, now: float | None = None) -> None:
+        first = rows[0] if rows else {}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lookups (phone, status, rows, company, siret, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    phone_key(phone),
+                    status_class(rows),
+                    json.dumps(rows, ensure_ascii=False),
+                    str(first.get("company", "")),
+                    str(first.get("siret", "")),
+                    time.time() if now is None else now,
+                ),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM lookups GROUP BY status").fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_cache() -> ResultCache | None:
+    """Open the configured cache, or ``None`` when disabled or unusable."""
+    if not config.CACHE_ENABLED:
+        return None
+    try:
+        return ResultCache(config.CACHE_FILE)
+    except Exception as exc:
+        print(f"[WARN] Cache des recherches indisponible ({config.CACHE_FILE}): {exc}")
+        return None
+
+
+__all__ = [
+    "phone_key",
+    "status_class",
+    "ResultCache",
+    "open_cache",
+]
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Sequence
+
+import pyautogui
+
+from . import config
+from . import filesystem
+
+# Profils par affichage: {display: {template: {"samples", "scale", "confidence", "hits"}}}
+_PROFILES: dict[str, dict[str, dict]] = {}
+_LOADED = False
+_DIRTY = False
+_LOCK = threading.RLock()
+_SAMPLE_WINDOW = 20
+_DISPLAY_KEY: str | None = None
+# Recherches manquées de suite à l'échelle verrouillée, par template (non persisté)
+_MISSES: Counter = Counter()
+
+
+def display_key() -> str:
+    """Identify the current display (resolution + platform)."""
+    global _DISPLAY_KEY
+    if _DISPLAY_KEY is None:
+        try:
+            width, height = pyautogui.size()
+            _DISPLAY_KEY = f"{sys.platform}-{width}x{height}"
+        except Exception:
+            _DISPLAY_KEY = f"{sys.platform}-unknown"
+    return _DISPLAY_KEY
+
+
+def _template_key(image_path: str) -> str:
+    return os.path.basename(image_path)
+
+
+def _ensure_loaded() -> None:
+    global _LOADED
+    if _LOADED:
+        return
+    data = filesystem.load_json_state(config.VISION_PROFILES_FILE, default={}) or {}
+    _PROFILES.update(data)
+    _LOADED = True
+
+
+def _profiles() -> dict[str, dict]:
+    _ensure_loaded()
+    return _PROFILES.setdefault(display_key(), {})
+
+
+def save() -> None:
+    global _DIRTY
+    with _LOCK:
+        if not _DIRTY:
+            return
+        filesystem.save_json_state(config.VISION_PROFILES_FILE, _PROFILES)
+        _DIRTY = False
+
+
+def reset(image_path: str | None = None) -> None:
+    """Forget the learned profile of one template (or all, for this display)."""
+    global _DIRTY
+    with _LOCK:
+        profiles = _profiles()
+        if image_path is None:
+            profiles.clear()
+        else:
+            profiles.pop(_template_key(image_path), None)
+            _MISSES.pop(_template_key(image_path), None)
+        _DIRTY = True
+    save()
+
+
+def profile_for(image_path: str) -> dict | None:
+    """Return the locked profile ``{"scale", "confidence"}`` or ``None``."""
+    if not config.CALIBRATION_ENABLED:
+        return None
+    with _LOCK:
+        entry = _profiles().get(_template_key(image_path))
+        if entry and entry.get("scale") is not None:
+            return {"scale": entry["scale"], "confidence": entry["confidence"]}
+    return None
+
+
+def effective(
+    image_path: str,
+    confidence: float,
+    scales: Sequence[float],
+) -> tuple[float, tuple[float, ...]]:
+    """Confidence and scales to use for a lookup, after calibration.
+
+    The learned confidence only tightens the caller's, never loosens it.
+    """
+    profile = profile_for(image_path)
+    if profile is None:
+        return confidence, tuple(scales)
+    return max(confidence, profile["confidence"]), (profile["scale"],)
+
+
+def missed(image_path: str) -> bool:
+    """Count a miss at the locked profile; ``True`` every CALIBRATION_RECHECK_MISSES misses.
+
+    The caller then rescans with its own confidence and every scale, and
+    calls :func:`reset` if the template was there after all.
+    """
+    if profile_for(image_path) is None:
+        return False
+    key = _template_key(image_path)
+    with _LOCK:
+        _MISSES[key] += 1
+        if _MISSES[key] < config.CALIBRATION_RECHECK_MISSES:
+            return False
+        _MISSES[key] = 0
+    return True
+
+
+def _try_lock(entry: dict) -> bool:
+    samples = entry.get("samples", [])
+    if len(samples) < config.CALIBRATION_MIN_SAMPLES:
+        return False
+    scale, wins = Counter(round(s, 3) for s, _ in samples).most_common(1)[0]
+    if wins / len(samples) < config.CALIBRATION_DOMINANCE:
+        return False
+    scores = [score for s, score in samples if round(s, 3) == scale]
+    low, high = config.CALIBRATION_CONFIDENCE_BOUNDS
+    entry["scale"] = scale
+    entry["confidence"] = round(min(high, max(low, min(scores) - config.CALIBRATION_MARGIN)), 3)
+    return True
+
+
+def observe(image_path: str, scale: float, score: float) -> None:
+    """Record the winning scale and score of a successful match."""
+    global _DIRTY
+    if not config.CALIBRATION_ENABLED:
+        return
+    locked_now = False
+    with _LOCK:
+        entry = _profiles().setdefault(_template_key(image_path), {"samples": [], "scale": None, "confidence": None, "hits": 0})
+        entry["hits"] = entry.get("hits", 0) + 1
+        _MISSES.pop(_template_key(image_path), None)
+        if entry.get("scale") is None:
+            entry["samples"] = (entry.get("samples", []) + [[float(scale), round(float(score), 4)]])[-_SAMPLE_WINDOW:]
+            locked_now = _try_lock(entry)
+        _DIRTY = True
+    if locked_now:
+        print(
+            f"[INFO] Calibration {_template_key(image_path)}: echelle {entry['scale']}, "
+            f"confiance {entry['confidence']} ({display_key()})"
+        )
+        save()
+
+
+def summary() -> dict[str, dict]:
+    with _LOCK:
+        return {name: dict(entry) for name, entry in _profiles().items()}
+
+
+__all__ = [
+    "display_key",
+    "save",
+    "reset",
+    "profile_for",
+    "effective",
+    "missed",
+    "observe",
+    "summary",
+]
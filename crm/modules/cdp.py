@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import itertools
+import json
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, List
+
+from . import config
+from . import session
+
+# Pont DevTools (optionnel): nécessite websocket-client et un navigateur
+# lancé avec --remote-debugging-port; sinon les snippets passent par la GUI.
+try:
+    import websocket
+    HAS_WEBSOCKET = True
+except Exception:
+    HAS_WEBSOCKET = False
+
+# Exécute un snippet de scripts/ et résout avec son résultat JSON: la valeur
+# passée à prompt() (les snippets y déposent leur JSON pour la copie
+# manuelle), sinon la valeur du snippet lui-même si elle n'est pas undefined.
+_WRAPPER = """(() => new Promise((resolve, reject) => {
+  const nativePrompt = window.prompt;
+  const done = (value) => { window.prompt = nativePrompt; clearTimeout(timer); resolve(value); };
+  const timer = setTimeout(() => done({kind: "timeout"}), %(timeout_ms)d);
+  window.prompt = (message, value) => { done({kind: "prompt", text: value === undefined ? null : String(value)}); return null; };
+  const settle = (value) => {
+    if (value === undefined) return;
+    let text = null;
+    try { text = JSON.stringify(value); } catch (_e) { text = JSON.stringify(Boolean(value)); }
+    done({kind: "value", text: text === undefined ? null : text});
+  };
+  try {
+    Promise.resolve((0, eval)(%(source)s)).then(settle, (error) => { window.prompt = nativePrompt; clearTimeout(timer); reject(error); });
+  } catch (error) {
+    window.prompt = nativePrompt;
+    clearTimeout(timer);
+    reject(error);
+  }
+}))()"""
+
+
+class CdpError(RuntimeError):
+    """DevTools bridge unavailable, or the evaluated script threw."""
+
+
+def list_targets(*, host: str | None = None, port: int | None = None, timeout: float = 2.0) -> List[Dict[str, Any]]:
+    """Page targets of the browser (of the current session's port), most recently used first."""
+    url = f"http://{host or config.CDP_HOST}:{port or session.current().cdp_port or config.CDP_PORT}/json/list"
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            targets = json.loads(response.read().decode("utf-8"))
+    except Exception as exc:
+        raise CdpError(f"DevTools injoignable ({url}): {exc}") from exc
+    return [target for target in targets if target.get("type") == "page" and target.get("webSocketDebuggerUrl")]
+
+
+def pick_target(targets: List[Dict[str, Any]], url_hint: str | None = None) -> Dict[str, Any]:
+    """First page whose URL contains ``url_hint`` (``config.CDP_URL_HINT``), else the first page."""
+    hint = (config.CDP_URL_HINT if url_hint is None else url_hint).lower()
+    matching = [target for target in targets if hint and hint in str(target.get("url", "")).lower()]
+    if matching:
+        return matching[0]
+    if targets:
+        return targets[0]
+    raise CdpError("Aucun onglet DevTools disponible")
+
+
+class CdpSession:
+    """One DevTools websocket, commands sent one at a time.
+
+    Events received while waiting for a reply are ignored; the bridge only
+    uses request/response commands.
+    """
+
+    def __init__(self, ws_url: str, *, timeout: float | None = None) -> None:
+        if not HAS_WEBSOCKET:
+            raise CdpError("websocket-client non installe (pip install websocket-client)")
+        self.ws_url = ws_url
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        try:
+            # Pas d'en-tête Origin: Chrome refuse sinon sans --remote-allow-origins
+            self._ws = websocket.create_connection(
+                ws_url, timeout=timeout or config.CDP_CONNECT_TIMEOUT, suppress_origin=True
+            )
+        except Exception as exc:
+            raise CdpError(f"Connexion DevTools echouee ({ws_url}): {exc}") from exc
+
+    def send(self, method: str, params: Dict[str, Any] | None = None, *, timeout: float) -> Dict[str, Any]:
+        with self._lock:
+            message_id = next(self._ids)
+            deadline = time.monotonic() + timeout
+            try:
+                self._ws.send(json.dumps({"id": message_id, "method": method, "params": params or {}}))
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise CdpError(f"{method}: pas de reponse en {timeout:.0f}s")
+                    self._ws.settimeout(remaining)
+                    reply = json.loads(self._ws.recv())
+                    if reply.get("id") == message_id:
+                        break
+            except CdpError:
+                raise
+            except Exception as exc:
+                raise CdpError(f"{method}: {exc}") from exc
+        if "error" in reply:
+            raise CdpError(f"{method}: {reply['error'].get('message', reply['error'])}")
+        return reply.get("result", {})
+
+    def evaluate(self, expression: str, *, timeout: float) -> Any:
+        """``Runtime.evaluate`` awaiting promises; returns the value by value."""
+        result = self.send(
+            "Runtime.evaluate",
+            {
+                "expression": expression,
+                "awaitPromise": True,
+                "returnByValue": True,
+                # window.open depuis un snippet: geste utilisateur simulé
+                "userGesture": True,
+            },
+            timeout=timeout,
+        )
+        details = result.get("exceptionDetails")
+        if details:
+            text = (details.get("exception") or {}).get("description") or details.get("text", "exception")
+            raise CdpError(f"Erreur JS: {text}")
+        return (result.get("result") or {}).get("value")
+
+    def close(self) -> None:
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+
+def run_script(
+    source: str,
+    *,
+    url_hint: str | None = None,
+    timeout: float | None = None,
+    target: Dict[str, Any] | None = None,
+) -> str | None:
+    """Run a snippet in the CRM tab (or ``target``) and return its JSON text.
+
+    The JSON is what the snippet passes to ``prompt()`` (intercepted, no
+    dialog is shown), else its own value (``""`` when it has none). Returns
+    ``None`` when the snippet did not finish before ``timeout``; raises
+    :class:`CdpError` when the bridge is unusable so the caller can fall
+    back to the GUI path.
+    """
+    timeout = config.timing("snippet_result_timeout") if timeout is None else timeout
+    expression = _WRAPPER % {"timeout_ms": int(timeout * 1000), "source": json.dumps(source.lstrip("\ufeff"))}
+    if target is None:
+        target = pick_target(list_targets(), url_hint)
+    session = CdpSession(target["webSocketDebuggerUrl"])
+    try:
+        outcome = session.evaluate(expression, timeout=timeout + config.CDP_CONNECT_TIMEOUT)
+    finally:
+        session.close()
+    if not isinstance(outcome, dict) or outcome.get("kind") == "timeout":
+        return None
+    return outcome.get("text") or ""
+
+
+_unavailable_until = 0.0
+
+
+def available() -> bool:
+    """True when the bridge is enabled, installed and not in back-off after a failure.
+
+    A tiled session (``session``) needs its own ``cdp_port``: the default
+    port reaches a single browser.
+    """
+    current = session.current()
+    if current.tiled and current.cdp_port is None:
+        return False
+    return config.CDP_ENABLED and HAS_WEBSOCKET and time.monotonic() >= _unavailable_until
+
+
+def mark_unavailable(reason: object) -> None:
+    """Fall back to the GUI path for ``config.CDP_RETRY_SECONDS``."""
+    global _unavailable_until
+    _unavailable_until = time.monotonic() + config.CDP_RETRY_SECONDS
+    print(f"[WARN] Pont DevTools indisponible ({reason}), repli sur la console GUI")
+
+
+__all__ = [
+    "HAS_WEBSOCKET",
+    "CdpError",
+    "CdpSession",
+    "list_targets",
+    "pick_target",
+    "run_script",
+    "available",
+    "mark_unavailable",
+]
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+from . import config
+
+# Limite d'un envoi (le presse-papiers tronquait déjà bien avant)
+MAX_PAYLOAD_BYTES = 16 * 1024 * 1024
+
+
+class PendingResult:
+    """A result expected from one snippet call, matched by its correlation ID."""
+
+    def __init__(self, request_id: str) -> None:
+        self.id = request_id
+        self.payload: str | None = None
+        # Page sans runtime window.__crm (voir snippet_runtime)
+        self.missing = False
+        self.event = threading.Event()
+
+    def wait(self, timeout: float | None = None) -> str | None:
+        self.event.wait(timeout)
+        return self.payload
+
+
+class PendingStream:
+    """Several results posted under one correlation ID, until ``{"done": true}``."""
+
+    def __init__(self, request_id: str) -> None:
+        self.id = request_id
+        self.queue: queue.Queue = queue.Queue()
+
+    def get(self, timeout: float | None = None) -> str | None:
+        """Next payload; ``None`` when the stream ended (raises ``queue.Empty`` on timeout)."""
+        return self.queue.get(timeout=timeout)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+
+    def _cors(self) -> None:
+        # Page CRM (https, réseau public) -> 127.0.0.1: CORS + Private Network Access
+        self.send_header("Access-Control-Allow-Origin", self.headers.get("Origin") or "*")
+        self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Access-Control-Allow-Private-Network", "true")
+        self.send_header("Vary", "Origin")
+
+    def _reply(self, status: int) -> None:
+        self.send_response(status)
+        self._cors()
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_OPTIONS(self) -> None:  # noqa: N802
+        self._reply(204)
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        if self.path.rstrip("/") != "/result" or not 0 < length <= MAX_PAYLOAD_BYTES:
+            self._reply(400)
+            return
+        try:
+            message = json.loads(self.rfile.read(length).decode("utf-8"))
+            request_id = str(message["id"])
+            missing = message.get("runtime") == "missing"
+            done = message.get("done") is True
+            payload = None if missing or done else message["payload"]
+        except Exception:
+            self._reply(400)
+            return
+        if payload is not None and not isinstance(payload, str):
+            payload = json.dumps(payload, ensure_ascii=False)
+        if done:
+            delivered = self.server.channel.end_stream(request_id)
+        else:
+            delivered = self.server.channel.deliver(request_id, payload, missing=missing)
+        self._reply(204 if delivered else 404)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    channel: "ResultChannel"
+
+
+class ResultChannel:
+    """Localhost HTTP receiver for snippet results.
+
+    Each snippet call gets a random correlation ID (:meth:`expect`); the
+    snippet POSTs ``{"id", "payload"}`` to :attr:`url`, and only a pending
+    ID is accepted, so late or foreign posts are dropped. A stream
+    (:meth:`expect_stream`) accepts payloads until ``{"id", "done": true}``.
+    """
+
+    def __init__(self, host: str | None = None, port: int | None = None) -> None:
+        self._server = _Server((host or config.CHANNEL_HOST, config.CHANNEL_PORT if port is None else port), _Handler)
+        self._server.channel = self
+        self._pending: Dict[str, PendingResult] = {}
+        self._streams: Dict[str, PendingStream] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="crm-channel", daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/result"
+
+    def expect(self) -> PendingResult:
+        pending = PendingResult(uuid.uuid4().hex)
+        with self._lock:
+            self._pending[pending.id] = pending
+        return pending
+
+    def expect_stream(self) -> PendingStream:
+        stream = PendingStream(uuid.uuid4().hex)
+        with self._lock:
+            self._streams[stream.id] = stream
+        return stream
+
+    def discard(self, pending: PendingResult | PendingStream) -> None:
+        with self._lock:
+            self._pending.pop(pending.id, None)
+            self._streams.pop(pending.id, None)
+
+    def end_stream(self, request_id: str) -> bool:
+        with self._lock:
+            stream = self._streams.pop(request_id, None)
+        if stream is None:
+            return False
+        stream.queue.put(None)
+        return True
+
+    def deliver(self, request_id: str, payload: str | None, *, missing: bool = False) -> bool:
+        with self._lock:
+            stream = self._streams.get(request_id)
+            pending = None if stream is not None else self._pending.pop(request_id, None)
+        if stream is not None and payload is not None:
+            stream.queue.put(payload)
+            return True
+        if pending is None:
+            return False
+        pending.payload = payload
+        pending.missing = missing
+        pending.event.set()
+        return True
+
+    def preamble(self, pending: PendingResult) -> str:
+        """JS line giving the next snippet its endpoint and correlation ID."""
+        return f"window.__crmChannel={json.dumps({'url': self.url, 'id': pending.id})};\n"
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+_channel: ResultChannel | None = None
+_channel_lock = threading.Lock()
+_channel_failed = False
+
+
+def get_channel() -> ResultChannel | None:
+    """The shared channel, started on first use; ``None`` when disabled or unavailable."""
+    global _channel, _channel_failed
+    if not config.CHANNEL_ENABLED:
+        return None
+    with _channel_lock:
+        if _channel is None and not _channel_failed:
+            try:
+                _channel = ResultChannel()
+            except OSError as exc:
+                _channel_failed = True
+                print(f"[WARN] Canal de resultats indisponible ({exc}), repli sur le presse-papiers")
+        return _channel
+
+
+def shutdown() -> None:
+    global _channel
+    with _channel_lock:
+        if _channel is not None:
+            _channel.close()
+            _channel = None
+
+
+__all__ = [
+    "MAX_PAYLOAD_BYTES",
+    "PendingResult",
+    "PendingStream",
+    "ResultChannel",
+    "get_channel",
+    "shutdown",
+]
@@ -28,8 +28,86 @@ def _runtime_base_dir() -> Path:
 
 BASE_DIR = _runtime_base_dir()
 
+# Profils de timing: chaque délai du workflow est soit une durée de
+# stabilisation (aucune condition observable), soit le délai de sécurité
+# d'une attente sur condition (template, presse-papiers, fenêtre).
+# "prudent" (défaut) garde les délais d'origine: une VM lente perd des
+# frappes. CRM_TIMING_PROFILE=standard ou rapide pour une VM réactive.
+TIMING_PROFILES: dict[str, dict[str, float]] = {
+    "prudent": {
+        "pyautogui_pause": 0.15,
+        "type_interval": 0.05,
+        "key_settle": 0.2,
+        "double_click_gap": 0.12,
+        "after_click": 0.8,
+        "console_open": 1.0,
+        "app_launch": 1.0,
+        "clipboard_timeout": 3.0,
+        "clipboard_probe": 0.4,
+        "window_timeout": 5.0,
+        "search_ready_timeout": 10.0,
+        "result_timeout": 20.0,
+        "pre_fetch_grace": 13.0,
+        "page_load_timeout": 20.0,
+        "snippet_result_timeout": 60.0,
+        "runtime_ack_timeout": 3.0,
+    },
+    "standard": {
+        "pyautogui_pause": 0.05,
+        "type_interval": 0.02,
+        "key_settle": 0.1,
+        "double_click_gap": 0.1,
+        "after_click": 0.3,
+        "console_open": 0.6,
+        "app_launch": 0.8,
+        "clipboard_timeout": 2.0,
+        "clipboard_probe": 0.25,
+        "window_timeout": 4.0,
+        "search_ready_timeout": 8.0,
+        "result_timeout": 20.0,
+        "pre_fetch_grace": 13.0,
+        "page_load_timeout": 20.0,
+        "snippet_result_timeout": 60.0,
+        "runtime_ack_timeout": 2.0,
+    },
+    "rapide": {
+        "pyautogui_pause": 0.02,
+        "type_interval": 0.0,
+        "key_settle": 0.05,
+        "double_click_gap": 0.08,
+        "after_click": 0.15,
+        "console_open": 0.4,
+        "app_launch": 0.5,
+        "clipboard_timeout": 1.5,
+        "clipboard_probe": 0.15,
+        "window_timeout": 3.0,
+        "search_ready_timeout": 6.0,
+        "result_timeout": 15.0,
+        "pre_fetch_grace": 8.0,
+        "page_load_timeout": 15.0,
+        "snippet_result_timeout": 45.0,
+        "runtime_ack_timeout": 1.5,
+    },
+}
+TIMING_PROFILE = os.environ.get("CRM_TIMING_PROFILE", "prudent")
+
+
+def timing(name: str) -> float:
+    """Return a delay (seconds) of the active timing profile."""
+    profile = TIMING_PROFILES.get(TIMING_PROFILE) or TIMING_PROFILES["prudent"]
+    return profile.get(name, TIMING_PROFILES["prudent"][name])
+
+
+def set_timing_profile(name: str) -> None:
+    global TIMING_PROFILE
+    if name not in TIMING_PROFILES:
+        raise ValueError(f"Profil de timing inconnu: {name} ({', '.join(TIMING_PROFILES)})")
+    TIMING_PROFILE = name
+    pyautogui.PAUSE = timing("pyautogui_pause")
+
+
 pyautogui.FAILSAFE = True
-pyautogui.PAUSE = 0.15
+pyautogui.PAUSE = timing("pyautogui_pause")
 
 INPUT_FILE = "kompass_data_*.xlsx"
 
@@ -54,6 +132,136 @@ def _get_output_dir() -> str:
 
 OUTPUT_FILE = str(Path(_get_output_dir()) / "crm_results.xlsx")
 
+# Fichiers d'état persistés entre les exécutions (à côté des résultats)
+STATE_DIR = Path(_get_output_dir())
+VISION_PROFILES_FILE = str(STATE_DIR / "crm_vision_profiles.json")
+HIT_STATS_FILE = str(STATE_DIR / "crm_template_hits.json")
+OUTCOME_HISTORY_FILE = str(STATE_DIR / "crm_outcome_latencies.json")
+DETECTION_HISTORY_FILE = str(STATE_DIR / "crm_detection_latencies.json")
+
+# Cache local des recherches (SQLite), par numéro normalisé. Durées de
+# validité en heures par statut; 0 = jamais réutilisé. CRM_REFRESH=1 (ou
+# --refresh) force une nouvelle recherche de tous les numéros.
+CACHE_ENABLED = True
+CACHE_FILE = str(STATE_DIR / "crm_cache.sqlite3")
+CACHE_TTL_HOURS: dict[str, float] = {
+    "FOUND": 24 * 30,
+    "NO_CONTACT_FOUND": 24 * 7,
+    "NOT_FOUND": 24 * 7,
+    "ERROR": 0,
+}
+CACHE_REFRESH = os.environ.get("CRM_REFRESH", "").strip().lower() in ("1", "true", "oui")
+
+# Journal (JSONL, une ligne fsync'ée par numéro traité) par fichier d'entrée;
+# CRM_RESUME=1 (ou --resume) reprend le journal et saute les numéros traités
+JOURNAL_DIR = str(STATE_DIR / "crm_journal")
+JOURNAL_RESUME = os.environ.get("CRM_RESUME", "").strip().lower() in ("1", "true", "oui")
+
+# Planification: les numéros d'une même entreprise (SIRET, sinon nom) sont
+# enchaînés dans une fenêtre de SCHEDULER_LOOKAHEAD numéros; dès qu'une
+# recherche règle l'entreprise, ses autres numéros ne sont plus recherchés.
+# Politiques: "found" (contact trouvé), "result" (fiche trouvée, même sans
+# contact), "off" (tout rechercher).
+SCHEDULER_SHORT_CIRCUIT = os.environ.get("CRM_SHORT_CIRCUIT", "found").strip().lower()
+SCHEDULER_LOOKAHEAD = 1000
+
+# Priorité: dans la fenêtre de lecture anticipée, les entreprises au score le
+# plus élevé passent en premier (score = somme poids x règle, règles de
+# scheduler.PRIORITY_RULES). Poids négatif: la règle recule le numéro.
+# CRM_PRIORITY=0 revient à l'ordre du fichier (FIFO).
+PRIORITY_ENABLED = os.environ.get("CRM_PRIORITY", "1").strip().lower() not in ("0", "false", "non", "off")
+PRIORITY_WEIGHTS: dict[str, float] = {
+    "siret": 3.0,            # ligne avec SIRET
+    "never_searched": 2.0,   # numéro absent du cache des recherches
+    "mobile": 1.0,           # 06/07 plutôt que fixe
+    "recent": 1.0,           # ligne Kompass récente (colonne scraped_at)
+}
+PRIORITY_MOBILE_PREFIXES: tuple[str, ...] = ("06", "07")
+PRIORITY_RECENT_DAYS = 30
+
+# Budget de temps (minutes) d'une session; 0 = illimité. La session s'arrête
+# avant une recherche qui dépasserait le budget (reprise avec --resume).
+TIME_BUDGET_MINUTES = float(os.environ.get("CRM_TIME_BUDGET", "0") or 0)
+
+# Pont DevTools (optionnel, module cdp): exécute les snippets de scripts/ par
+# le port de débogage du navigateur (--remote-debugging-port=9222) au lieu de
+# Notepad + console + presse-papiers. Repli sur la GUI si injoignable.
+CDP_ENABLED = os.environ.get("CRM_CDP", "").strip().lower() in ("1", "true", "oui")
+CDP_HOST = os.environ.get("CRM_CDP_HOST", "127.0.0.1")
+CDP_PORT = int(os.environ.get("CRM_CDP_PORT", "9222"))
+CDP_URL_HINT = os.environ.get("CRM_CDP_URL_HINT", "")  # fragment d'URL de l'onglet CRM
+CDP_CONNECT_TIMEOUT = 2.0
+CDP_RETRY_SECONDS = 60.0
+
+# Canal de résultats (module channel): les snippets DOM envoient leur JSON en
+# POST à un récepteur HTTP local (port 0 = port libre choisi au lancement)
+# au lieu de prompt() + Ctrl+A/Ctrl+C. CRM_CHANNEL=0 pour désactiver.
+CHANNEL_ENABLED = os.environ.get("CRM_CHANNEL", "1").strip().lower() not in ("0", "false", "non", "off")
+CHANNEL_HOST = "127.0.0.1"
+CHANNEL_PORT = int(os.environ.get("CRM_CHANNEL_PORT", "0"))
+
+# Mode lot (module batch, scripts/batch_lookup.js): la page CRM enchaîne
+# recherche, fiche et pages Interlocuteur par fetch, BATCH_CONCURRENCY
+# numéros à la fois, pour des lots de BATCH_CHUNK numéros; les numéros en
+# erreur repassent par la GUI. BATCH_SEARCH_URL: URL de recherche du CRM
+# ({phone} remplacé), relative à la page CRM. Sélecteurs selon le CRM.
+# Une recherche sans résultat n'est NOT_FOUND que si la page contient le
+# message "0 résultat" (sélecteur no_result ou expression no_result_text);
+# sinon (page rendue côté client, fiche sans iframe) le numéro passe par la GUI.
+BATCH_ENABLED = os.environ.get("CRM_BATCH", "").strip().lower() in ("1", "true", "oui")
+BATCH_SEARCH_URL = os.environ.get("CRM_BATCH_SEARCH_URL", "")
+BATCH_SELECTORS: dict[str, str] = {
+    "result": ".listResults .result",
+    "result_link": "a[href]",
+    "interlocutor_frame": "#interlocuteur",
+    "no_result": "",
+    "no_result_text": r"\b0\s+(?:r[ée]sultat|client)s?\b",
+}
+BATCH_CONCURRENCY = 4
+BATCH_CHUNK = 25
+BATCH_PHONE_TIMEOUT = 15.0
+BATCH_MAX_PAGES = 20
+
+# Mode pipeline (module pipeline): l'extraction des interlocuteurs du numéro
+# N continue dans son onglet (résultat par le canal local ou DevTools)
+# pendant que l'onglet CRM (1er onglet, Ctrl+1) recherche le numéro N+1.
+# PIPELINE_DEPTH: extractions en cours au plus; un numéro d'une entreprise
+# encore en extraction attend son résultat (court-circuit du planificateur).
+PIPELINE_ENABLED = os.environ.get("CRM_PIPELINE", "").strip().lower() in ("1", "true", "oui")
+PIPELINE_DEPTH = 2
+PIPELINE_RESULT_TIMEOUT = 90.0
+
+# Saisie de texte (module text_entry): collage, frappe par blocs ou frappe
+# lente, la plus rapide d'abord; chaque saisie est relue (Ctrl+A/Ctrl+C) et
+# seule la fin erronée est ressaisie. Taille de bloc, pause entre blocs et
+# intervalle de frappe sont appris par connexion (CRM_CONNECTION, sinon
+# machine + affichage): divisés sur une perte, accélérés après
+# INPUT_SPEEDUP_AFTER saisies exactes. CRM_INPUT_VERIFY=0: pas de relecture.
+INPUT_VERIFY = os.environ.get("CRM_INPUT_VERIFY", "1").strip().lower() not in ("0", "false", "non", "off")
+INPUT_CONNECTION = os.environ.get("CRM_CONNECTION", "")
+INPUT_SPEEDS_FILE = str(STATE_DIR / "crm_input_speeds.json")
+INPUT_MAX_ATTEMPTS = 3
+INPUT_PASTE_FAILURES = 2
+INPUT_SPEEDUP_AFTER = 5
+INPUT_CHUNK_START = 64
+INPUT_CHUNK_BOUNDS: tuple[int, int] = (4, 600)
+INPUT_CHUNK_DELAY_BOUNDS: tuple[float, float] = (0.0, 0.2)
+INPUT_TYPE_INTERVAL_BOUNDS: tuple[float, float] = (0.0, 0.1)
+
+# Sessions parallèles (modules session et workers): 2 à 4 fenêtres de VM
+# côte à côte, chacune avec sa région d'écran, ses templates (régions et
+# fallbacks relatifs à sa tuile), son runtime de snippets et son journal;
+# les numéros sont pris dans une file commune. CRM_WORKERS=N découpe
+# l'écran en N tuiles; WORKER_LAYOUT_FILE, s'il existe, les décrit:
+# [{"name", "region": [x, y, w, h], "title", "focus", "cdp_port"}].
+# Clavier, souris et presse-papiers servent une session à la fois (focus
+# repris par le titre de fenêtre, sinon un clic à WORKER_TITLE_BAR_Y px du
+# haut de la tuile); captures et attentes restent concurrentes.
+WORKERS = int(os.environ.get("CRM_WORKERS", "1"))
+WORKERS_MAX = 4
+WORKER_LAYOUT_FILE = str(STATE_DIR / "crm_workers.json")
+WORKER_TITLE_BAR_Y = 8
+
 ASSETS_DIR = (BASE_DIR / "assets").resolve()
 
 def asset(name: str) -> str:
@@ -82,6 +290,8 @@ INTERLOCUTOR_BUTTON_IMAGES: Sequence[str] = (
     INTERLOCUTOR_BUTTON_IMAGE_4,
     INTERLOCUTOR_BUTTON_IMAGE_5,
 )
+# Confiance de la surveillance de l'issue d'une recherche (bouton Interlocuteur, '0 resultat')
+OUTCOME_CONFIDENCE = 0.8
 
 SEARCH_RESULT_TEMPLATES: Sequence[str] = (
     RESULT_CANCEL_OK_IMAGE,
@@ -116,16 +326,137 @@ SEARCH_BAR_FALLBACK = (640, 180)
 SEARCH_ICON_FALLBACK = (760, 180)
 CLOSE_TAB_POSITION = (1200, 30)
 
+# Machine à états des recherches (module lookup): quand le champ de
+# recherche n'est pas confirmé, puis pendant l'attente de l'issue, des
+# anomalies sont guettées sur tout l'écran de la session, chacune avec sa
+# reprise: page de connexion (session CRM expirée: arrêt, reprise avec
+# --resume), prompt() resté ouvert (Échap), fenêtre modale (clic sur le
+# template, p. ex. sa croix), onglet Interlocuteur resté ouvert
+# (window.close()). Liste vide = anomalie non guettée. Après une reprise
+# la recherche est relancée (LOOKUP_MAX_RECOVERIES fois au plus);
+# LOOKUP_MAX_FAILURES échecs de suite arrêtent la session.
+LOOKUP_EXPIRED_TEMPLATES: Sequence[str] = ()
+LOOKUP_DIALOG_TEMPLATES: Sequence[str] = SEARCH_RESULT_TEMPLATES
+LOOKUP_MODAL_TEMPLATES: Sequence[str] = ()
+LOOKUP_STRAY_TAB_TEMPLATES: Sequence[str] = (LIST_INTERLOCUTOR_IMAGE,)
+LOOKUP_ANOMALY_CONFIDENCE = 0.85
+LOOKUP_READY_TIMEOUT = 3.0
+LOOKUP_MAX_RECOVERIES = 1
+LOOKUP_MAX_FAILURES = 3
+
 IMAGE_CONFIDENCE = 0.85
 DEFAULT_SCALES: Sequence[float] = (1.0, 0.97, 1.03, 0.94, 1.06)
 SEARCH_SCAN_REGION: tuple[int, int, int, int] | None = None
 RESULT_REGION: tuple[int, int, int, int] = (500, 250, 700, 600)
+# Réutiliser les détections tant que la région capturée est identique au pixel près
+VISION_FRAME_CACHE = True
+
+# Détection dans des processus de travail (0 = dans le processus); les
+# captures leur sont transmises par un anneau de VISION_RING_SLOTS
+# emplacements de mémoire partagée
+VISION_WORKERS = 0
+VISION_RING_SLOTS = 4
+
+# Calibration par template: après CALIBRATION_MIN_SAMPLES détections dont
+# CALIBRATION_DOMINANCE gagnées par la même échelle, seule cette échelle est
+# essayée, avec une confiance tirée des scores observés (score le plus bas
+# moins la marge, bornée) qui ne descend jamais sous celle de l'appelant.
+# Toutes les CALIBRATION_RECHECK_MISSES recherches manquées de suite, toutes
+# les échelles sont réessayées à la confiance de l'appelant: si le template
+# est trouvé (zoom, thème, DPI changés), le profil est réappris.
+CALIBRATION_ENABLED = True
+CALIBRATION_MIN_SAMPLES = 5
+CALIBRATION_DOMINANCE = 0.8
+CALIBRATION_MARGIN = 0.08
+CALIBRATION_CONFIDENCE_BOUNDS: tuple[float, float] = (0.7, 0.95)
+CALIBRATION_RECHECK_MISSES = 10
+
+# Les listes de variantes d'un template sont parcourues de la plus souvent
+# détectée à la moins souvent; avec HIT_STATS_PRUNE, les variantes jamais
+# détectées ne sont plus essayées une fois la liste à HIT_STATS_PRUNE_AFTER
+# détections
+HIT_STATS_PRUNE = False
+HIT_STATS_PRUNE_AFTER = 50
+
+# Cadence des attentes: rapide juste après une action, puis de plus en plus espacée
+POLL_INITIAL_INTERVAL = 0.1
+POLL_BACKOFF_FACTOR = 1.5
+POLL_MAX_INTERVAL = 0.6
+
+# Délais de résultat adaptatifs: dès qu'une issue visuelle (bouton
+# Interlocuteur ou '0 resultat') a OUTCOME_MIN_SAMPLES latences, la grâce
+# du pré-fetch devient le plus grand OUTCOME_QUANTILE de ces issues plus
+# OUTCOME_MARGIN secondes; le timeout y ajoute le OUTCOME_QUANTILE du
+# pré-fetch (l'écart timeout - grace du profil tant qu'il a moins de
+# OUTCOME_MIN_SAMPLES latences) plus la marge. Valeurs bornées; chaque
+# recherche sans issue de suite double les valeurs dérivées.
+OUTCOME_ADAPTIVE = True
+OUTCOME_MIN_SAMPLES = 10
+OUTCOME_QUANTILE = 0.99
+OUTCOME_MARGIN = 1.5
+OUTCOME_GRACE_BOUNDS: tuple[float, float] = (2.0, 20.0)
+OUTCOME_TIMEOUT_BOUNDS: tuple[float, float] = (4.0, 45.0)
 
 
 __all__ = [
     "BASE_DIR",
+    "TIMING_PROFILES",
+    "TIMING_PROFILE",
+    "timing",
+    "set_timing_profile",
     "INPUT_FILE",
     "OUTPUT_FILE",
+    "STATE_DIR",
+    "VISION_PROFILES_FILE",
+    "HIT_STATS_FILE",
+    "OUTCOME_HISTORY_FILE",
+    "DETECTION_HISTORY_FILE",
+    "CACHE_ENABLED",
+    "CACHE_FILE",
+    "CACHE_TTL_HOURS",
+    "CACHE_REFRESH",
+    "JOURNAL_DIR",
+    "JOURNAL_RESUME",
+    "SCHEDULER_SHORT_CIRCUIT",
+    "SCHEDULER_LOOKAHEAD",
+    "PRIORITY_ENABLED",
+    "PRIORITY_WEIGHTS",
+    "PRIORITY_MOBILE_PREFIXES",
+    "PRIORITY_RECENT_DAYS",
+    "TIME_BUDGET_MINUTES",
+    "CDP_ENABLED",
+    "CDP_HOST",
+    "CDP_PORT",
+    "CDP_URL_HINT",
+    "CDP_CONNECT_TIMEOUT",
+    "CDP_RETRY_SECONDS",
+    "CHANNEL_ENABLED",
+    "CHANNEL_HOST",
+    "CHANNEL_PORT",
+    "BATCH_ENABLED",
+    "BATCH_SEARCH_URL",
+    "BATCH_SELECTORS",
+    "BATCH_CONCURRENCY",
+    "BATCH_CHUNK",
+    "BATCH_PHONE_TIMEOUT",
+    "BATCH_MAX_PAGES",
+    "PIPELINE_ENABLED",
+    "PIPELINE_DEPTH",
+    "PIPELINE_RESULT_TIMEOUT",
+    "INPUT_VERIFY",
+    "INPUT_CONNECTION",
+    "INPUT_SPEEDS_FILE",
+    "INPUT_MAX_ATTEMPTS",
+    "INPUT_PASTE_FAILURES",
+    "INPUT_SPEEDUP_AFTER",
+    "INPUT_CHUNK_START",
+    "INPUT_CHUNK_BOUNDS",
+    "INPUT_CHUNK_DELAY_BOUNDS",
+    "INPUT_TYPE_INTERVAL_BOUNDS",
+    "WORKERS",
+    "WORKERS_MAX",
+    "WORKER_LAYOUT_FILE",
+    "WORKER_TITLE_BAR_Y",
     "ASSETS_DIR",
     "SEARCH_BAR_IMAGE",
     "CLOSE_BUTTON_IMAGE",
@@ -135,6 +466,7 @@ __all__ = [
     "INTERLOCUTOR_BUTTON_IMAGE_4",
     "INTERLOCUTOR_BUTTON_IMAGE_5",
     "INTERLOCUTOR_BUTTON_IMAGES",
+    "OUTCOME_CONFIDENCE",
     "NO_RESULT_IMAGE",
     "SEARCH_FIELD_TEMPLATES",
     "SEARCH_ICON_TEMPLATES",
@@ -142,10 +474,38 @@ __all__ = [
     "SEARCH_BAR_FALLBACK",
     "SEARCH_ICON_FALLBACK",
     "CLOSE_TAB_POSITION",
+    "LOOKUP_EXPIRED_TEMPLATES",
+    "LOOKUP_DIALOG_TEMPLATES",
+    "LOOKUP_MODAL_TEMPLATES",
+    "LOOKUP_STRAY_TAB_TEMPLATES",
+    "LOOKUP_ANOMALY_CONFIDENCE",
+    "LOOKUP_READY_TIMEOUT",
+    "LOOKUP_MAX_RECOVERIES",
+    "LOOKUP_MAX_FAILURES",
     "IMAGE_CONFIDENCE",
     "DEFAULT_SCALES",
     "SEARCH_SCAN_REGION",
     "RESULT_REGION",
+    "VISION_FRAME_CACHE",
+    "VISION_WORKERS",
+    "VISION_RING_SLOTS",
+    "CALIBRATION_ENABLED",
+    "CALIBRATION_MIN_SAMPLES",
+    "CALIBRATION_DOMINANCE",
+    "CALIBRATION_MARGIN",
+    "CALIBRATION_CONFIDENCE_BOUNDS",
+    "CALIBRATION_RECHECK_MISSES",
+    "HIT_STATS_PRUNE",
+    "HIT_STATS_PRUNE_AFTER",
+    "POLL_INITIAL_INTERVAL",
+    "POLL_BACKOFF_FACTOR",
+    "POLL_MAX_INTERVAL",
+    "OUTCOME_ADAPTIVE",
+    "OUTCOME_MIN_SAMPLES",
+    "OUTCOME_QUANTILE",
+    "OUTCOME_MARGIN",
+    "OUTCOME_GRACE_BOUNDS",
+    "OUTCOME_TIMEOUT_BOUNDS",
     "OCR_LANG",
     "OCR_CONFIG",
     "LIST_INTERLOCUTOR_IMAGE",
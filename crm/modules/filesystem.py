@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import glob
+import json
 import os
 from pathlib import Path
 
@@ -16,6 +17,38 @@ def find_latest_kompass_file() -> str | None:
     print(f"Fichier trouve: {latest_file}")
     return latest_file
 
+
+def load_json_state(path: str | Path, default=None):
+    """Read a JSON state file written by :func:`save_json_state`.
+
+    Missing or unreadable files yield ``default`` so that a corrupt state
+    never blocks a run.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return default
+    except Exception as exc:
+        print(f"[WARN] Etat illisible ({path}): {exc}")
+        return default
+
+
+def save_json_state(path: str | Path, data) -> None:
+    """Atomically replace a JSON state file (write to a temp file then rename)."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        print(f"[WARN] Sauvegarde de l'etat impossible ({path}): {exc}")
+
+
 __all__ = [
     "find_latest_kompass_file",
+    "load_json_state",
+    "save_json_state",
 ]
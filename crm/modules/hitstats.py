@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Sequence, TypeVar
+
+from . import config
+from . import filesystem
+
+T = TypeVar("T")
+
+# {liste: {"lookups": n, "variants": {variante: hits}}}
+_STATS: dict[str, dict] = {}
+_LOADED = False
+_DIRTY = False
+_LOCK = threading.Lock()
+
+
+def _ensure_loaded() -> None:
+    global _LOADED
+    if _LOADED:
+        return
+    _STATS.update(filesystem.load_json_state(config.HIT_STATS_FILE, default={}) or {})
+    _LOADED = True
+
+
+def variant_key(variant) -> str:
+    """Stable key of a template variant: file name (plus offset for specs)."""
+    if isinstance(variant, dict):
+        key = os.path.basename(variant.get("image") or "")
+        offset = variant.get("offset")
+        return f"{key}@{offset[0]},{offset[1]}" if offset else key
+    return os.path.basename(variant or "")
+
+
+def list_key(variants: Sequence) -> str:
+    return "+".join(variant_key(v) for v in variants)
+
+
+def ordered(key: str, variants: Sequence[T]) -> list[tuple[int, T]]:
+    """Return ``(original_index, variant)`` pairs, most frequent hits first.
+
+    Ties keep the configured order. With ``config.HIT_STATS_PRUNE``, variants
+    that never matched once the list has ``HIT_STATS_PRUNE_AFTER`` hits are
+    dropped (at least one variant is always kept).
+    """
+    with _LOCK:
+        _ensure_loaded()
+        entry = _STATS.get(key, {})
+        hits = dict(entry.get("variants", {}))
+        lookups = entry.get("lookups", 0)
+
+    indexed = list(enumerate(variants))
+    indexed.sort(key=lambda item: -hits.get(variant_key(item[1]), 0))
+    if config.HIT_STATS_PRUNE and lookups >= config.HIT_STATS_PRUNE_AFTER:
+        kept = [item for item in indexed if hits.get(variant_key(item[1]), 0) > 0]
+        if kept:
+            return kept
+    return indexed
+
+
+def record_hit(key: str, variant) -> None:
+    global _DIRTY
+    with _LOCK:
+        _ensure_loaded()
+        entry = _STATS.setdefault(key, {"lookups": 0, "variants": {}})
+        entry["lookups"] = entry.get("lookups", 0) + 1
+        name = variant_key(variant)
+        entry["variants"][name] = entry["variants"].get(name, 0) + 1
+        _DIRTY = True
+
+
+def save() -> None:
+    global _DIRTY
+    with _LOCK:
+        if not _DIRTY:
+            return
+        filesystem.save_json_state(config.HIT_STATS_FILE, _STATS)
+        _DIRTY = False
+
+
+def summary() -> dict[str, dict]:
+    with _LOCK:
+        _ensure_loaded()
+        return {key: dict(entry) for key, entry in _STATS.items()}
+
+
+__all__ = [
+    "variant_key",
+    "list_key",
+    "ordered",
+    "record_hit",
+    "save",
+    "summary",
+]
@@ -4,6 +4,8 @@ import sys
 import time
 import pyautogui
 
+from . import config
+
 
 def _is_macos() -> bool:
     return sys.platform == "darwin"
@@ -31,13 +33,29 @@ def paste() -> None:
     pyautogui.hotkey(primary_mod(), "v")
 
 
-def open_chrome_console(delay: float = 0.8) -> None:
+def line_end() -> None:
+    """Move the caret to the end of the line (collapses a selection)."""
+    if _is_macos():
+        pyautogui.hotkey("command", "right")
+    else:
+        pyautogui.press("end")
+
+
+def first_tab() -> None:
+    """Activate the first browser tab (the CRM search tab)."""
+    pyautogui.hotkey(primary_mod(), "1")
+
+
+def open_chrome_console(delay: float | None = None) -> None:
     """Open Chrome DevTools console with the right shortcut per platform.
 
     - macOS: Command+Option+J (Console)
     - Windows/Linux: Ctrl+Shift+J (Console)
-    Fallback to the DevTools panel (I) if needed.
+    Fallback to the DevTools panel (I) if needed. ``delay`` defaults to the
+    ``console_open`` delay of the timing profile.
     """
+    if delay is None:
+        delay = config.timing("console_open")
     try:
         if _is_macos():
             pyautogui.hotkey("command", "option", "j")
@@ -59,6 +77,8 @@ __all__ = [
     "select_all",
     "copy",
     "paste",
+    "line_end",
+    "first_tab",
     "open_chrome_console",
 ]
 
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+from pathlib import Path
+from typing import Iterator, List, Sequence
+
+import pandas as pd
+
+from . import phones
+
+# Parquet (optionnel): lecture par lots via pyarrow si disponible
+try:
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except Exception:
+    HAS_PYARROW = False
+
+# "scraped_at" (date de la ligne Kompass) est optionnelle: priorité aux lignes récentes
+INPUT_COLUMNS: Sequence[str] = ("phone", "company", "siret", "scraped_at")
+INPUT_SHEET = "Entreprises"
+SUPPORTED_EXTENSIONS: Sequence[str] = (".xlsx", ".xlsm", ".xls", ".csv", ".jsonl", ".ndjson", ".parquet")
+BATCH_SIZE = 5000
+
+_END = object()
+
+
+def _frame(records: List[Sequence], columns: Sequence[str]) -> pd.DataFrame:
+    return pd.DataFrame.from_records(records, columns=list(columns))
+
+
+def _require_phone(columns: Sequence[str], path: Path) -> None:
+    if "phone" not in columns:
+        raise ValueError(f"Colonne 'phone' non trouvée dans {path.name}")
+
+
+def _iter_xlsx(path: Path, batch_size: int, sheet_name: str) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet_name in workbook.sheetnames:
+            sheet = workbook[sheet_name]
+        else:
+            sheet = workbook.worksheets[0]
+            print(f"[WARN] Feuille '{sheet_name}' absente, lecture de '{sheet.title}'")
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        positions = {name: header.index(name) for name in INPUT_COLUMNS if name in header}
+        _require_phone(list(positions), path)
+        columns = list(positions)
+        wanted = list(positions.values())
+        batch: List[Sequence] = []
+        for row in rows:
+            batch.append([row[i] if i < len(row) else None for i in wanted])
+            if len(batch) >= batch_size:
+                yield _frame(batch, columns)
+                batch = []
+        if batch:
+            yield _frame(batch, columns)
+    finally:
+        workbook.close()
+
+
+def _iter_xls(path: Path, sheet_name: str) -> Iterator[pd.DataFrame]:
+    # Ancien format binaire: pas de lecture en flux, une seule lecture ciblée
+    df = pd.read_excel(path, sheet_name=sheet_name, usecols=lambda name: str(name).strip() in INPUT_COLUMNS, dtype=object)
+    df.columns = [str(name).strip() for name in df.columns]
+    _require_phone(list(df.columns), path)
+    yield df
+
+
+def _iter_csv(path: Path, batch_size: int) -> Iterator[pd.DataFrame]:
+    # dtype=str: conserve le 0 initial des numéros
+    reader = pd.read_csv(
+        path,
+        usecols=lambda name: str(name).strip() in INPUT_COLUMNS,
+        dtype=str,
+        chunksize=batch_size,
+        sep=None,
+        engine="python",
+        encoding="utf-8-sig",
+    )
+    for chunk in reader:
+        chunk.columns = [str(name).strip() for name in chunk.columns]
+        _require_phone(list(chunk.columns), path)
+        yield chunk
+
+
+def _iter_jsonl(path: Path, batch_size: int) -> Iterator[pd.DataFrame]:
+    batch: List[Sequence] = []
+    seen_phone = False
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Dernière ligne tronquée d'un export encore en cours d'écriture
+                continue
+            if not isinstance(record, dict):
+                continue
+            seen_phone = seen_phone or "phone" in record
+            batch.append([record.get(name) for name in INPUT_COLUMNS])
+            if len(batch) >= batch_size:
+                yield _frame(batch, INPUT_COLUMNS)
+                batch = []
+    if batch:
+        yield _frame(batch, INPUT_COLUMNS)
+    if not seen_phone:
+        _require_phone((), path)
+
+
+def _iter_parquet(path: Path, batch_size: int) -> Iterator[pd.DataFrame]:
+    if HAS_PYARROW:
+        parquet = pq.ParquetFile(path)
+        columns = [name for name in INPUT_COLUMNS if name in parquet.schema_arrow.names]
+        _require_phone(columns, path)
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+        return
+    try:
+        df = pd.read_parquet(path)
+    except ImportError as exc:
+        raise ValueError(f"Lecture Parquet impossible ({path.name}): installer pyarrow") from exc
+    _require_phone(list(df.columns), path)
+    yield df[[name for name in INPUT_COLUMNS if name in df.columns]]
+
+
+def iter_batches(
+    path: str | Path,
+    *,
+    batch_size: int = BATCH_SIZE,
+    sheet_name: str = INPUT_SHEET,
+) -> Iterator[pd.DataFrame]:
+    """Yield the input file as DataFrames of ``phone``/``company``/``siret``
+    (plus ``scraped_at`` when the file has it).
+
+    xlsx files are read row by row (openpyxl read-only), CSV and JSONL in
+    chunks, Parquet by record batches when pyarrow is installed. Only the
+    needed columns are kept. Raises ``ValueError`` for an unsupported format
+    or a file without a ``phone`` column.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in (".xlsx", ".xlsm"):
+        return _iter_xlsx(path, batch_size, sheet_name)
+    if suffix == ".xls":
+        return _iter_xls(path, sheet_name)
+    if suffix == ".csv":
+        return _iter_csv(path, batch_size)
+    if suffix in (".jsonl", ".ndjson"):
+        return _iter_jsonl(path, batch_size)
+    if suffix == ".parquet":
+        return _iter_parquet(path, batch_size)
+    raise ValueError(f"Format non supporté: {path.name} ({', '.join(SUPPORTED_EXTENSIONS)})")
+
+
+class PhoneStream:
+    """Producer thread that loads an input file into a :class:`phones.PhoneIndex`.
+
+    New distinct phones are queued as soon as their batch is normalized, so
+    the workflow can start on the first phones while the rest of the file
+    is still loading. Iterating the stream yields phones in input order and
+    re-raises a loading error in the consumer.
+    """
+
+    def __init__(self, path: str | Path, *, batch_size: int = BATCH_SIZE, sheet_name: str = INPUT_SHEET) -> None:
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.sheet_name = sheet_name
+        self.index = phones.PhoneIndex()
+        self.ready = threading.Event()
+        self.loaded = threading.Event()
+        self.error: Exception | None = None
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "PhoneStream":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="crm-input", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            for batch in iter_batches(self.path, batch_size=self.batch_size, sheet_name=self.sheet_name):
+                for phone in self.index.add_frame(batch):
+                    self._queue.put(phone)
+                    self.ready.set()
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.loaded.set()
+            self.ready.set()
+            self._queue.put(_END)
+
+    def __iter__(self) -> Iterator[str]:
+        self.start()
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                break
+            yield item
+        if self.error is not None:
+            raise self.error
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Wait until a first phone is queued or loading ended."""
+        self.start()
+        return self.ready.wait(timeout)
+
+    def summary(self) -> str:
+        state = "termine" if self.loaded.is_set() else "en cours"
+        return (
+            f"{self.index.rows} ligne(s) lue(s) ({state}), {len(self.index)} numero(s) distinct(s), "
+            f"{self.index.invalid} cellule(s) sans numero valide, {len(self.index.shared())} numero(s) partage(s)"
+        )
+
+
+__all__ = [
+    "HAS_PYARROW",
+    "INPUT_COLUMNS",
+    "INPUT_SHEET",
+    "SUPPORTED_EXTENSIONS",
+    "BATCH_SIZE",
+    "iter_batches",
+    "PhoneStream",
+]
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from . import config
+
+# Colonnes de l'export, dans l'ordre; les clés inconnues suivent
+RESULT_COLUMNS = (
+    "phone_searched",
+    "company",
+    "siret",
+    "name",
+    "mobile",
+    "fix",
+    "email",
+    "fonction",
+    "category",
+    "status",
+    "checked_at",
+)
+
+
+def input_fingerprint(input_file: str | Path) -> str:
+    """Content hash of an input file (same list = same journal)."""
+    digest = hashlib.sha256()
+    with open(input_file, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def journal_path(input_file: str | Path) -> Path:
+    return Path(config.JOURNAL_DIR) / f"{Path(input_file).stem}_{input_fingerprint(input_file)[:12]}.jsonl"
+
+
+def _failed(record: Dict) -> bool:
+    """True when every row of ``record`` is an error (``Erreur: ...``): the phone is searched again."""
+    rows = record.get("rows") or ()
+    return bool(rows) and all(str(row.get("status", "")).startswith("Erreur") for row in rows)
+
+
+class Journal:
+    """Append-only JSONL record of processed phones.
+
+    Each processed phone is one line ``{"phone", "rows", "ts"}`` flushed and
+    fsync'd before the next lookup starts, so a crash loses at most the
+    phone in progress. Reading back is streamed line by line; a truncated
+    last line (crash during a write) is ignored.
+
+    Parallel sessions write to their own part (:meth:`worker`,
+    ``<journal>.<session>.jsonl``); reading a journal or one of its parts
+    covers the journal and all its parts.
+    """
+
+    def __init__(self, path: str | Path, *, root: "Journal | None" = None) -> None:
+        self.path = Path(path)
+        self._root = root
+        self._handle = None
+        self._lock = threading.Lock()
+
+    def worker(self, name: str) -> "Journal":
+        """The part of this journal written by session ``name`` (not opened)."""
+        return Journal(self.path.with_name(f"{self.path.stem}.{name}.jsonl"), root=self)
+
+    def parts(self) -> List[Path]:
+        root = self._root.path if self._root is not None else self.path
+        if not root.parent.is_dir():
+            return []
+        prefix = f"{root.stem}."
+        return sorted(
+            path for path in root.parent.iterdir()
+            if path != root and path.name.startswith(prefix) and path.suffix == ".jsonl"
+        )
+
+    def open(self, *, resume: bool = False, input_file: str | None = None) -> "Journal":
+        """Open for appending; without ``resume`` a previous journal (and its parts) is set aside."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not resume:
+            stamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            # <journal>.<session>.jsonl -> <journal>_<date>.<session>.jsonl
+            for part in self.parts() if self._root is None else ():
+                os.replace(part, part.with_name(f"{self.path.stem}_{stamp}{part.name[len(self.path.stem):]}"))
+            if self.path.exists():
+                os.replace(self.path, self.path.with_name(f"{self.path.stem}_{stamp}.jsonl"))
+        if self.path.exists() and self.path.stat().st_size:
+            with open(self.path, "rb") as handle:
+                handle.seek(-1, os.SEEK_END)
+                torn = handle.read(1) != b"\n"
+        else:
+            torn = False
+        self._handle = open(self.path, "a", encoding="utf-8")
+        if torn:
+            self._handle.write("\n")
+        if not self.path.stat().st_size:
+            self._write({"header": True, "input": str(input_file or ""), "ts": time.time()})
+        return self
+
+    def _write(self, record: Dict) -> None:
+        self._handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def append(self, phone: str, rows: List[Dict]) -> None:
+        with self._lock:
+            self._write({"phone": phone, "rows": rows, "ts": time.time()})
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def records(self) -> Iterator[Dict]:
+        root = self._root.path if self._root is not None else self.path
+        for path in (root, *self.parts()):
+            if not path.exists():
+                continue
+            with open(path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict) and "phone" in record:
+                        yield record
+
+    def done_phones(self) -> set[str]:
+        """Phones with a journaled result; phones whose rows are all errors are retried."""
+        return {record["phone"] for record in self.records() if not _failed(record)}
+
+    def rows(self) -> Iterator[Dict]:
+        """Journaled rows, without the errors of phones retried since."""
+        done = self.done_phones()
+        for record in self.records():
+            if _failed(record) and record["phone"] in done:
+                continue
+            yield from record.get("rows") or ()
+
+    def export_excel(self, output_file: str | Path) -> int:
+        """Write every journaled row to ``output_file``; returns the row count.
+
+        Two streamed passes (columns, then rows) through a write-only
+        workbook keep memory flat whatever the journal size.
+        """
+        from openpyxl import Workbook
+
+        columns = list(RESULT_COLUMNS)
+        seen = set(columns)
+        for row in self.rows():
+            for key in row:
+                if key not in seen:
+                    seen.add(key)
+                    columns.append(key)
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Resultats")
+        sheet.append(columns)
+        count = 0
+        for row in self.rows():
+            sheet.append(["" if row.get(key) is None else row.get(key, "") for key in columns])
+            count += 1
+        workbook.save(str(output_file))
+        return count
+
+
+def open_journal(input_file: str, *, resume: bool = False) -> Journal:
+    journal = Journal(journal_path(input_file))
+    journal.open(resume=resume, input_file=input_file)
+    return journal
+
+
+__all__ = [
+    "RESULT_COLUMNS",
+    "input_fingerprint",
+    "journal_path",
+    "Journal",
+    "open_journal",
+]
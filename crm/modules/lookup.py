@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import os
+import time
+from typing import Callable, Dict, List, Sequence
+
+import pyautogui
+
+from . import config
+from . import hotkeys
+from . import session
+from . import sync
+from . import ui_actions
+from . import vision
+from . import watcher as screen_watcher
+
+# États d'une recherche, dans l'ordre du flux nominal
+READY = "ready"                # champ de recherche visible
+TYPED = "typed"                # numéro saisi (relu) et validé
+RESULTS = "results"            # bouton 'Interlocuteur' détecté et cliqué
+PREFETCH = "prefetch"          # résultats confirmés par le snippet de pré-fetch
+NO_RESULT = "no_result"        # message '0 resultat'
+INTERLOCUTOR = "interlocutor"  # onglet Interlocuteur ouvert
+EXTRACTED = "extracted"        # JSON des interlocuteurs lu
+CLOSED = "closed"              # retour à l'onglet CRM
+FAILED = "failed"
+
+TRANSITIONS: Dict[str | None, tuple[str, ...]] = {
+    None: (READY,),
+    READY: (TYPED,),
+    TYPED: (RESULTS, PREFETCH, NO_RESULT),
+    RESULTS: (INTERLOCUTOR,),
+    PREFETCH: (INTERLOCUTOR,),
+    NO_RESULT: (CLOSED,),
+    # CLOSED directement: extraction laissée en arrière-plan (mode pipeline)
+    INTERLOCUTOR: (EXTRACTED, CLOSED),
+    EXTRACTED: (CLOSED,),
+    CLOSED: (),
+}
+
+
+class LookupAborted(RuntimeError):
+    """The session cannot go on (expired CRM session, cascading failures)."""
+
+
+class StateError(RuntimeError):
+    """A lookup step did not reach its state."""
+
+    def __init__(self, state: str, message: str) -> None:
+        super().__init__(message)
+        self.state = state
+
+
+class Anomaly(RuntimeError):
+    """An unexpected screen met during a lookup (see :data:`ANOMALIES`)."""
+
+    def __init__(self, name: str, box: tuple[int, int, int, int]) -> None:
+        super().__init__(f"anomalie '{name}' a l'ecran")
+        self.name = name
+        self.box = box
+
+
+# Anomalie -> (templates, reprise), dans l'ordre de détection
+ANOMALIES: Dict[str, tuple[Callable[[], Sequence[str]], Callable[[tuple], None]]] = {}
+
+
+def anomaly(name: str, templates: Callable[[], Sequence[str]]):
+    """Register the recovery action of an anomaly detected by ``templates``."""
+    def register(action: Callable[[tuple], None]) -> Callable[[tuple], None]:
+        ANOMALIES[name] = (templates, action)
+        return action
+    return register
+
+
+@anomaly("expired", lambda: config.LOOKUP_EXPIRED_TEMPLATES)
+def _session_expired(box: tuple) -> None:
+    raise LookupAborted("Session CRM expiree (page de connexion): reconnectez-vous puis relancez avec --resume")
+
+
+@anomaly("dialog", lambda: config.LOOKUP_DIALOG_TEMPLATES)
+def _dismiss_dialog(box: tuple) -> None:
+    with session.input_section():
+        pyautogui.press("escape")
+        sync.settle("key_settle")
+
+
+@anomaly("modal", lambda: config.LOOKUP_MODAL_TEMPLATES)
+def _dismiss_modal(box: tuple) -> None:
+    with session.input_section():
+        pyautogui.click(pyautogui.center(box))
+        sync.settle("after_click")
+
+
+@anomaly("stray_tab", lambda: config.LOOKUP_STRAY_TAB_TEMPLATES)
+def _close_stray_tab(box: tuple | None = None) -> None:
+    # window.close() ne ferme que les onglets ouverts par script (Interlocuteur), jamais l'onglet CRM
+    ui_actions.open_console_and_close_window()
+    with session.input_section():
+        hotkeys.first_tab()
+
+
+def _refocus_search(box: tuple | None = None) -> None:
+    with session.input_section():
+        session.refocus()
+        pyautogui.press("escape")
+        hotkeys.first_tab()
+
+
+# Reprise quand aucune anomalie n'est reconnue, selon l'état atteint
+STATE_RECOVERIES: Dict[str | None, Callable[[], None]] = {
+    None: _refocus_search,
+    READY: _refocus_search,
+    TYPED: _refocus_search,
+    NO_RESULT: _refocus_search,
+    RESULTS: _close_stray_tab,
+    PREFETCH: _close_stray_tab,
+    INTERLOCUTOR: _close_stray_tab,
+    EXTRACTED: _close_stray_tab,
+    CLOSED: _close_stray_tab,
+}
+
+
+def _anomaly_templates() -> List[tuple[str, str]]:
+    return [
+        (name, path)
+        for name, (templates, _) in ANOMALIES.items()
+        for path in templates()
+        if path and os.path.exists(path)
+    ]
+
+
+def detect() -> Anomaly | None:
+    """The first anomaly visible now (one capture of the whole session), else ``None``."""
+    candidates = _anomaly_templates()
+    if not candidates:
+        return None
+    screen_gray, origin = vision.capture_gray(session.current().bounds())
+    digest = vision.register_frame(origin, screen_gray)
+    for name, path in candidates:
+        box = vision.match_in_frame(screen_gray, path, config.LOOKUP_ANOMALY_CONFIDENCE, origin=origin, digest=digest)
+        if box:
+            return Anomaly(name, box)
+    return None
+
+
+class Guard:
+    """Anomaly templates watched on the whole session while a step waits.
+
+    Pass :attr:`event` as the wait's ``stop_event``, then call :meth:`check`.
+    """
+
+    def __init__(self) -> None:
+        candidates = _anomaly_templates()
+        self._names = [name for name, _ in candidates]
+        self._sub = None
+        if candidates:
+            self._sub = screen_watcher.get_watcher().watch_first(
+                [path for _, path in candidates],
+                confidence=config.LOOKUP_ANOMALY_CONFIDENCE,
+                region=session.current().bounds(),
+            )
+
+    @property
+    def event(self):
+        return self._sub.event if self._sub is not None else None
+
+    def check(self) -> None:
+        """Raise :class:`Anomaly` if one appeared."""
+        if self._sub is not None and self._sub.matched:
+            raise Anomaly(self._names[self._sub.index], self._sub.box)
+
+    def cancel(self) -> None:
+        if self._sub is not None:
+            self._sub.cancel()
+
+
+class Lookup:
+    """State machine of one phone's lookup.
+
+    Steps report the state they reached with :meth:`advance` (they confirm
+    it themselves: watcher match, input read back, decoded JSON); READY and
+    CLOSED are checked on screen. On an error :meth:`recover` applies the
+    recovery of the anomaly on screen, else the one of the current state,
+    and brings the session back to READY for a new attempt.
+    """
+
+    def __init__(self, supervisor: "Supervisor", phone: str) -> None:
+        self.supervisor = supervisor
+        self.phone = phone
+        self.state: str | None = None
+        self.recoveries = 0
+        self._started = time.monotonic()
+        self._path: List[str] = []
+
+    def advance(self, state: str) -> None:
+        if state != FAILED and state not in TRANSITIONS.get(self.state, ()):
+            print(f"   [WARN] Transition inattendue {self.state} -> {state}")
+        self.state = state
+        self._path.append(f"{state} {time.monotonic() - self._started:.1f}s")
+        self.supervisor.transitions[state] = self.supervisor.transitions.get(state, 0) + 1
+
+    def ensure_ready(self) -> None:
+        """READY, checked on screen unless the previous lookup ended on the search field."""
+        if not self.supervisor.ready:
+            found = detect()
+            if found is not None:
+                self._apply(found)
+            if not ui_actions.wait_for_search_ready(timeout=config.LOOKUP_READY_TIMEOUT):
+                raise StateError(READY, "champ de recherche non visible")
+        self.supervisor.ready = False
+        self.advance(READY)
+
+    def close(self) -> bool:
+        """CLOSED once the search field is back (stray tab closed once if needed)."""
+        if not ui_actions.wait_for_search_ready():
+            print(f"   [REPRISE] Champ de recherche absent apres l'etat {self.state}")
+            STATE_RECOVERIES[self.state]()
+            self.supervisor.count(f"{self.state}:reprise")
+            if not ui_actions.wait_for_search_ready(timeout=config.LOOKUP_READY_TIMEOUT):
+                return False
+        self.advance(CLOSED)
+        self.supervisor.ready = True
+        return True
+
+    def _apply(self, found: Anomaly) -> None:
+        print(f"   [REPRISE] {found} ({self.state or 'debut'}), action de reprise")
+        self.supervisor.count(found.name)
+        ANOMALIES[found.name][1](found.box)
+
+    def recover(self, exc: Exception) -> bool:
+        """Recover from ``exc``; ``True`` when the lookup may restart from READY."""
+        if isinstance(exc, LookupAborted) or self.recoveries >= config.LOOKUP_MAX_RECOVERIES:
+            return False
+        self.recoveries += 1
+        print(f"   [REPRISE] {self.phone}: {exc} (etat {self.state or 'debut'})")
+        try:
+            found = exc if isinstance(exc, Anomaly) else detect()
+            if found is not None:
+                self._apply(found)
+            else:
+                STATE_RECOVERIES[self.state]()
+                self.supervisor.count(f"{self.state}:reprise")
+        except LookupAborted:
+            raise
+        except Exception as failure:
+            print(f"   [WARN] Reprise impossible: {failure}")
+            self.supervisor.ready = False
+            return False
+        self._path.append(f"reprise {time.monotonic() - self._started:.1f}s")
+        self.state = None
+        if not ui_actions.wait_for_search_ready(timeout=config.LOOKUP_READY_TIMEOUT):
+            self.supervisor.ready = False
+            return False
+        self.supervisor.ready = True
+        return True
+
+    def log(self) -> None:
+        print(f"   [ETATS] {' > '.join(self._path) or '-'}")
+
+
+class Supervisor:
+    """Lookups of one session: transitions, recoveries and the stop on cascading failures."""
+
+    def __init__(self) -> None:
+        # Champ de recherche confirmé par la fin de la recherche précédente
+        self.ready = False
+        self.failures = 0
+        self.failed = 0
+        self.transitions: Dict[str, int] = {}
+        self.recovered: Dict[str, int] = {}
+
+    def start(self, phone: str) -> Lookup:
+        return Lookup(self, phone)
+
+    def count(self, name: str) -> None:
+        self.recovered[name] = self.recovered.get(name, 0) + 1
+
+    def finish(self, lookup: Lookup, ok: bool) -> None:
+        """Close ``lookup``; raises :class:`LookupAborted` after too many failures in a row."""
+        lookup.log()
+        if ok:
+            self.failures = 0
+            return
+        lookup.advance(FAILED)
+        self.ready = False
+        self.failed += 1
+        self.failures += 1
+        if self.failures >= config.LOOKUP_MAX_FAILURES:
+            raise LookupAborted(f"{self.failures} recherches en echec de suite, arret de la session")
+
+    def print_report(self) -> None:
+        if not self.recovered and not self.failed:
+            return
+        recoveries = ", ".join(f"{name} x{count}" for name, count in sorted(self.recovered.items())) or "aucune"
+        print(f"[INFO] Recherches: {self.failed} echec(s), reprises: {recoveries}")
+
+
+__all__ = [
+    "READY",
+    "TYPED",
+    "RESULTS",
+    "PREFETCH",
+    "NO_RESULT",
+    "INTERLOCUTOR",
+    "EXTRACTED",
+    "CLOSED",
+    "FAILED",
+    "TRANSITIONS",
+    "LookupAborted",
+    "StateError",
+    "Anomaly",
+    "ANOMALIES",
+    "anomaly",
+    "STATE_RECOVERIES",
+    "detect",
+    "Guard",
+    "Lookup",
+    "Supervisor",
+]
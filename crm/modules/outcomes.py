@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import threading
+
+from . import config
+from . import filesystem
+from . import stats
+
+# Issues d'une recherche dont on mesure la latence (secondes depuis la soumission)
+INTERLOCUTOR = "interlocutor"
+NO_RESULT = "no_result"
+PRE_FETCH = "pre_fetch"
+OUTCOMES = (INTERLOCUTOR, NO_RESULT, PRE_FETCH)
+
+_LATENCIES = stats.LatencyRecorder()
+_LOADED = False
+_DIRTY = False
+_MISSES = 0
+_LOCK = threading.Lock()
+
+
+def _ensure_loaded() -> None:
+    global _LOADED
+    if _LOADED:
+        return
+    data = filesystem.load_json_state(config.OUTCOME_HISTORY_FILE, default={}) or {}
+    _LATENCIES.load(data.get("latencies", {}))
+    _LOADED = True
+
+
+def record(outcome: str, seconds: float) -> None:
+    """Record how long ``outcome`` took; a settled search resets the timeout backoff."""
+    global _DIRTY, _MISSES
+    with _LOCK:
+        _ensure_loaded()
+        _LATENCIES.record(outcome, seconds)
+        _MISSES = 0
+        _DIRTY = True
+
+
+def record_timeout() -> None:
+    """Note a search that settled on no outcome; widens the next timeouts."""
+    global _MISSES
+    with _LOCK:
+        _MISSES += 1
+
+
+def _quantile(outcome: str) -> float | None:
+    if _LATENCIES.count(outcome) < config.OUTCOME_MIN_SAMPLES:
+        return None
+    return _LATENCIES.quantile(outcome, config.OUTCOME_QUANTILE)
+
+
+def _clamp(value: float, bounds: tuple[float, float]) -> float:
+    low, high = bounds
+    return round(min(high, max(low, value)), 2)
+
+
+def derive() -> dict[str, float | bool]:
+    """Pre-fetch grace and result timeout for the next search.
+
+    The grace covers the slowest visual outcome (interlocutor button or
+    '0 resultat'); the timeout adds the pre-fetch duration on top. Values
+    fall back to the timing profile until enough latencies are recorded.
+    """
+    default_grace = config.timing("pre_fetch_grace")
+    default_timeout = config.timing("result_timeout")
+    with _LOCK:
+        _ensure_loaded()
+        misses = _MISSES
+        detection = [q for q in (_quantile(INTERLOCUTOR), _quantile(NO_RESULT)) if q is not None]
+        pre_fetch = _quantile(PRE_FETCH)
+
+    if not config.OUTCOME_ADAPTIVE or not detection:
+        return {"pre_fetch_grace": default_grace, "result_timeout": default_timeout, "adaptive": False}
+
+    if pre_fetch is None:
+        pre_fetch = max(0.0, default_timeout - default_grace)
+    backoff = 2 ** min(misses, 4)
+    grace = max(detection) + config.OUTCOME_MARGIN
+    timeout = grace + pre_fetch + config.OUTCOME_MARGIN
+    grace = _clamp(grace * backoff, config.OUTCOME_GRACE_BOUNDS)
+    timeout = _clamp(timeout * backoff, config.OUTCOME_TIMEOUT_BOUNDS)
+    return {"pre_fetch_grace": grace, "result_timeout": max(timeout, grace), "adaptive": True}
+
+
+def pre_fetch_grace() -> float:
+    return float(derive()["pre_fetch_grace"])
+
+
+def result_timeout() -> float:
+    return float(derive()["result_timeout"])
+
+
+def save() -> None:
+    global _DIRTY
+    with _LOCK:
+        if not _DIRTY:
+            return
+        latencies = _LATENCIES.to_dict()
+    filesystem.save_json_state(
+        config.OUTCOME_HISTORY_FILE,
+        {"latencies": latencies, "derived": derive()},
+    )
+    with _LOCK:
+        _DIRTY = False
+
+
+def print_report() -> None:
+    with _LOCK:
+        _ensure_loaded()
+        report = _LATENCIES.summary()
+    derived = derive()
+    mode = "adaptatifs" if derived["adaptive"] else "profil de timing"
+    print(
+        f"[INFO] Delais de resultat ({mode}): grace pre-fetch {derived['pre_fetch_grace']:.1f}s, "
+        f"timeout {derived['result_timeout']:.1f}s"
+    )
+    for key in OUTCOMES:
+        values = report.get(key)
+        if values:
+            print(
+                f"   {key}: n={values['count']} p50={values['p50']:.2f} "
+                f"p95={values['p95']:.2f} max={values['max']:.2f}"
+            )
+
+
+__all__ = [
+    "INTERLOCUTOR",
+    "NO_RESULT",
+    "PRE_FETCH",
+    "OUTCOMES",
+    "record",
+    "record_timeout",
+    "derive",
+    "pre_fetch_grace",
+    "result_timeout",
+    "save",
+    "print_report",
+]
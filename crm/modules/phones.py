@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import re
+import threading
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+# Normalisation en masse: les cellules distinctes sont jointes en une seule
+# chaîne (séparateur de cellule \x1e, de numéro \x1f, absents des cellules
+# Excel) et chaque règle est un seul passage d'expression précompilée.
+_CELL_SEP = "\x1e"
+_TOKEN_SEP = "\x1f"
+_START = r"(^|[\x1e\x1f])"
+_END = r"(?=[\x1e\x1f]|$)"
+# Numéros retenus: français à 10 chiffres, ou international E.164 (+CC...)
+_VALID = r"0[1-9]\d{8}|\+[1-9]\d{7,14}"
+_FIND_VALID = re.compile(_VALID, re.ASCII)
+_BULK_RULES = tuple(
+    (re.compile(pattern, re.ASCII), replacement)
+    for pattern, replacement in (
+        # plusieurs numéros par cellule: ; , / | retour ligne, " - ", "ou", "et"
+        # (même collés aux chiffres); "poste"/"ext" isole l'extension
+        (r"[;,/|\n]|\s+-\s+|(?<![A-Za-z])(?i:ou|et|poste|ext)(?![A-Za-z])", _TOKEN_SEP),
+        # "+33 (0)6 ..." et tout ce qui n'est ni chiffre ni '+'
+        (r"\(0\)", ""),
+        (r"[^\d+\x1e\x1f]+", ""),
+        (r"(?<=[^\x1e\x1f])\+", ""),
+        # +33 / 0033 (suivi ou non du 0 national) -> 0
+        (_START + r"(?:\+|00)330?", r"\g<1>0"),
+        # autres préfixes internationaux -> +CC
+        (_START + r"00", r"\g<1>+"),
+        # 33XXXXXXXXX sans '+', et 9 chiffres dont Excel a perdu le 0
+        (_START + r"33(\d{9})" + _END, r"\g<1>0\2"),
+        (_START + r"([1-9]\d{8})" + _END, r"\g<1>0\2"),
+        # numéros valides de chaque élément (deux numéros collés, reste invalide ignoré)
+        (r"[^\x1e\x1f]+", lambda match: _TOKEN_SEP.join(_FIND_VALID.findall(match.group()))),
+    )
+)
+
+
+def _cell_text(value: object) -> str:
+    """Text of a cell; numeric cells (leading zero lost by Excel) lose their ``.0``."""
+    if isinstance(value, float):
+        return "" if value != value else str(int(value))
+    return str(value).strip()
+
+
+def _normalize_cells(cells: List[str]) -> List[tuple[str, ...]]:
+    """Valid numbers of each cell, all cells processed in one pass per rule."""
+    if not cells:
+        return []
+    text = _CELL_SEP.join(cells)
+    for pattern, replacement in _BULK_RULES:
+        text = pattern.sub(replacement, text)
+    return [tuple(token for token in cell.split(_TOKEN_SEP) if token) for cell in text.split(_CELL_SEP)]
+
+
+def _map_unique(values: pd.Series, func) -> np.ndarray:
+    """Apply ``func`` to the list of distinct values and broadcast the results."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = np.empty(len(uniques), dtype=object)
+    mapped[:] = func(np.asarray(uniques, dtype=object).tolist())
+    return mapped[codes]
+
+
+def normalize_series(values: pd.Series) -> pd.Series:
+    """Normalize a column of phone cells in bulk.
+
+    Cells holding several numbers are split (``;`` ``,`` ``/`` ``|``, new
+    lines, `` - ``, "ou"/"et", "poste"/"ext" before an extension); ``+33``,
+    ``0033`` and ``+33 (0)`` become a leading ``0``, other international
+    prefixes become ``+CC``; a 9-digit number gets its lost leading zero
+    back. Distinct cells are normalized together, one precompiled-regex pass
+    per rule. Returns one entry per valid number found in a token, indexed
+    by the row it came from; what is left of a token is dropped.
+    """
+    cells = values.dropna()
+    parsed = pd.Series(
+        _map_unique(cells, lambda uniques: _normalize_cells([_cell_text(value) for value in uniques])),
+        index=cells.index,
+        dtype=object,
+    )
+    return parsed.explode().dropna().astype(object)
+
+
+def normalize_values(values: Iterable[object]) -> List[str]:
+    """List form of :func:`normalize_series` (input order, duplicates kept)."""
+    return normalize_series(pd.Series(list(values), dtype=object)).tolist()
+
+
+def _text_column(df: pd.DataFrame, column: str, index: pd.Index) -> np.ndarray:
+    if column not in df.columns:
+        return np.full(len(index), "", dtype=object)
+    values = df[column].reindex(index)
+    if pd.api.types.is_string_dtype(values.dtype) and not pd.api.types.is_object_dtype(values.dtype):
+        return values.str.strip().fillna("").to_numpy(dtype=object)
+    return _map_unique(values, lambda uniques: ["" if pd.isna(v) else _cell_text(v) for v in uniques])
+
+
+class PhoneIndex:
+    """One-to-many index of normalized phones to the companies that list them.
+
+    ``phones`` keeps the first-appearance order of each distinct number;
+    ``companies[phone]`` lists every distinct ``{"company", "siret"}`` pair
+    found for it. Frames can be added incrementally (streamed inputs) while
+    another thread reads the index; lookups by phone (``index[phone]``,
+    ``index.get(phone)``) return the workflow's company info.
+    """
+
+    def __init__(self) -> None:
+        self.phones: List[str] = []
+        self.companies: Dict[str, List[Dict[str, str]]] = {}
+        self.rows = 0
+        self.invalid = 0
+        self._seen: set = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.phones)
+
+    def __contains__(self, phone: object) -> bool:
+        return phone in self.companies
+
+    def __getitem__(self, phone: str) -> Dict[str, object]:
+        if phone not in self.companies:
+            raise KeyError(phone)
+        return self.company_info(phone)
+
+    def get(self, phone: str, default=None):
+        return self.company_info(phone) if phone in self.companies else default
+
+    def add_frame(
+        self,
+        df: pd.DataFrame,
+        *,
+        phone_column: str = "phone",
+        company_column: str = "company",
+        siret_column: str = "siret",
+        date_column: str = "scraped_at",
+    ) -> List[str]:
+        """Normalize ``df[phone_column]`` into the index; returns the new phones.
+
+        The optional ``date_column`` (date of the Kompass row) is kept as
+        ``"scraped_at"`` on the company entries when present.
+        """
+        df = df.reset_index(drop=True)
+        raw = df[phone_column]
+        phones = normalize_series(raw)
+        rows = zip(
+            phones.to_numpy(dtype=object).tolist(),
+            _text_column(df, company_column, phones.index).tolist(),
+            _text_column(df, siret_column, phones.index).tolist(),
+            _text_column(df, date_column, phones.index).tolist(),
+        )
+        added: List[str] = []
+        with self._lock:
+            for phone, company, siret, scraped_at in dict.fromkeys(rows):
+                key = (phone, company, siret)
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                if phone not in self.companies:
+                    self.companies[phone] = []
+                    added.append(phone)
+                item = {"company": company, "siret": siret}
+                if scraped_at:
+                    item["scraped_at"] = scraped_at
+                self.companies[phone].append(item)
+            self.phones.extend(added)
+            self.rows += len(df)
+            self.invalid += int(raw.notna().sum()) - phones.index.nunique()
+        return added
+
+    def shared(self) -> Dict[str, List[Dict[str, str]]]:
+        """Phones listed by more than one company."""
+        with self._lock:
+            return {phone: list(items) for phone, items in self.companies.items() if len(items) > 1}
+
+    def company_info(self, phone: str) -> Dict[str, object]:
+        """Company info for the workflow: all names/SIRETs joined with ``" | "``."""
+        with self._lock:
+            items = list(self.companies.get(phone, ()))
+        return {
+            "company": " | ".join(dict.fromkeys(item["company"] for item in items if item["company"])),
+            "siret": " | ".join(dict.fromkeys(item["siret"] for item in items if item["siret"])),
+            "companies": items,
+        }
+
+    def company_info_map(self) -> Dict[str, Dict[str, object]]:
+        return {phone: self.company_info(phone) for phone in list(self.phones)}
+
+
+def build_index(df: pd.DataFrame, **columns: str) -> PhoneIndex:
+    """Normalize ``df`` phones and index every number to its companies."""
+    index = PhoneIndex()
+    index.add_frame(df, **columns)
+    return index
+
+
+__all__ = [
+    "normalize_series",
+    "normalize_values",
+    "PhoneIndex",
+    "build_index",
+]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator
+
+from . import config
+from . import hotkeys
+from . import scheduler
+from . import session
+from . import snippets
+from . import ui_actions
+
+
+class Extraction:
+    """Interlocutor extraction of one phone, running on in its own tab."""
+
+    __slots__ = ("phone", "company_info", "keys", "running", "search_seconds")
+
+    def __init__(
+        self,
+        phone: str,
+        company_info: Dict,
+        running: snippets.RunningSnippet,
+        search_seconds: float,
+    ) -> None:
+        self.phone = phone
+        self.company_info = company_info
+        self.keys = set(scheduler.company_keys(phone, company_info))
+        self.running = running
+        # Temps passé sur la GUI (recherche jusqu'au lancement de l'extraction)
+        self.search_seconds = search_seconds
+
+
+class Pipeline:
+    """Overlaps interlocutor extractions with the next searches (one CRM session).
+
+    Once a phone's interlocutor tab is open, :meth:`launch` starts its
+    extraction without waiting (``snippets.start_dom_interlocuteurs_snippet``)
+    and returns to the CRM tab, so the next phone is searched while the
+    extraction paginates. Keyboard, mouse and tab switches stay with one
+    caller at a time (``session.input_section``); background extractions
+    never use them. :meth:`collect` hands back finished extractions, oldest
+    first.
+    """
+
+    def __init__(self, depth: int | None = None) -> None:
+        self.depth = max(1, depth or config.PIPELINE_DEPTH)
+        self._inflight: deque[Extraction] = deque()
+        self.launched = 0
+        self.failed = 0
+        self.waited = 0.0
+        self.extraction_seconds = 0.0
+
+    @staticmethod
+    def create() -> "Pipeline | None":
+        """A pipeline when ``config.PIPELINE_ENABLED``, else ``None``."""
+        return Pipeline() if config.PIPELINE_ENABLED else None
+
+    def launch(self, phone: str, company_info: Dict, search_seconds: float, *, wait_ready: bool = True) -> bool:
+        """Start ``phone``'s extraction in the active tab, then go back to the CRM tab.
+
+        Returns ``False`` (nothing started, still on the interlocutor tab)
+        when the snippet cannot run in the background; the caller then
+        extracts synchronously.
+        """
+        running = snippets.start_dom_interlocuteurs_snippet()
+        if running is None:
+            return False
+        self._inflight.append(Extraction(phone, company_info, running, search_seconds))
+        self.launched += 1
+        with session.input_section():
+            hotkeys.first_tab()
+        # Attente sur capture: le clavier reste libre pour les autres sessions
+        if wait_ready and not ui_actions.wait_for_search_ready():
+            print("   [WARN] Onglet CRM non detecte apres le lancement de l'extraction, on poursuit")
+        return True
+
+    def busy(self) -> int:
+        return len(self._inflight)
+
+    def collect(
+        self,
+        keys: Iterable[str] = (),
+        *,
+        room: bool = False,
+        drain: bool = False,
+    ) -> Iterator[tuple[Extraction, str | None, float]]:
+        """Yield ``(extraction, json_text, waited_seconds)`` of finished extractions.
+
+        Blocks, oldest first, for the extractions of a company in ``keys``
+        (so the scheduler sees their outcome first), to leave room for one
+        more launch with ``room``, or for all of them with ``drain``.
+        ``json_text`` is ``None`` when no result came back in time.
+        """
+        wanted = set(keys)
+        while self._inflight:
+            head = self._inflight[0]
+            must_wait = (
+                drain
+                or (room and len(self._inflight) >= self.depth)
+                or any(wanted & extraction.keys for extraction in self._inflight)
+            )
+            if not must_wait and not head.running.done():
+                return
+            start = time.monotonic()
+            text = head.running.result(config.PIPELINE_RESULT_TIMEOUT + config.CDP_CONNECT_TIMEOUT)
+            waited = time.monotonic() - start
+            self._inflight.popleft()
+            self.waited += waited
+            finished = head.running.finished or time.monotonic()
+            self.extraction_seconds += finished - head.running.started
+            if text is None:
+                self.failed += 1
+            yield head, text, waited
+
+    def print_report(self) -> None:
+        if not self.launched:
+            return
+        hidden = max(0.0, self.extraction_seconds - self.waited)
+        print(
+            f"[INFO] Pipeline: {self.launched} extraction(s) en arriere-plan, "
+            f"{self.extraction_seconds:.0f}s d'extraction dont {hidden:.0f}s masquee(s) par les recherches, "
+            f"{self.failed} sans resultat"
+        )
+
+
+__all__ = [
+    "Extraction",
+    "Pipeline",
+]
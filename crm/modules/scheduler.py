@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import datetime
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping
+
+from . import cache
+from . import config
+
+# Statuts qui "règlent" une entreprise selon la politique de court-circuit
+SHORT_CIRCUIT_POLICIES: Dict[str, tuple[str, ...]] = {
+    "off": (),
+    "found": ("FOUND",),
+    "result": ("FOUND", "NO_CONTACT_FOUND"),
+}
+
+
+def company_keys(phone: str, info: Mapping | None) -> List[str]:
+    """Grouping keys of a phone: SIRET when known, else the company name.
+
+    A phone shared by several companies gets one key per company; a phone
+    without company info forms its own group.
+    """
+    items = list((info or {}).get("companies") or ([info] if info else []))
+    keys: List[str] = []
+    for item in items:
+        siret = str(item.get("siret", "") or "").strip()
+        name = " ".join(str(item.get("company", "") or "").lower().split())
+        key = f"siret:{siret}" if siret else (f"nom:{name}" if name else "")
+        if key and key not in keys:
+            keys.append(key)
+    return keys or [f"tel:{phone}"]
+
+
+# Règles de priorité: nom -> fonction (phone, companies, context) -> [0, 1].
+# Le poids de chaque règle vient de config.PRIORITY_WEIGHTS.
+PRIORITY_RULES: Dict[str, Callable[[str, List[Mapping], Mapping], float]] = {}
+
+
+def priority_rule(name: str):
+    """Register a scoring rule under ``name`` (weighted by ``config.PRIORITY_WEIGHTS``)."""
+    def register(func):
+        PRIORITY_RULES[name] = func
+        return func
+    return register
+
+
+def _parse_date(value: object) -> datetime.datetime | None:
+    text = str(value or "").strip()
+    if not text:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            parsed = datetime.datetime.strptime(text[:10], "%d/%m/%Y")
+        except ValueError:
+            return None
+    return parsed.replace(tzinfo=None)
+
+
+@priority_rule("siret")
+def _has_siret(phone: str, companies: List[Mapping], context: Mapping) -> float:
+    return 1.0 if any(str(item.get("siret", "") or "").strip() for item in companies) else 0.0
+
+
+@priority_rule("mobile")
+def _is_mobile(phone: str, companies: List[Mapping], context: Mapping) -> float:
+    return 1.0 if phone.startswith(tuple(config.PRIORITY_MOBILE_PREFIXES)) else 0.0
+
+
+@priority_rule("never_searched")
+def _never_searched(phone: str, companies: List[Mapping], context: Mapping) -> float:
+    history = context.get("history")
+    return 1.0 if history is not None and history(phone) is None else 0.0
+
+
+@priority_rule("recent")
+def _recent(phone: str, companies: List[Mapping], context: Mapping) -> float:
+    days = config.PRIORITY_RECENT_DAYS
+    best = 0.0
+    for item in companies:
+        scraped_at = _parse_date(item.get("scraped_at"))
+        if scraped_at is not None and days > 0:
+            age = (context["today"] - scraped_at).total_seconds() / 86400
+            best = max(best, min(1.0, max(0.0, 1.0 - age / days)))
+    return best
+
+
+class _Group:
+    """Pending phones of one company, best score first."""
+
+    __slots__ = ("key", "phones")
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.phones: List[tuple[float, int, str]] = []
+
+    @property
+    def best(self) -> float:
+        return -self.phones[0][0]
+
+    def __lt__(self, other: "_Group") -> bool:
+        # Égalité (score, ordre) possible entre deux entrées d'un groupe remis en file
+        return self.key < other.key
+
+
+class Scheduler:
+    """Scheduling stage ahead of the CRM searches.
+
+    Iterating yields each distinct phone once, a company's phones back to
+    back (SIRET, else company name) within a read-ahead window of
+    ``config.SCHEDULER_LOOKAHEAD`` phones, so streamed inputs are not read
+    in full first. Within that window companies are taken by priority
+    score (``config.PRIORITY_WEIGHTS`` over :data:`PRIORITY_RULES`, input
+    order on ties and when priority is off). After each lookup the workflow
+    calls :meth:`record`; once a search settles a company under
+    ``config.SCHEDULER_SHORT_CIRCUIT`` its remaining phones are dropped:
+    :meth:`skip_reason` tells why. With a time budget, :meth:`out_of_budget`
+    tells the workflow to stop before the next search. :meth:`print_report`
+    lists the dropped searches and the found-rate per hour against FIFO.
+
+    Parallel sessions (``workers``) iterate the same scheduler from their
+    threads: each iterator keeps its own company, so no two sessions search
+    the same company side by side. An iterator with nothing to take while
+    other sessions hold the buffered companies waits for a release or new
+    phones; it ends once the input is read and no company is held.
+    """
+
+    def __init__(
+        self,
+        phone_numbers: Iterable[str],
+        company_info_map: Mapping | None = None,
+        *,
+        policy: str | None = None,
+        lookahead: int | None = None,
+        weights: Mapping[str, float] | None = None,
+        history: Callable[[str], float | None] | None = None,
+        budget_minutes: float | None = None,
+    ) -> None:
+        self.policy = config.SCHEDULER_SHORT_CIRCUIT if policy is None else policy
+        if self.policy not in SHORT_CIRCUIT_POLICIES:
+            raise ValueError(f"Politique inconnue: {self.policy} ({', '.join(SHORT_CIRCUIT_POLICIES)})")
+        self.lookahead = max(1, config.SCHEDULER_LOOKAHEAD if lookahead is None else lookahead)
+        if weights is None:
+            weights = config.PRIORITY_WEIGHTS if config.PRIORITY_ENABLED else {}
+        unknown = sorted(set(weights) - set(PRIORITY_RULES))
+        if unknown:
+            raise ValueError(f"Regle(s) de priorite inconnue(s): {', '.join(unknown)} ({', '.join(PRIORITY_RULES)})")
+        self.weights = {name: float(weight) for name, weight in weights.items() if weight}
+        budget_minutes = config.TIME_BUDGET_MINUTES if budget_minutes is None else budget_minutes
+        self.budget = budget_minutes * 60 if budget_minutes and budget_minutes > 0 else None
+        self.company_info_map = company_info_map or {}
+        self.duplicates = 0
+        self.dropped: List[Dict[str, str]] = []
+        self.stopped = False
+        self._context = {"history": history, "today": datetime.datetime.now()}
+        self._source = iter(phone_numbers)
+        self._exhausted = False
+        # Un seul thread lit la source, hors verrou (PhoneStream peut bloquer)
+        self._reading = False
+        self._seen: set = set()
+        self._arrival = itertools.count()
+        self._buffered = 0
+        self._groups: Dict[str, _Group] = {}
+        self._queue: List[tuple[float, int, _Group]] = []
+        # Groupes en cours, un par itérateur (session)
+        self._held: set = set()
+        self._lock = threading.RLock()
+        # Signalé à chaque numéro lu, retiré ou groupe libéré
+        self._changed = threading.Condition(self._lock)
+        self._settled: Dict[str, str] = {}
+        self._started: float | None = None
+        # (ordre d'arrivée, durée, trouvé) de chaque recherche CRM, dans l'ordre réel
+        self._searches: List[tuple[int, float, bool]] = []
+        self._order: Dict[str, int] = {}
+
+    def _keys(self, phone: str) -> List[str]:
+        return company_keys(phone, self.company_info_map.get(phone))
+
+    def _fill(self) -> None:
+        """Read ahead up to the window; called without the lock, which is free while reading."""
+        while True:
+            with self._lock:
+                if self._exhausted or self._reading or self._buffered >= self.lookahead:
+                    return
+                self._reading = True
+            phone = None
+            try:
+                phone = next(self._source)
+            except StopIteration:
+                pass
+            finally:
+                with self._lock:
+                    self._reading = False
+                    if phone is None:
+                        self._exhausted = True
+                    elif phone in self._seen:
+                        self.duplicates += 1
+                    else:
+                        self._seen.add(phone)
+                        seq = next(self._arrival)
+                        self._order[phone] = seq
+                        self._push(phone, seq)
+                        self._buffered += 1
+                    self._changed.notify_all()
+
+    def score(self, phone: str) -> float:
+        """Priority score of ``phone`` (0 when priority is off)."""
+        if not self.weights:
+            return 0.0
+        info = self.company_info_map.get(phone) or {}
+        companies = list(info.get("companies") or ([info] if info else []))
+        return sum(
+            weight * PRIORITY_RULES[name](phone, companies, self._context)
+            for name, weight in self.weights.items()
+        )
+
+    def _push(self, phone: str, seq: int) -> None:
+        key = self._keys(phone)[0]
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _Group(key)
+        score = self.score(phone)
+        improves = not group.phones or score > group.best
+        heapq.heappush(group.phones, (-score, seq, phone))
+        # Entrée périmée si le groupe a été vidé ou a trouvé mieux depuis
+        if improves and group not in self._held:
+            heapq.heappush(self._queue, (-score, seq, group))
+
+    def _release(self, group: _Group | None) -> None:
+        if group is None or group not in self._held:
+            return
+        self._held.discard(group)
+        if self._groups.get(group.key) is group:
+            if group.phones:
+                # Itérateur abandonné en cours de groupe: le reste repasse dans la file
+                heapq.heappush(self._queue, (group.phones[0][0], group.phones[0][1], group))
+            else:
+                del self._groups[group.key]
+        self._changed.notify_all()
+
+    def _next_group(self, current: _Group | None) -> _Group | None:
+        if current is not None and current.phones:
+            return current
+        self._release(current)
+        while self._queue:
+            score, _, group = heapq.heappop(self._queue)
+            if (
+                self._groups.get(group.key) is group
+                and group.phones
+                and -score == group.best
+                and group not in self._held
+            ):
+                self._held.add(group)
+                return group
+        return None
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            if self._started is None:
+                self._started = time.monotonic()
+        group: _Group | None = None
+        try:
+            while True:
+                self._fill()
+                with self._lock:
+                    group = self._next_group(group)
+                    if group is None:
+                        if self._exhausted and not self._held:
+                            return
+                        # Fenêtre tenue par d'autres sessions ou lecture en cours
+                        self._changed.wait(timeout=1.0)
+                        continue
+                    # Groupe vide gardé jusqu'à sa libération: les numéros de
+                    # l'entreprise lus entre-temps restent à cette session
+                    _, _, phone = heapq.heappop(group.phones)
+                    self._buffered -= 1
+                    self._changed.notify_all()
+                yield phone
+        finally:
+            with self._lock:
+                self._release(group)
+
+    def upcoming(self, limit: int) -> List[str]:
+        """Up to ``limit`` buffered phones, roughly in the order they will be yielded."""
+        self._fill()
+        with self._lock:
+            held = [group for group in self._held if group.phones]
+            groups = sorted(held, key=lambda group: group.phones[0][:2])
+            groups += sorted(
+                (group for group in self._groups.values() if group not in self._held and group.phones),
+                key=lambda group: group.phones[0][:2],
+            )
+            phones: List[str] = []
+            for group in groups:
+                phones.extend(phone for _, _, phone in sorted(group.phones))
+                if len(phones) >= limit:
+                    break
+            return phones[:limit]
+
+    def out_of_budget(self) -> bool:
+        """True when the next search would overrun the time budget."""
+        with self._lock:
+            if self.budget is None or self._started is None:
+                return False
+            durations = [seconds for _, seconds, _ in self._searches]
+            expected = sum(durations) / len(durations) if durations else 0.0
+            if time.monotonic() - self._started + expected <= self.budget:
+                return False
+            self.stopped = True
+            return True
+
+    def pending(self) -> tuple[int, bool]:
+        """Phones still queued in the window, and whether the input is fully read."""
+        with self._lock:
+            return self._buffered, self._exhausted
+
+    def skip_reason(self, phone: str) -> str | None:
+        """Why ``phone`` need not be searched (every company settled), else ``None``."""
+        keys = self._keys(phone)
+        with self._lock:
+            if not all(key in self._settled for key in keys):
+                return None
+            return "; ".join(f"{key} regle par {self._settled[key]}" for key in keys)
+
+    def skip(self, phone: str, reason: str) -> None:
+        with self._lock:
+            self.dropped.append({"phone": phone, "reason": reason})
+
+    def record(self, phone: str, rows: List[Dict], seconds: float | None = None) -> None:
+        """Note the outcome of a lookup; settles its companies per the policy.
+
+        ``seconds`` is the duration of a CRM search (``None`` for cached
+        rows); it feeds the time budget and the found-rate report.
+        """
+        status = cache.status_class(rows)
+        keys = self._keys(phone)
+        with self._lock:
+            if seconds is not None:
+                self._searches.append((self._order.get(phone, 0), seconds, status == "FOUND"))
+            if status in SHORT_CIRCUIT_POLICIES[self.policy]:
+                for key in keys:
+                    self._settled.setdefault(key, phone)
+
+    @staticmethod
+    def _found_within(searches: Iterable[tuple[int, float, bool]], horizon: float) -> int:
+        found = 0
+        elapsed = 0.0
+        for _, seconds, hit in searches:
+            elapsed += seconds
+            if elapsed > horizon:
+                break
+            found += hit
+        return found
+
+    def _print_rate_report(self) -> None:
+        if not self._searches:
+            return
+        total = sum(seconds for _, seconds, _ in self._searches)
+        found = sum(hit for _, _, hit in self._searches)
+        hours = total / 3600
+        rate = found / hours if hours else 0.0
+        print(
+            f"[INFO] Rendement: {found} FOUND sur {len(self._searches)} recherche(s) "
+            f"en {total / 60:.1f} min ({rate:.1f} FOUND/h)"
+        )
+        if not self.weights or total <= 0:
+            return
+        # FIFO: mêmes recherches et mêmes durées, rejouées dans l'ordre d'arrivée
+        fifo = sorted(self._searches, key=lambda item: item[0])
+        print("   Priorite vs FIFO (estime sur les numeros recherches):")
+        for share in (0.25, 0.5, 1.0):
+            horizon = total * share
+            prioritized = self._found_within(self._searches, horizon) / (horizon / 3600)
+            baseline = self._found_within(fifo, horizon) / (horizon / 3600)
+            print(f"   {int(share * 100):>3}% du temps: {prioritized:.1f} FOUND/h (FIFO: {baseline:.1f} FOUND/h)")
+
+    def print_report(self, limit: int = 20) -> None:
+        if self.duplicates:
+            print(f"[INFO] Planification: {self.duplicates} doublon(s) ignore(s)")
+        if self.stopped:
+            buffered, exhausted = self.pending()
+            rest = "" if exhausted else " (suite du fichier non lue)"
+            # + le numéro retiré de la file mais non recherché
+            print(f"[INFO] Budget de {self.budget / 60:g} min atteint: {buffered + 1} numero(s) en attente{rest}")
+        self._print_rate_report()
+        if not self.dropped:
+            return
+        print(
+            f"[INFO] Planification ({self.policy}): {len(self.dropped)} recherche(s) evitee(s), "
+            f"entreprise deja reglee:"
+        )
+        for item in self.dropped[:limit]:
+            print(f"   {item['phone']}: {item['reason']}")
+        if len(self.dropped) > limit:
+            print(f"   ... et {len(self.dropped) - limit} autre(s) (statut SKIPPED dans les resultats)")
+
+
+__all__ = [
+    "SHORT_CIRCUIT_POLICIES",
+    "company_keys",
+    "PRIORITY_RULES",
+    "priority_rule",
+    "Scheduler",
+]
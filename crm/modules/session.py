@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+import pyautogui
+
+from . import config
+
+Region = Tuple[int, int, int, int]
+Point = Tuple[int, int]
+
+
+class Session:
+    """One CRM session: a VM window on its own screen tile.
+
+    Template regions, fallback points and the calibrated scan region of a
+    tiled session are relative to its tile (``region``); the default
+    session (``region=None``) works in screen coordinates as before.
+    ``state`` holds per-session runtime state (injected snippet runtime,
+    etc.). Keyboard and mouse go through :func:`input_section`, which
+    gives the focus back to the session's window when another one had it.
+    """
+
+    def __init__(
+        self,
+        name: str = "main",
+        region: Optional[Region] = None,
+        *,
+        title: str | None = None,
+        focus_point: Optional[Point] = None,
+        cdp_port: int | None = None,
+    ) -> None:
+        self.name = name
+        self.region = tuple(region) if region is not None else None
+        self.title = title
+        self.focus_point = tuple(focus_point) if focus_point is not None else None
+        self.cdp_port = cdp_port
+        self.state: Dict = {}
+        self._scan_region: Optional[Region] = None
+
+    def __repr__(self) -> str:
+        return f"Session({self.name!r}, {self.region})"
+
+    @property
+    def tiled(self) -> bool:
+        return self.region is not None
+
+    @property
+    def origin(self) -> Point:
+        return (self.region[0], self.region[1]) if self.region is not None else (0, 0)
+
+    def to_screen(self, point: Point) -> Point:
+        x, y = self.origin
+        return (point[0] + x, point[1] + y)
+
+    def to_screen_region(self, region: Region) -> Region:
+        x, y = self.to_screen((region[0], region[1]))
+        return (x, y, region[2], region[3])
+
+    @property
+    def scan_region(self) -> Optional[Region]:
+        """Screen region scanned when a template has none (calibrated, else the tile)."""
+        if self.region is None:
+            return config.SEARCH_SCAN_REGION
+        return self._scan_region or self.region
+
+    @scan_region.setter
+    def scan_region(self, region: Optional[Region]) -> None:
+        if self.region is None:
+            config.SEARCH_SCAN_REGION = region
+        else:
+            self._scan_region = region
+
+    @property
+    def calibrated(self) -> bool:
+        return (config.SEARCH_SCAN_REGION if self.region is None else self._scan_region) is not None
+
+    def bounds(self) -> Region:
+        """The whole session in its own coordinates (its tile, else the screen)."""
+        if self.region is not None:
+            return (0, 0, self.region[2], self.region[3])
+        width, height = pyautogui.size()
+        return (0, 0, width, height)
+
+    def capture_region(self, region: Optional[Region] = None) -> Optional[Region]:
+        """Screen region to capture for a template ``region`` (session coordinates)."""
+        return self.to_screen_region(region) if region is not None else self.scan_region
+
+    def focus(self) -> None:
+        """Bring the session's window to the foreground (window title, else a click on the tile)."""
+        if self.title:
+            finder = getattr(pyautogui, "getWindowsWithTitle", None)
+            try:
+                windows = finder(self.title) if finder is not None else []
+                if windows:
+                    windows[0].activate()
+                    time.sleep(config.timing("key_settle"))
+                    return
+            except Exception as exc:
+                print(f"[WARN] Session {self.name}: activation de la fenetre '{self.title}' impossible ({exc})")
+        if self.region is None:
+            return
+        point = self.focus_point or (self.region[2] // 2, config.WORKER_TITLE_BAR_Y)
+        pyautogui.click(self.to_screen(point))
+        time.sleep(config.timing("key_settle"))
+
+
+DEFAULT = Session()
+
+_local = threading.local()
+# Clavier, souris et presse-papiers: une session à la fois
+_INPUT_LOCK = threading.RLock()
+_focused: Session | None = None
+
+
+def current() -> Session:
+    """Session of the calling thread (the default session outside workers)."""
+    return getattr(_local, "session", None) or DEFAULT
+
+
+@contextmanager
+def use(session: Session) -> Iterator[Session]:
+    """Run the calling thread's GUI work in ``session``."""
+    previous = getattr(_local, "session", None)
+    _local.session = session
+    try:
+        yield session
+    finally:
+        _local.session = previous
+
+
+@contextmanager
+def input_section() -> Iterator[Session]:
+    """Hold the keyboard, mouse and clipboard for the current session.
+
+    Reentrant. The session's window gets the focus back first when another
+    session used the input last; captures and waits stay outside.
+    """
+    global _focused
+    with _INPUT_LOCK:
+        active = current()
+        if active is not _focused:
+            if _focused is not None or active.tiled:
+                active.focus()
+            _focused = active
+        yield active
+
+
+def refocus() -> None:
+    """Give the focus back to the current session (after another window took it)."""
+    global _focused
+    with _INPUT_LOCK:
+        active = current()
+        if active.tiled:
+            active.focus()
+        _focused = active
+
+
+__all__ = [
+    "Session",
+    "DEFAULT",
+    "current",
+    "use",
+    "input_section",
+    "refocus",
+]
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from . import config
+from . import filesystem
+
+# Runtime des snippets: les snippets de scripts/ sont regroupés en un seul
+# script (bundle) qui enregistre window.__crm, une fonction par snippet, une
+# seule fois par onglet; chaque appel est ensuite une ligne courte
+# (__crm.extract(...)). Le bundle est versionné par le hash de son contenu:
+# onglet neuf, page rechargée ou ancienne version -> réinjection.
+# Build (avant PyInstaller): python -m modules.snippet_runtime
+SNIPPET_DIR = config.BASE_DIR / "scripts"
+DIST_DIR = SNIPPET_DIR / "dist"
+MANIFEST_NAME = "manifest.json"
+
+# Nom de la fonction window.__crm -> snippet source
+RUNTIME_FUNCTIONS: Dict[str, str] = {
+    "openTab": "open_interlocuteur_tab.js",
+    "extract": "dom_interlocuteurs_snippet.js",
+    "prefetch": "dom_get_first_interlocuteurs_snippet.js",
+    "batch": "batch_lookup.js",
+}
+
+# Ligne "//@include lib/x.js": remplacée par le fichier (relatif à scripts/)
+_INCLUDE = re.compile(r"^[ \t]*//@include[ \t]+(\S+)[ \t]*$", re.MULTILINE)
+
+# %(version)s, %(functions)s: fonctions enregistrées une seule fois par page.
+# Un snippet qui lit window.__crmChannel poste lui-même son JSON; pour les
+# autres, le runtime poste un accusé ("true"/"false") sur le canal.
+_BUNDLE = """(()=>{
+const V=%(version)s;
+if(window.__crm&&window.__crm.version===V)return V;
+const post=(ch,payload)=>fetch(ch.url,{method:"POST",headers:{"Content-Type":"text/plain"},body:JSON.stringify({id:ch.id,payload:payload})}).catch(()=>{});
+const run=(body,self)=>(ch,args)=>{
+if(ch&&self)window.__crmChannel=ch;
+window.__crmArgs=args;
+const r=body();
+if(ch&&!self)Promise.resolve(r).then(v=>post(ch,JSON.stringify(v!=null&&v!==false)));
+return r};
+window.__crm={version:V,
+%(functions)s};
+return V})();
+"""
+
+# Appel d'une ligne; sans runtime (onglet neuf ou rechargé) le canal reçoit
+# {"runtime": "missing"} et Python réinjecte le bundle.
+_CALL = (
+    'window.__crm&&window.__crm.version===%(version)s?window.__crm.%(name)s(%(channel)s,%(args)s):'
+    'fetch(%(url)s,{method:"POST",headers:{"Content-Type":"text/plain"},'
+    'body:JSON.stringify({id:%(id)s,runtime:"missing"})});'
+)
+
+
+def resolve_includes(source: str, base_dir: Path = SNIPPET_DIR, _depth: int = 0) -> str:
+    """Inline the ``//@include`` files of a snippet (shared extraction rules)."""
+    if _depth > 5:
+        raise ValueError("//@include trop imbriques")
+
+    def include(match: re.Match) -> str:
+        text = (base_dir / match.group(1)).read_text(encoding="utf-8").lstrip("\ufeff")
+        return resolve_includes(text, base_dir, _depth + 1).rstrip("\n")
+
+    return _INCLUDE.sub(include, source)
+
+
+def minify(source: str) -> str:
+    """Light minification: BOM, blank lines and indentation removed (line breaks kept)."""
+    lines = (line.strip() for line in source.lstrip("\ufeff").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _function_body(file_name: str, source: str) -> str:
+    expression = minify(source).rstrip(";").rstrip()
+    if not expression.startswith("("):
+        raise ValueError(f"Snippet {file_name}: une seule expression (IIFE) attendue")
+    return f"function(){{return (\n{expression}\n)}}"
+
+
+def _source_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class Bundle:
+    """Built runtime: version (content hash), script text and its file."""
+
+    def __init__(self, version: str, source: str, path: Path, sources: Dict[str, str]) -> None:
+        self.version = version
+        self.source = source
+        self.path = path
+        self.sources = sources
+
+    def call(
+        self,
+        name: str,
+        channel_url: str | None = None,
+        request_id: str | None = None,
+        args: object = None,
+    ) -> str:
+        """One-line invocation of ``window.__crm[name]`` for the console."""
+        if name not in RUNTIME_FUNCTIONS:
+            raise KeyError(name)
+        channel = {"url": channel_url, "id": request_id} if channel_url else None
+        return _CALL % {
+            "version": json.dumps(self.version),
+            "name": name,
+            "channel": json.dumps(channel),
+            "args": json.dumps(args, ensure_ascii=False),
+            "url": json.dumps(channel_url),
+            "id": json.dumps(request_id),
+        }
+
+    def guarded_call(self, name: str, args: object = None) -> str:
+        """Expression injecting the bundle only when missing, then calling ``name`` (DevTools)."""
+        if name not in RUNTIME_FUNCTIONS:
+            raise KeyError(name)
+        return (
+            f"(window.__crm&&window.__crm.version==={json.dumps(self.version)}"
+            f"||(0,eval)({json.dumps(self.source)}),window.__crm.{name}(null,{json.dumps(args, ensure_ascii=False)}))"
+        )
+
+    def with_call(self, line: str) -> Path:
+        """Temp file with the bundle followed by ``line``: one paste injects and calls."""
+        path = Path(tempfile.gettempdir()) / "crm_snippets" / self.path.name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.source + line + "\n", encoding="utf-8")
+        return path
+
+
+def _read_sources(source_dir: Path) -> Dict[str, str]:
+    return {
+        name: resolve_includes((source_dir / file_name).read_text(encoding="utf-8"), source_dir)
+        for name, file_name in RUNTIME_FUNCTIONS.items()
+    }
+
+
+def _assemble(sources: Dict[str, str]) -> tuple[str, str]:
+    functions = ",\n".join(
+        f"{name}:run({_function_body(RUNTIME_FUNCTIONS[name], source)},{str('__crmChannel' in source).lower()})"
+        for name, source in sources.items()
+    )
+    version = _source_hash(_BUNDLE + functions)[:12]
+    return version, _BUNDLE % {"version": json.dumps(version), "functions": functions}
+
+
+def build(source_dir: Path = SNIPPET_DIR, out_dir: Path = DIST_DIR) -> Bundle:
+    """Bundle and minify the snippets into ``out_dir/crm_runtime.<hash>.js``."""
+    sources = _read_sources(source_dir)
+    version, source = _assemble(sources)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"crm_runtime.{version}.js"
+    path.write_text(source, encoding="utf-8")
+    for stale in out_dir.glob("crm_runtime.*.js"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    hashes = {RUNTIME_FUNCTIONS[name]: _source_hash(text) for name, text in sources.items()}
+    filesystem.save_json_state(out_dir / MANIFEST_NAME, {"version": version, "file": path.name, "sources": hashes})
+    return Bundle(version, source, path, hashes)
+
+
+_bundle: Bundle | None = None
+
+
+def load() -> Bundle:
+    """The built bundle; rebuilt when missing or older than the snippet sources."""
+    global _bundle
+    sources = _read_sources(SNIPPET_DIR)
+    hashes = {RUNTIME_FUNCTIONS[name]: _source_hash(text) for name, text in sources.items()}
+    if _bundle is not None and _bundle.sources == hashes:
+        return _bundle
+    manifest = filesystem.load_json_state(DIST_DIR / MANIFEST_NAME, default={}) or {}
+    path = DIST_DIR / str(manifest.get("file", ""))
+    if manifest.get("sources") == hashes and path.is_file():
+        _bundle = Bundle(str(manifest["version"]), path.read_text(encoding="utf-8"), path, hashes)
+        return _bundle
+    try:
+        _bundle = build()
+    except OSError:
+        # Installation en lecture seule: bundle construit dans le dossier temporaire
+        _bundle = build(out_dir=Path(tempfile.gettempdir()) / "crm_snippets" / "dist")
+    return _bundle
+
+
+def function_for(snippet_name: str) -> str | None:
+    """Runtime function of a snippet file, if it is part of the bundle."""
+    for name, file_name in RUNTIME_FUNCTIONS.items():
+        if file_name == snippet_name:
+            return name
+    return None
+
+
+__all__ = [
+    "SNIPPET_DIR",
+    "DIST_DIR",
+    "RUNTIME_FUNCTIONS",
+    "resolve_includes",
+    "minify",
+    "Bundle",
+    "build",
+    "load",
+    "function_for",
+]
+
+
+if __name__ == "__main__":
+    built = build()
+    print(f"Runtime des snippets: {built.path} (version {built.version}, {len(built.source)} caracteres)")
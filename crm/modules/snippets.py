@@ -2,29 +2,35 @@
 
 import time
 import base64
+import json
 import os
 import pyautogui
 import tempfile
-from queue import Queue, Empty
-from threading import Thread
+import threading
+from pathlib import Path
 from typing import Optional, Tuple
+from . import cdp
+from . import channel
 from . import config
+from . import session
+from . import snippet_runtime
+from . import sync
+from . import text_entry
 from . import waiters
 from . import hotkeys
 import pyperclip
 import subprocess
 
 SNIPPET_DIR = config.BASE_DIR / "scripts"
-
-# --- réglages (ajuste si nécessaire) ---
-CHUNK_SIZE = 600          # caractères par bloc (baisse si la VM perd des chars)
-DELAY_BETWEEN = 0.002     # délai entre chunks (0 = max speed, risque perte si trop rapide)
-QUEUE_TIMEOUT = 0.2
+# Snippets qui renvoient un JSON (canal local, sinon prompt + copie)
+RESULT_SNIPPETS = ("dom_interlocuteurs_snippet.js", "dom_get_first_interlocuteurs_snippet.js")
+# Fonctions du runtime qui quittent la page (clic sur le 1er résultat, nouvel onglet)
+PAGE_LEAVING = ("prefetch", "openTab")
 
 def _load_snippet(snippet_name: str) -> str:
     path = SNIPPET_DIR / snippet_name
     try:
-        return path.read_text(encoding="utf-8")
+        return snippet_runtime.resolve_includes(path.read_text(encoding="utf-8"), SNIPPET_DIR)
     except Exception as exc:
         raise RuntimeError(f"Lecture snippet JS echouee: {exc} ({path})") from exc
 
@@ -35,7 +41,7 @@ def open_snippet_in_notepad(snippet_name: str) -> None:
     ferme Notepad avec les commandes demandées.
     """
     # Résoudre le chemin du snippet (dans scripts/ par défaut)
-    path = SNIPPET_DIR / snippet_name
+    path = Path(snippet_name) if os.path.isabs(snippet_name) else SNIPPET_DIR / snippet_name
     if not path.exists():
         raise FileNotFoundError(f"Snippet introuvable: {path}")
 
@@ -47,11 +53,17 @@ def open_snippet_in_notepad(snippet_name: str) -> None:
 
     # Ouvrir Notepad, copier, fermer
     np = subprocess.Popen(["notepad.exe", str(path)])
-    time.sleep(1.0)
+    # Attendre que Notepad soit au premier plan (titre de fenêtre) plutôt
+    # qu'une pause fixe; sans accès aux titres, délai du profil de timing.
+    focused = sync.wait_for_window(("notepad", "bloc-notes", path.name))
+    if focused is None:
+        sync.settle("app_launch")
+    elif not focused:
+        print("[WARN] Fenetre Notepad non detectee au premier plan")
     hotkeys.select_all()
-    time.sleep(0.2)
-    hotkeys.copy()
-    time.sleep(0.3)
+    sync.settle("key_settle")
+    if sync.copy_selection() is None:
+        print("[WARN] Copie depuis Notepad non confirmee par le presse-papiers")
     # Fermer Notepad via les commandes fournies
     try:
         subprocess.run(["taskkill", "/F", "/IM", "notepad.exe"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
@@ -74,70 +86,67 @@ def paste_snipet(snippet: str,
     - auto_focus_console: si True, le code cliquera automatiquement pour s'assurer du focus
     - focus_coords: (x,y) si tu veux un clic précis pour le focus
     """
-    # 0) délai avant démarrage (garde ton timing d'origine)
-    time.sleep(0.8)
+    with session.input_section():
+        # 0) courte stabilisation avant de prendre le clavier
+        sync.settle("key_settle")
 
-    # Méthode demandée: ouvrir directement le fichier du snippet dans Notepad,
-    # copier, fermer (via taskkill fournis), puis coller dans la console
-    try:
-        candidate = (snippet or "").strip()
-        if candidate:
-            # si c'est un nom de fichier .js, on va chercher dans scripts/
-            if candidate.lower().endswith('.js'):
-                open_snippet_in_notepad(candidate)
-                hotkeys.open_chrome_console()
-                time.sleep(0.8)
-                hotkeys.select_all()
-                pyautogui.press("backspace")
-                time.sleep(0.1)
-                hotkeys.paste()
-                time.sleep(0.2)
-                pyautogui.press("enter")
-                time.sleep(0.1)
-                return
-    except Exception:
-        # Si Notepad échoue, on retombera sur la logique existante ci‑dessous
-        pass
-
-    # 1) ouvrir la console (Ctrl+Shift+K)
-    hotkeys.open_chrome_console()
-    time.sleep(0.8)
+        # Méthode demandée: ouvrir directement le fichier du snippet dans Notepad,
+        # copier, fermer (via taskkill fournis), puis coller dans la console
+        try:
+            candidate = (snippet or "").strip()
+            if candidate:
+                # si c'est un nom de fichier .js, on va chercher dans scripts/
+                if candidate.lower().endswith('.js'):
+                    open_snippet_in_notepad(candidate)
+                    # Notepad fermé: focus rendu à la fenêtre de la session
+                    session.refocus()
+                    hotkeys.open_chrome_console()
+                    hotkeys.select_all()
+                    pyautogui.press("backspace")
+                    sync.settle("key_settle")
+                    hotkeys.paste()
+                    sync.settle("key_settle")
+                    pyautogui.press("enter")
+                    return
+        except Exception:
+            # Si Notepad échoue, on retombera sur la logique existante ci‑dessous
+            pass
+
+        # 1) ouvrir la console (Ctrl+Shift+K)
+        hotkeys.open_chrome_console()
+
+        # 2) sélectionner tout et vider (Ctrl+A puis Backspace)
+        hotkeys.select_all()
+        pyautogui.press("backspace")
+        sync.settle("key_settle")
+        # Ut
+        # ilise les commandes système, mais seulement pour Windows
+        pyperclip.copy('')
+        pyperclip.copy(snippet)
+        proc = subprocess.Popen(
+            ['powershell', '-command', 'Set-Clipboard'],
+            stdin=subprocess.PIPE,
+            close_fds=True
+        )
+        hotkeys.paste()
+        return
+
+        # 3) injection sûre
+        if use_base64:
+            print(f"Injection via base64: {snippet}")
+            # wrapper ASCII safe qui contient le code encodé en base64
+            wrapper = make_base64_wrapper(snippet)
+            # tape la ligne wrapper rapidement ; si tu veux, active auto_focus_console
+            type_one_line_fast(wrapper, focus_delay=0.0, auto_focus=auto_focus_console, focus_coords=focus_coords)
+        else:
+            # fallback : taper le snippet brut (risque d'illegal char)
+            type_one_line_fast(snippet, focus_delay=0.0, auto_focus=auto_focus_console, focus_coords=focus_coords)
 
-    # 2) sélectionner tout et vider (Ctrl+A puis Backspace)
-    hotkeys.select_all()
-    pyautogui.press("backspace")
-    time.sleep(0.1)
-    # Ut
-    # ilise les commandes système, mais seulement pour Windows
-    pyperclip.copy('')
-    time.sleep(0.05)
-    pyperclip.copy(snippet)
-    proc = subprocess.Popen(
-        ['powershell', '-command', 'Set-Clipboard'],
-        stdin=subprocess.PIPE,
-        close_fds=True
-    )
-    time.sleep(0.5)
-    hotkeys.paste()
-    time.sleep(0.1)
-    return
-
-    # 3) injection sûre
-    if use_base64:
-        print(f"Injection via base64: {snippet}")
-        # wrapper ASCII safe qui contient le code encodé en base64
-        wrapper = make_base64_wrapper(snippet)
-        # tape la ligne wrapper rapidement ; si tu veux, active auto_focus_console
-        type_one_line_fast(wrapper, focus_delay=0.0, auto_focus=auto_focus_console, focus_coords=focus_coords)
-    else:
-        # fallback : taper le snippet brut (risque d'illegal char)
-        type_one_line_fast(snippet, focus_delay=0.0, auto_focus=auto_focus_console, focus_coords=focus_coords)
-
-    # 4) courte pause puis Enter pour exécuter
-    time.sleep(0.2)
-    pyautogui.press("enter")
-    # marqueur de fin : petite pause
-    time.sleep(0.1)
+        # 4) courte pause puis Enter pour exécuter
+        time.sleep(0.2)
+        pyautogui.press("enter")
+        # marqueur de fin : petite pause
+        time.sleep(0.1)
 
 
 # ---------- Utilities ----------
@@ -162,33 +171,6 @@ def make_base64_wrapper(js_text: str) -> str:
     return wrapper
 # (Anciennes fonctions utilitaires AZERTY supprimées car non utilisées)
 # ---------- Fast typing (pyautogui only) ----------
-def _send_chunk(chunk: str):
-    pyautogui.PAUSE = 0
-    pyautogui.FAILSAFE = False
-    pyautogui.typewrite(chunk, interval=0)
-
-def _producer_chunks(text: str, queue: Queue):
-    n = len(text)
-    pos = 0
-    while pos < n:
-        end = min(n, pos + CHUNK_SIZE)
-        queue.put(text[pos:end])
-        pos = end
-    queue.put(None)  # signal fin
-
-def _consumer_thread(queue: Queue):
-    while True:
-        try:
-            chunk = queue.get(timeout=QUEUE_TIMEOUT)
-        except Empty:
-            continue
-        if chunk is None:
-            break
-        _send_chunk(chunk)
-        if DELAY_BETWEEN:
-            time.sleep(DELAY_BETWEEN)
-        queue.task_done()
-
 def type_one_line_fast(text: str, focus_delay: float = 0.2, auto_focus: bool = False,
                       focus_coords: Optional[Tuple[int,int]] = None):
     """
@@ -200,85 +182,375 @@ def type_one_line_fast(text: str, focus_delay: float = 0.2, auto_focus: bool = F
     # petit délai pour permettre au caller de s'assurer que la fenêtre est prête
     time.sleep(focus_delay)
 
-    if auto_focus:
-        # clique automatiquement pour donner le focus ; si coords non fournies, clic au centre de l'écran.
-        if focus_coords:
-            pyautogui.click(focus_coords[0], focus_coords[1])
-        else:
-            # clic au centre de la fenêtre active (approx écran center)
-            screen_w, screen_h = pyautogui.size()
-            pyautogui.click(screen_w // 2, screen_h // 2)
-        time.sleep(0.05)  # short wait after click
+    with session.input_section():
+        if auto_focus:
+            # clique automatiquement pour donner le focus ; si coords non fournies, clic au centre de l'écran.
+            if focus_coords:
+                pyautogui.click(focus_coords[0], focus_coords[1])
+            else:
+                # clic au centre de la fenêtre active (approx écran center)
+                screen_w, screen_h = pyautogui.size()
+                pyautogui.click(screen_w // 2, screen_h // 2)
+            time.sleep(0.05)  # short wait after click
 
-    q = Queue(maxsize=10)
-    consumer = Thread(target=_consumer_thread, args=(q,), daemon=True)
-    consumer.start()
-    _producer_chunks(text, q)
-    consumer.join()
+        # Frappe par blocs, taille apprise par connexion (text_entry)
+        text_entry.enter(text, target="console", methods=(text_entry.CHUNKED, text_entry.TYPED))
 
  
 
 
-def  _execute_snippet(snippet_name: str, *, wait_for_page_load: bool = False) -> None:
+def _execute_snippet_cdp(snippet_name: str, snippet: str) -> str | None:
+    """Run ``snippet`` through the DevTools bridge; ``None`` to fall back to the GUI (bridge unusable, no JSON in time)."""
+    if not cdp.available():
+        return None
+    name = snippet_runtime.function_for(snippet_name)
+    script = snippet
+    if name is not None:
+        try:
+            script = snippet_runtime.load().guarded_call(name)
+        except (OSError, ValueError) as exc:
+            print(f"[WARN] Runtime des snippets indisponible ({exc}), snippet complet")
+    start = time.perf_counter()
+    try:
+        text = cdp.run_script(script)
+    except cdp.CdpError as exc:
+        cdp.mark_unavailable(exc)
+        return None
+    if text is None:
+        if snippet_name in RESULT_SNIPPETS:
+            # Pas de JSON avant le timeout: pas un résultat vide, la GUI réessaie
+            print(f"[WARN] Snippet {snippet_name} sans resultat via DevTools avant le timeout, execution par la GUI")
+            return None
+        print(f"[WARN] Snippet {snippet_name} sans accuse via DevTools avant le timeout")
+        return ""
+    print(f"[INFO] Snippet {snippet_name} execute via DevTools en {(time.perf_counter() - start) * 1000:.0f} ms")
+    return text
+
+
+def _prepared_file(snippet_name: str, snippet: str, preamble: str = "") -> str:
+    """Copy of the snippet (includes resolved, optional preamble) for Notepad."""
+    path = Path(tempfile.gettempdir()) / "crm_snippets" / snippet_name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(preamble + snippet.lstrip("\ufeff"), encoding="utf-8")
+    return str(path)
+
+
+def _console_run(line: str) -> None:
+    """Colle une ligne courte dans la console (sans Notepad) et l'exécute."""
+    with session.input_section():
+        hotkeys.open_chrome_console()
+        hotkeys.select_all()
+        pyautogui.press("backspace")
+        sync.settle("key_settle")
+        text_entry.enter(line, target="console")
+        pyautogui.press("enter")
+
+
+def _wait_result(snippet_name: str, pending: channel.PendingResult | None) -> str | None:
+    """Result of a pasted snippet: channel payload, else the copied prompt text.
+
+    Snippets without result only wait for the runtime acknowledgement.
+    """
+    if snippet_name not in RESULT_SNIPPETS:
+        if pending is not None:
+            pending.wait(config.timing("runtime_ack_timeout"))
+        return None
+    detected = waiters.wait_for_any_image_on_screen(
+        config.SEARCH_RESULT_TEMPLATES,
+        timeout=config.timing("snippet_result_timeout"),
+        interval=waiters.BackoffSchedule(maximum=0.5),
+        stop_event=pending.event if pending is not None else None,
+        adaptive_timeout=True,
+    )
+    if pending is not None and pending.event.is_set():
+        if pending.payload is not None:
+            print(f"[INFO] ✅ Resultat du snippet {snippet_name} recu par le canal local")
+        return pending.payload
+    if not detected:
+        raise RuntimeError("Resultat de recherche non detecte (image result-cancel-ok.png, result-cancel.png ou result-ok.png introuvable).")
+    print("[INFO] ✅ Resultat de recherche detecte, copie et execution du snippet...")
+    with session.input_section():
+        sync.settle("key_settle")
+        hotkeys.select_all()
+        sync.settle("key_settle")
+        copied = sync.copy_selection()
+        pyautogui.press("enter")
+        sync.settle("key_settle")
+        if copied is None:
+            copied = pyperclip.paste()
+    print(f"[INFO] ✅  Resultat de recherche copie: {copied}")
+    return copied
+
+
+def _runtime() -> dict:
+    """Runtime state of the current session's GUI console.
+
+    "verified" once a post from the page reached the channel, "fresh_tab"
+    while the console faces a page the runtime was not injected in.
+    """
+    return session.current().state.setdefault(
+        "runtime", {"verified": False, "fresh_tab": True, "disabled": False}
+    )
+
+
+def page_changed() -> None:
+    """Note that the console now faces a new page (search submitted, tab opened or closed)."""
+    _runtime()["fresh_tab"] = True
+
+
+def _execute_runtime(snippet_name: str) -> tuple[bool, str | None]:
+    """Run a snippet through the ``window.__crm`` runtime in the GUI console.
+
+    The bundle is pasted (Notepad) with the call on a new page, which is
+    every call of the GUI workflow; the one-line call alone is only pasted
+    on a page the runtime was injected in. Returns ``(handled, text)``;
+    ``handled`` is False when the legacy full paste must be used.
+    """
+    name = snippet_runtime.function_for(snippet_name)
+    receiver = channel.get_channel()
+    state = _runtime()
+    if name is None or receiver is None or state["disabled"]:
+        return False, None
+    try:
+        bundle = snippet_runtime.load()
+    except (OSError, ValueError) as exc:
+        print(f"[WARN] Runtime des snippets indisponible ({exc})")
+        state["disabled"] = True
+        return False, None
+
+    inject = state["fresh_tab"] or not state["verified"]
+    text = None
+    for _ in range(2):
+        pending = receiver.expect()
+        try:
+            line = bundle.call(name, receiver.url, pending.id)
+            if inject:
+                paste_snipet(str(bundle.with_call(line)))
+            else:
+                _console_run(line)
+            text = _wait_result(snippet_name, pending)
+        finally:
+            receiver.discard(pending)
+        if pending.missing:
+            print(f"[INFO] Runtime des snippets absent de l'onglet, injection (version {bundle.version})")
+            inject = True
+            continue
+        if pending.event.is_set():
+            state["verified"] = True
+        elif inject:
+            # Le bundle a tourné mais la page n'atteint pas le canal: appels courts impossibles
+            print("[WARN] Canal local injoignable depuis la page, runtime des snippets desactive")
+            state["disabled"] = True
+        break
+    state["fresh_tab"] = name in PAGE_LEAVING
+    return True, text
+
+
+def _wait_for_page_load() -> None:
+    print("[INFO] Attente du chargement de la page Interlocuteur...")
+    detected = waiters.wait_for_image_on_screen(
+        config.LIST_INTERLOCUTOR_IMAGE,
+        timeout=config.timing("page_load_timeout"),
+        interval=waiters.BackoffSchedule(maximum=0.5),
+        adaptive_timeout=True,
+    )
+    if not detected:
+        raise RuntimeError("Chargement Interlocuteur non detecte (image list-interlocutors.png introuvable).")
+    print("[INFO] Page Interlocuteur detectee, execution du snippet...")
+
+
+def  _execute_snippet(snippet_name: str, *, wait_for_page_load: bool = False) -> str | None:
+    """Run a snippet of scripts/ and return its JSON text.
+
+    Through the DevTools bridge (``cdp``) when enabled and reachable, else
+    in the browser console: the ``window.__crm`` runtime (``snippet_runtime``)
+    with its call when the local channel works, the full snippet otherwise.
+    The GUI path returns the channel payload or the copied
+    prompt text, or ``None`` when it failed (the caller then reads the
+    clipboard).
+    """
     snippet = _load_snippet(snippet_name)
     print(f"[INFO] Execution du snippet: {snippet_name}")
     if wait_for_page_load:
-        print("[INFO] Attente du chargement de la page Interlocuteur...")
-        detected = waiters.wait_for_image_on_screen(
-            config.LIST_INTERLOCUTOR_IMAGE,
-            timeout=20.0,
-            interval=0.5,
-        )
-        if not detected:
-            raise RuntimeError("Chargement Interlocuteur non detecte (image list-interlocutors.png introuvable).")
-        
-        print("[INFO] Page Interlocuteur detectee, execution du snippet...")
-        time.sleep(0.3)
-       
+        _wait_for_page_load()
+
+    text = _execute_snippet_cdp(snippet_name, snippet)
+    if text is not None:
+        return text
 
     try:
-        paste_snipet(snippet_name)
-        time.sleep(0.5)
-        if snippet_name in ("dom_interlocuteurs_snippet.js", "dom_get_first_interlocuteurs_snippet.js"):
-            detected = waiters.wait_for_any_image_on_screen(
-                config.SEARCH_RESULT_TEMPLATES,
-                timeout=60.0,
-                interval=0.5,
-            )
-            if not detected:
-                raise RuntimeError("Resultat de recherche non detecte (image result-cancel-ok.png, result-cancel.png ou result-ok.png introuvable).")
-            else:
-                print("[INFO] ✅ Resultat de recherche detecte, copie et execution du snippet...")
-                time.sleep(0.3)
-                hotkeys.select_all()
-                time.sleep(0.3)
-                hotkeys.copy()
-                time.sleep(0.1)
-                pyautogui.press("enter")
-                time.sleep(0.5)
-                print(f"[INFO] ✅  Resultat de recherche copie: {pyperclip.paste()}")
-  
+        handled, text = _execute_runtime(snippet_name)
+        if handled:
+            return text
+    except Exception as exc:
+        print(f"[WARN] Execution snippet {snippet_name} echouee: {exc}")
+        return None
+
+    copied = None
+    receiver = channel.get_channel() if snippet_name in RESULT_SNIPPETS else None
+    pending = receiver.expect() if receiver is not None else None
+    try:
+        preamble = receiver.preamble(pending) if pending is not None else ""
+        paste_snipet(_prepared_file(snippet_name, snippet, preamble))
+        copied = _wait_result(snippet_name, pending)
         
         #switchKeyboardLayout("fr-FR")
         print(f"[INFO] Snippet {snippet_name} colle et execute dans la console.")
     except Exception as exc:
         print(f"[WARN] Execution snippet {snippet_name} echouee: {exc}")
+    finally:
+        if pending is not None:
+            receiver.discard(pending)
+    return copied
+
+class RunningSnippet:
+    """A result snippet started in its tab, its JSON still to come (pipelined mode)."""
+
+    def __init__(self, snippet_name: str) -> None:
+        self.snippet_name = snippet_name
+        self.started = time.monotonic()
+        self.finished: float | None = None
+        self.event = threading.Event()
+        self.text: str | None = None
+
+    def done(self) -> bool:
+        return self.event.is_set()
+
+    def result(self, timeout: float | None = None) -> str | None:
+        """The snippet's JSON text, ``None`` if nothing came before ``timeout``."""
+        self.event.wait(timeout)
+        return self.text
+
+
+def _start_cdp(snippet_name: str, name: str) -> RunningSnippet | None:
+    if not cdp.available():
+        return None
+    try:
+        script = snippet_runtime.load().guarded_call(name)
+        # Onglet choisi tant qu'il est au premier plan, avant de rendre la main
+        target = cdp.pick_target(cdp.list_targets())
+    except (OSError, ValueError, cdp.CdpError) as exc:
+        print(f"[WARN] Lancement DevTools impossible ({exc})")
+        return None
+    running = RunningSnippet(snippet_name)
+
+    def evaluate() -> None:
+        try:
+            # None (timeout): l'extraction donne une ligne d'erreur, pas un résultat vide
+            running.text = cdp.run_script(script, target=target)
+        except cdp.CdpError as exc:
+            print(f"[WARN] Snippet {snippet_name} en arriere-plan: {exc}")
+        finally:
+            running.finished = time.monotonic()
+            running.event.set()
+
+    threading.Thread(target=evaluate, name=f"crm-{name}", daemon=True).start()
+    return running
+
+
+def _start_runtime(snippet_name: str, name: str) -> RunningSnippet | None:
+    receiver = channel.get_channel()
+    state = _runtime()
+    # Canal pas encore confirmé depuis la page: exécution classique d'abord
+    if receiver is None or state["disabled"] or not state["verified"]:
+        return None
+    try:
+        bundle = snippet_runtime.load()
+    except (OSError, ValueError) as exc:
+        print(f"[WARN] Runtime des snippets indisponible ({exc})")
+        return None
+    pending = receiver.expect()
+    line = bundle.call(name, receiver.url, pending.id)
+    try:
+        # Onglet neuf (ouvert par openTab): bundle injecté avec l'appel
+        paste_snipet(str(bundle.with_call(line)))
+        sync.settle("key_settle")
+    except Exception:
+        receiver.discard(pending)
+        raise
+    state["fresh_tab"] = False
+    running = RunningSnippet(snippet_name)
+
+    def collect() -> None:
+        try:
+            running.text = pending.wait(config.PIPELINE_RESULT_TIMEOUT)
+        finally:
+            receiver.discard(pending)
+            running.finished = time.monotonic()
+            running.event.set()
+
+    threading.Thread(target=collect, name=f"crm-{name}", daemon=True).start()
+    return running
+
+
+def start_snippet(snippet_name: str, *, wait_for_page_load: bool = False) -> RunningSnippet | None:
+    """Start a result snippet without waiting for its JSON (pipelined mode).
+
+    The snippet runs on in its tab once started (DevTools bridge, else a
+    ``window.__crm`` call with the result posted on the local channel), so
+    the caller may switch tabs. Returns ``None`` when neither is usable:
+    the caller then runs the snippet with :func:`_execute_snippet`.
+    """
+    name = snippet_runtime.function_for(snippet_name)
+    if name is None or snippet_name not in RESULT_SNIPPETS:
+        return None
+    if wait_for_page_load:
+        _wait_for_page_load()
+    running = _start_cdp(snippet_name, name)
+    if running is None:
+        running = _start_runtime(snippet_name, name)
+    if running is not None:
+        print(f"[INFO] Snippet {snippet_name} lance en arriere-plan")
+    return running
+
+
+def decode_result(text: str | None, snippet_name: str = "") -> list:
+    """Items of a result snippet's JSON, logging its in-page timing.
+
+    Snippets return ``{"items": [...], "timing": {...}}`` (durations in ms
+    measured in the page); a bare list (older copies) is still accepted.
+    Raises ``ValueError`` on invalid JSON.
+    """
+    data = json.loads(text) if text else []
+    if isinstance(data, list):
+        return data
+    if not isinstance(data, dict):
+        raise ValueError(f"Resultat JSON inattendu: {type(data).__name__}")
+    timing = data.get("timing")
+    if isinstance(timing, dict) and timing:
+        details = ", ".join(
+            f"{key[:-2]}={value} ms" if key.endswith("Ms") else f"{key}={value}"
+            for key, value in timing.items()
+        )
+        print(f"[INFO] Timing en page {snippet_name}: {details}")
+    items = data.get("items")
+    return items if isinstance(items, list) else []
+
 
 def open_interlocuteur_tab() -> None:
     """Ouvre l'iframe Interlocuteur dans un nouvel onglet via window.open."""
     _execute_snippet("open_interlocuteur_tab.js")
 
 
-def run_dom_interlocuteurs_snippet() -> None:
-    """Extrait les interlocuteurs directement depuis la page (onglet deja ouvert)."""
-    _execute_snippet("dom_interlocuteurs_snippet.js", wait_for_page_load=True)
+def run_dom_interlocuteurs_snippet() -> str | None:
+    """Extrait les interlocuteurs directement depuis la page (onglet deja ouvert); renvoie le JSON."""
+    return _execute_snippet("dom_interlocuteurs_snippet.js", wait_for_page_load=True)
+
+def start_dom_interlocuteurs_snippet() -> RunningSnippet | None:
+    """Lance l'extraction des interlocuteurs sans attendre son JSON (mode pipeline)."""
+    return start_snippet("dom_interlocuteurs_snippet.js", wait_for_page_load=True)
 
-def run_dom_get_first_interlocuteurs_snippet() -> None:
-    """Extrait les interlocuteurs directement depuis la page (onglet deja ouvert)."""
-    _execute_snippet("dom_get_first_interlocuteurs_snippet.js")
+def run_dom_get_first_interlocuteurs_snippet() -> str | None:
+    """Extrait les interlocuteurs directement depuis la page (onglet deja ouvert); renvoie le JSON."""
+    return _execute_snippet("dom_get_first_interlocuteurs_snippet.js")
 
 
 __all__ = [
+    "RunningSnippet",
+    "page_changed",
+    "start_snippet",
+    "start_dom_interlocuteurs_snippet",
+    "decode_result",
     "open_interlocuteur_tab",
     "run_dom_interlocuteurs_snippet",
     "run_dom_get_first_interlocuteurs_snippet",
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Iterable
+
+
+def percentile(values: Iterable[float], q: float) -> float | None:
+    """Return the ``q`` quantile (0..1) of ``values`` with linear interpolation."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    if len(ordered) == 1:
+        return ordered[0]
+    q = min(1.0, max(0.0, q))
+    pos = q * (len(ordered) - 1)
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class LatencyRecorder:
+    """Rolling window of latencies (seconds) per key, safe across threads."""
+
+    def __init__(self, window: int = 200) -> None:
+        self.window = window
+        self._samples: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            bucket = self._samples.setdefault(key, deque(maxlen=self.window))
+            bucket.append(float(seconds))
+
+    def samples(self, key: str) -> list[float]:
+        with self._lock:
+            return list(self._samples.get(key, ()))
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def quantile(self, key: str, q: float) -> float | None:
+        return percentile(self.samples(key), q)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            snapshot = {key: list(values) for key, values in self._samples.items()}
+        report: dict[str, dict[str, float]] = {}
+        for key, values in snapshot.items():
+            if not values:
+                continue
+            report[key] = {
+                "count": len(values),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "max": max(values),
+            }
+        return report
+
+    def to_dict(self) -> dict[str, list[float]]:
+        with self._lock:
+            return {key: list(values) for key, values in self._samples.items()}
+
+    def load(self, data: dict[str, Iterable[float]]) -> None:
+        with self._lock:
+            for key, values in (data or {}).items():
+                bucket = self._samples.setdefault(key, deque(maxlen=self.window))
+                bucket.extend(float(v) for v in values)
+
+
+__all__ = [
+    "percentile",
+    "LatencyRecorder",
+]
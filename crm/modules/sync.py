@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Callable, Sequence, TypeVar
+
+import pyautogui
+import pyperclip
+
+from . import config
+from . import hotkeys
+from . import session
+from . import waiters
+
+T = TypeVar("T")
+
+
+def settle(name: str) -> None:
+    """Sleep for a stabilisation delay of the timing profile.
+
+    Only for steps with no observable condition (keystroke echo, console
+    opening); everything else should wait on a condition below.
+    """
+    delay = config.timing(name)
+    if delay > 0:
+        time.sleep(delay)
+
+
+def wait_until(
+    predicate: Callable[[], T],
+    *,
+    timeout: float,
+    interval: float | waiters.PollSchedule | None = None,
+) -> T | None:
+    """Poll ``predicate`` until it returns a truthy value or ``timeout`` expires."""
+    schedule = interval if interval is not None else waiters.BackoffSchedule(initial=0.02, maximum=0.2)
+    delays = (schedule if isinstance(schedule, waiters.PollSchedule) else waiters.PollSchedule(schedule)).delays()
+    deadline = time.time() + timeout
+    while True:
+        value = predicate()
+        if value:
+            return value
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        time.sleep(min(next(delays), remaining))
+
+
+def _read_clipboard() -> str:
+    try:
+        return pyperclip.paste() or ""
+    except Exception:
+        return ""
+
+
+def copy_selection(*, timeout: float | None = None) -> str | None:
+    """Copy the current selection and wait until the clipboard really changed.
+
+    A unique sentinel is put in the clipboard first, so an empty selection
+    (clipboard left untouched) is told apart from a slow copy. Returns the
+    copied text, or ``None`` if nothing arrived before ``timeout``.
+    """
+    def _copied() -> str | None:
+        value = _read_clipboard()
+        return value if value != sentinel else None
+
+    # Presse-papiers partagé par les sessions: gardé jusqu'à la copie
+    with session.input_section():
+        sentinel = f"__crm_sentinel_{uuid.uuid4().hex}__"
+        try:
+            pyperclip.copy(sentinel)
+        except Exception:
+            sentinel = _read_clipboard()
+        hotkeys.copy()
+        return wait_until(
+            _copied,
+            timeout=config.timing("clipboard_timeout") if timeout is None else timeout,
+        )
+
+
+def active_window_title() -> str | None:
+    """Title of the foreground window, or ``None`` when the platform can't tell."""
+    getter = getattr(pyautogui, "getActiveWindowTitle", None)
+    if getter is None:
+        return None
+    try:
+        return getter() or ""
+    except Exception:
+        return None
+
+
+def wait_for_window(
+    title_parts: Sequence[str],
+    *,
+    timeout: float | None = None,
+) -> bool | None:
+    """Wait until the foreground window title contains one of ``title_parts``.
+
+    Returns ``True``/``False``, or ``None`` when window titles are not
+    available (callers then fall back to a stabilisation delay).
+    """
+    if active_window_title() is None:
+        return None
+    wanted = [part.lower() for part in title_parts]
+    found = wait_until(
+        lambda: any(part in (active_window_title() or "").lower() for part in wanted),
+        timeout=config.timing("window_timeout") if timeout is None else timeout,
+    )
+    return bool(found)
+
+
+__all__ = [
+    "settle",
+    "wait_until",
+    "copy_selection",
+    "active_window_title",
+    "wait_for_window",
+]
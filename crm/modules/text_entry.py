@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import platform
+import threading
+import time
+from typing import Sequence
+
+import pyautogui
+import pyperclip
+
+from . import calibration
+from . import config
+from . import filesystem
+from . import hotkeys
+from . import session
+from . import sync
+
+# Méthodes de saisie, de la plus rapide à la plus sûre
+PASTE = "paste"      # presse-papiers + Ctrl+V
+CHUNKED = "chunked"  # frappe par blocs (taille et pause apprises)
+TYPED = "typed"      # frappe caractère par caractère (intervalle appris)
+METHODS = (PASTE, CHUNKED, TYPED)
+
+# Vitesses apprises: {connexion: {cible: état}}
+_SPEEDS: dict[str, dict[str, dict]] = {}
+_LOADED = False
+_DIRTY = False
+_LOCK = threading.RLock()
+_CONNECTION_KEY: str | None = None
+
+
+def connection_key() -> str:
+    """Identify the VM connection (``CRM_CONNECTION``, else host + display; + session name when tiled)."""
+    global _CONNECTION_KEY
+    if _CONNECTION_KEY is None:
+        _CONNECTION_KEY = config.INPUT_CONNECTION or f"{platform.node() or 'local'}-{calibration.display_key()}"
+    current = session.current()
+    return f"{_CONNECTION_KEY}-{current.name}" if current.tiled else _CONNECTION_KEY
+
+
+def _ensure_loaded() -> None:
+    global _LOADED
+    if _LOADED:
+        return
+    data = filesystem.load_json_state(config.INPUT_SPEEDS_FILE, default={}) or {}
+    _SPEEDS.update(data)
+    _LOADED = True
+
+
+def _state(target: str) -> dict:
+    _ensure_loaded()
+    state = _SPEEDS.setdefault(connection_key(), {}).setdefault(target, {})
+    state.setdefault("paste_failures", 0)
+    state.setdefault("paste_disabled", False)
+    state.setdefault("chunked_disabled", False)
+    state.setdefault("chunk", config.INPUT_CHUNK_START)
+    state.setdefault("chunk_delay", config.INPUT_CHUNK_DELAY_BOUNDS[0])
+    state.setdefault("interval", config.timing("type_interval"))
+    # None: relecture jamais tentée; False: presse-papiers illisible ici
+    state.setdefault("verify", None)
+    state.setdefault("streak", 0)
+    state.setdefault("sent", 0)
+    state.setdefault("retries", 0)
+    return state
+
+
+def _typeable(text: str) -> bool:
+    # pyautogui.typewrite ignore les caractères hors ASCII imprimable
+    return all(" " <= ch <= "~" for ch in text)
+
+
+def _methods(state: dict, text: str, allowed: Sequence[str]) -> list[str]:
+    """Methods to try for ``text``, learned preference first."""
+    order = [method for method in METHODS if method in allowed]
+    if not _typeable(text):
+        return [method for method in order if method == PASTE]
+    if state["paste_disabled"] and len(order) > 1:
+        order = [method for method in order if method != PASTE]
+    if state["chunked_disabled"] and len(order) > 1:
+        order = [method for method in order if method != CHUNKED]
+    return order
+
+
+def _send(method: str, text: str, state: dict) -> bool:
+    if method == PASTE:
+        pyperclip.copy(text)
+        if not sync.wait_until(lambda: pyperclip.paste() == text, timeout=config.timing("clipboard_timeout")):
+            return False
+        hotkeys.paste()
+    elif method == CHUNKED:
+        size = max(1, int(state["chunk"]))
+        for start in range(0, len(text), size):
+            pyautogui.typewrite(text[start:start + size], interval=0)
+            if state["chunk_delay"] > 0 and start + size < len(text):
+                time.sleep(state["chunk_delay"])
+    else:
+        pyautogui.typewrite(text, interval=state["interval"])
+    sync.settle("key_settle")
+    return True
+
+
+def _readback(state: dict) -> str | None:
+    """Content of the focused field, copied with Ctrl+A/Ctrl+C (caret back at the end)."""
+    hotkeys.select_all()
+    copied = sync.copy_selection()
+    hotkeys.line_end()
+    if copied is None and state["verify"]:
+        # La relecture marche sur cette connexion: rien copié = champ vide
+        return ""
+    return copied
+
+
+def _common_prefix(left: str, right: str) -> int:
+    size = 0
+    for a, b in zip(left, right):
+        if a != b:
+            break
+        size += 1
+    return size
+
+
+def _learn(state: dict, method: str, ok: bool) -> None:
+    """AIMD on the method's speed: slow down on a loss, speed up after a streak."""
+    global _DIRTY
+    low_chunk, high_chunk = config.INPUT_CHUNK_BOUNDS
+    low_delay, high_delay = config.INPUT_CHUNK_DELAY_BOUNDS
+    low_interval, high_interval = config.INPUT_TYPE_INTERVAL_BOUNDS
+    if ok:
+        state["streak"] += 1
+        if method == PASTE:
+            state["paste_failures"] = 0
+        elif state["streak"] >= config.INPUT_SPEEDUP_AFTER:
+            state["streak"] = 0
+            if method == CHUNKED:
+                state["chunk"] = min(high_chunk, int(state["chunk"] * 1.5) + 1)
+                delay = state["chunk_delay"] / 2
+                state["chunk_delay"] = max(low_delay, delay if delay >= 0.001 else 0.0)
+            else:
+                interval = state["interval"] * 0.7
+                state["interval"] = max(low_interval, interval if interval >= 0.002 else 0.0)
+    else:
+        state["streak"] = 0
+        if method == PASTE:
+            state["paste_failures"] += 1
+            if state["paste_failures"] >= config.INPUT_PASTE_FAILURES and not state["paste_disabled"]:
+                state["paste_disabled"] = True
+                print("[INFO] Saisie: collage non fiable sur cette connexion, frappe au clavier")
+        elif method == CHUNKED:
+            if state["chunk"] <= low_chunk and state["chunk_delay"] >= high_delay:
+                state["chunked_disabled"] = True
+            state["chunk"] = max(low_chunk, int(state["chunk"]) // 2)
+            state["chunk_delay"] = min(high_delay, max(state["chunk_delay"] * 2, 0.01))
+        else:
+            state["interval"] = min(high_interval, max(state["interval"] * 2, 0.01))
+    _DIRTY = True
+
+
+def enter(
+    text: str,
+    *,
+    target: str,
+    methods: Sequence[str] = METHODS,
+    verify: bool | None = None,
+) -> bool:
+    """Type ``text`` into the focused field with the fastest reliable method.
+
+    Delivery is checked by reading the field back (Ctrl+A/Ctrl+C); on a
+    mismatch only the wrong tail is erased and the rest is sent again with
+    the next slower method, up to ``config.INPUT_MAX_ATTEMPTS`` times.
+    Speeds are learned per ``target`` and VM connection. Returns ``False``
+    when the field still differs from ``text``.
+    """
+    with session.input_section():
+        return _enter(text, target, methods, config.INPUT_VERIFY if verify is None else verify)
+
+
+def _enter(text: str, target: str, methods: Sequence[str], verify: bool) -> bool:
+    with _LOCK:
+        state = _state(target)
+        order = _methods(state, text, methods)
+    if not order:
+        raise ValueError(f"Aucune methode de saisie pour la cible {target}")
+
+    sent = 0  # caractères déjà confirmés dans le champ
+    for attempt in range(config.INPUT_MAX_ATTEMPTS):
+        method = order[min(attempt, len(order) - 1)]
+        if not _send(method, text[sent:], state):
+            with _LOCK:
+                _learn(state, method, False)
+            continue
+        if not verify or state["verify"] is False:
+            with _LOCK:
+                state["sent"] += 1
+            return True
+        got = _readback(state)
+        with _LOCK:
+            if got is None:
+                if method == order[-1]:
+                    # Rien ne revient même avec la méthode la plus sûre: presse-papiers illisible
+                    state["verify"] = False
+                    print("[INFO] Saisie: relecture impossible sur cette connexion, saisie non verifiee")
+                    state["sent"] += 1
+                    return True
+            else:
+                state["verify"] = True
+        if got is None:
+            # Contenu inconnu: champ vidé puis méthode suivante
+            hotkeys.select_all()
+            pyautogui.press("backspace")
+            with _LOCK:
+                _learn(state, method, False)
+            sent = 0
+            continue
+        with _LOCK:
+            ok = got == text
+            _learn(state, method, ok)
+            state["sent"] += 1
+            if ok:
+                return True
+            state["retries"] += 1
+        sent = _common_prefix(got, text)
+        for _ in range(len(got) - sent):
+            pyautogui.press("backspace")
+    print(f"[WARN] Saisie non confirmee ({target}) apres {config.INPUT_MAX_ATTEMPTS} essai(s): {text[:40]!r}")
+    return False
+
+
+def save() -> None:
+    global _DIRTY
+    with _LOCK:
+        if not _DIRTY:
+            return
+        filesystem.save_json_state(config.INPUT_SPEEDS_FILE, _SPEEDS)
+        _DIRTY = False
+
+
+def print_report() -> None:
+    with _LOCK:
+        _ensure_loaded()
+        base = connection_key()
+        # Connexion courante et ses sessions parallèles ("<connexion>-<session>")
+        entries = []
+        for key, targets in _SPEEDS.items():
+            if key != base and not key.startswith(f"{base}-"):
+                continue
+            suffix = f" ({key[len(base) + 1:]})" if key != base else ""
+            entries.extend((f"{target}{suffix}", dict(state)) for target, state in targets.items())
+    for label, state in entries:
+        if not state.get("sent"):
+            continue
+        order = _methods(state, "", METHODS) or [TYPED]
+        print(
+            f"[INFO] Saisie {label}: methode {order[0]}, bloc {state['chunk']} car., "
+            f"intervalle {state['interval'] * 1000:.0f} ms, {state['retries']}/{state['sent']} reprise(s)"
+        )
+
+
+__all__ = [
+    "PASTE",
+    "CHUNKED",
+    "TYPED",
+    "METHODS",
+    "connection_key",
+    "enter",
+    "save",
+    "print_report",
+]
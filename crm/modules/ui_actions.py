@@ -1,19 +1,30 @@
 from __future__ import annotations
 
 import os
-import time
 from typing import Sequence
 import subprocess
 import platform
 
 import pyautogui
-import pyperclip
 
 from . import config
+from . import hitstats
+from . import session
+from . import sync
+from . import text_entry
 from . import vision
+from . import waiters
 from . import hotkeys
 
 
+def _click(target: tuple[int, int], double_click: bool) -> None:
+    with session.input_section():
+        pyautogui.click(target)
+        if double_click:
+            sync.settle("double_click_gap")
+            pyautogui.click(target)
+
+
 def _click_first_match(
     candidates: Sequence[dict],
     *,
@@ -21,7 +32,8 @@ def _click_first_match(
     fallback: tuple[int, int] | None = None,
     double_click: bool = False,
 ) -> tuple[int, int] | None:
-    for spec in candidates:
+    # Variantes les plus souvent trouvées d'abord (statistiques persistées)
+    for _, spec in hitstats.ordered(label, candidates):
         image_path = spec.get("image")
         if not image_path or not os.path.exists(image_path):
             continue
@@ -39,19 +51,16 @@ def _click_first_match(
         dx, dy = spec.get("offset", (0, 0))
         target = (x + dx, y + dy)
 
+        hitstats.record_hit(label, spec)
         print(f"   {label}: {os.path.basename(image_path)} detectee a {box}, clic sur {target}")
-        pyautogui.click(target)
-        if double_click:
-            time.sleep(0.12)
-            pyautogui.click(target)
+        _click(target, double_click)
         return target
 
     if fallback:
+        # Coordonnées de la configuration: relatives à la tuile de la session
+        fallback = session.current().to_screen(fallback)
         print(f"   {label}: utilisation du fallback {fallback}")
-        pyautogui.click(fallback)
-        if double_click:
-            time.sleep(0.12)
-            pyautogui.click(fallback)
+        _click(fallback, double_click)
         return fallback
 
     return None
@@ -61,7 +70,9 @@ def _click_first_match(
 
 
 def calibrate_search_region() -> None:
-    if config.SEARCH_SCAN_REGION is not None:
+    """Narrow the current session's scan region around the CRM header."""
+    current = session.current()
+    if current.calibrated:
         return
 
     for spec in config.HEADER_TEMPLATES:
@@ -81,30 +92,33 @@ def calibrate_search_region() -> None:
         x, y, w, h = box
         padding = spec.get("padding", (0, 0, 0, 120))
         left_pad, top_pad, right_pad, bottom_pad = padding
-        config.SEARCH_SCAN_REGION = (
+        current.scan_region = (
             max(0, x - left_pad),
             max(0, y - top_pad),
             w + left_pad + right_pad,
             h + top_pad + bottom_pad,
         )
-        print(f"[INFO] Search region calibrated: {config.SEARCH_SCAN_REGION}")
+        print(f"[INFO] Search region calibrated: {current.scan_region}")
         return
 
-    print("[WARN] Header template not detected; scanning full screen")
+    if current.tiled:
+        print(f"[WARN] Header template not detected; scanning the whole tile of {current.name}")
+    else:
+        print("[WARN] Header template not detected; scanning full screen")
 
 
 def clear_search_field() -> None:
-    hotkeys.select_all()
-    time.sleep(0.1)
-    try:
-        hotkeys.copy()
-        time.sleep(0.05)
-        clipboard_content = pyperclip.paste()
-    except Exception as exc:
-        print(f"   Clipboard unavailable ({exc}); clearing anyway")
-        clipboard_content = ''
-
-    pyautogui.press('delete')
+    with session.input_section():
+        hotkeys.select_all()
+        sync.settle("key_settle")
+        try:
+            # Un champ vide ne modifie pas le presse-papiers: attente courte
+            clipboard_content = sync.copy_selection(timeout=config.timing("clipboard_probe")) or ''
+        except Exception as exc:
+            print(f"   Clipboard unavailable ({exc}); clearing anyway")
+            clipboard_content = ''
+
+        pyautogui.press('delete')
 
     if clipboard_content and clipboard_content.strip():
         preview = ' '.join(clipboard_content.split())
@@ -130,14 +144,30 @@ def focus_search_field() -> tuple[int, int]:
         raise RuntimeError(
             "Champ de recherche introuvable - ajoutez un template ou configurez SEARCH_BAR_FALLBACK"
         )
-    time.sleep(0.15)
+    sync.settle("key_settle")
     clear_search_field()
     return target
 
 
+def wait_for_search_ready(timeout: float | None = None) -> bool:
+    """Attend que le champ de recherche soit de nouveau visible (onglet de base)."""
+    specs = [spec for spec in config.SEARCH_FIELD_TEMPLATES if spec.get("image")]
+    images = list(dict.fromkeys(spec["image"] for spec in specs))
+    confidence = min(spec.get("confidence", config.IMAGE_CONFIDENCE) for spec in specs)
+    _, box = waiters.wait_for_any_image_on_screen(
+        images,
+        timeout=config.timing("search_ready_timeout") if timeout is None else timeout,
+        interval=waiters.BackoffSchedule(),
+        confidence=confidence,
+        hit_key="Champ de recherche (attente)",
+    )
+    return box is not None
+
+
 def submit_search() -> None:
-    pyautogui.press('enter')
-    time.sleep(0.2)
+    # L'attente du résultat (watcher) suit immédiatement: pas de pause fixe
+    with session.input_section():
+        pyautogui.press('enter')
 
 
  
@@ -149,17 +179,17 @@ def open_console_and_close_window() -> None:
     Utilise les raccourcis clavier pour ouvrir la console développeur et taper window.close().
     """
     try:
-        print("Ouverture de la console du navigateur...")
-        # Ouvrir la console du navigateur (Chrome) avec un raccourci compatible OS
-        hotkeys.open_chrome_console()
-        time.sleep(0.5)
-        
-        print("Exécution de window.close()...")
-        # Taper window.close() dans la console
-        pyautogui.typewrite('window.close()')
-        time.sleep(0.3)
-        pyautogui.press('enter')
-        time.sleep(0.5)
+        with session.input_section():
+            print("Ouverture de la console du navigateur...")
+            # Ouvrir la console du navigateur (Chrome) avec un raccourci compatible OS
+            hotkeys.open_chrome_console()
+
+            print("Exécution de window.close()...")
+            # Taper window.close() dans la console
+            text_entry.enter("window.close()", target="console")
+            pyautogui.press('enter')
+        # La fermeture est confirmée par le retour du champ de recherche
+        # (attendu avant le numéro suivant)
         
         print("Console ouverte et window.close() exécuté avec succès")
         
@@ -210,6 +240,7 @@ __all__ = [
     "clear_search_field",
     
     "focus_search_field",
+    "wait_for_search_ready",
     "submit_search",
     
     "open_console_and_close_window",
@@ -1,16 +1,55 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import threading
 from typing import Sequence
 
 import cv2
 import numpy as np
 import pyautogui
 
+from . import calibration
 from . import config
+from . import session
 
 _TEMPLATE_CACHE: dict[str, np.ndarray | None] = {}
 
+# Match results keyed by (region, template, confidence, scales), stored with
+# the digest of the frame they were computed on and reused while it is unchanged.
+_MATCH_CACHE: dict[tuple, tuple[bytes, tuple[int, int, int, int] | None]] = {}
+_LAST_FRAME_DIGEST: dict[tuple | None, bytes] = {}
+_MATCH_STATS = {
+    "frames_matched": 0,
+    "frames_skipped": 0,
+    "matches_run": 0,
+    "matches_reused": 0,
+}
+_CACHE_LOCK = threading.Lock()
+
+# Optional replacement for pyautogui.screenshot (headless runs, benchmarks)
+_SCREEN_SOURCE = None
+# Optional multi-process matcher (see vision_pool)
+_POOL = None
+
+
+def set_pool(pool) -> None:
+    """Route template matching through ``pool.scan`` (``None`` = in-process)."""
+    global _POOL
+    _POOL = pool
+
+
+def set_screen_source(source) -> None:
+    """Capture frames from ``source(region)`` instead of the real screen.
+
+    ``source`` returns a PIL image (or an RGB/grayscale array) of the requested
+    region; ``None`` restores ``pyautogui.screenshot``. While a source is set
+    the ``pyautogui.locateOnScreen`` fallback is disabled since it would look
+    at the real screen.
+    """
+    global _SCREEN_SOURCE
+    _SCREEN_SOURCE = source
+
 
 def load_template(image_path: str) -> np.ndarray | None:
     if image_path in _TEMPLATE_CACHE:
@@ -26,25 +65,74 @@ def load_template(image_path: str) -> np.ndarray | None:
     return template
 
 
-def locate_with_opencv(
-    image_path: str,
-    confidence: float,
-    *,
+def capture_gray(
     region: tuple[int, int, int, int] | None = None,
-    scales: Sequence[float] | None = None,
-) -> tuple[int, int, int, int] | None:
-    template = load_template(image_path)
-    if template is None:
+) -> tuple[np.ndarray, tuple[int, int, int, int] | None]:
+    """Capture the screen (or ``region``) as a grayscale frame.
+
+    ``region`` is in the current session's coordinates (see ``session``).
+    Returns the frame and the screen region actually captured, which is
+    needed to translate match coordinates back to screen coordinates.
+    """
+    capture_region = session.current().capture_region(region)
+    if _SCREEN_SOURCE is not None:
+        frame = _SCREEN_SOURCE(capture_region)
+    else:
+        frame = pyautogui.screenshot(region=capture_region)
+    if not isinstance(frame, np.ndarray):
+        frame = np.array(frame.convert("RGB"))
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    return frame, capture_region
+
+
+def frame_digest(screen_gray: np.ndarray) -> bytes:
+    """Return a short digest identifying the content of a frame."""
+    digest = hashlib.blake2b(screen_gray.tobytes(), digest_size=16)
+    digest.update(repr(screen_gray.shape).encode("ascii"))
+    return digest.digest()
+
+
+def register_frame(
+    capture_region: tuple[int, int, int, int] | None,
+    screen_gray: np.ndarray,
+) -> bytes | None:
+    """Compare a frame with the previous one captured on the same region.
+
+    Updates the frames matched/skipped counters and returns the digest to pass
+    to :func:`match_in_frame`, or ``None`` when the frame cache is disabled.
+    """
+    if not config.VISION_FRAME_CACHE:
         return None
+    digest = frame_digest(screen_gray)
+    with _CACHE_LOCK:
+        changed = _LAST_FRAME_DIGEST.get(capture_region) != digest
+        _LAST_FRAME_DIGEST[capture_region] = digest
+        _MATCH_STATS["frames_matched" if changed else "frames_skipped"] += 1
+    return digest
+
 
-    capture_region = region or config.SEARCH_SCAN_REGION
-    screenshot = pyautogui.screenshot(region=capture_region).convert("RGB")
-    screen_gray = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2GRAY)
+def get_match_stats() -> dict[str, int]:
+    with _CACHE_LOCK:
+        return dict(_MATCH_STATS)
 
-    candidate_scales = scales or config.DEFAULT_SCALES
-    best_match: tuple[float, tuple[int, int, int, int]] | None = None
 
-    for scale in candidate_scales:
+def reset_match_stats() -> None:
+    with _CACHE_LOCK:
+        for key in _MATCH_STATS:
+            _MATCH_STATS[key] = 0
+        _MATCH_CACHE.clear()
+        _LAST_FRAME_DIGEST.clear()
+
+
+def _scan_scales(
+    screen_gray: np.ndarray,
+    template: np.ndarray,
+    scales: Sequence[float],
+    origin: tuple[int, int, int, int] | None,
+):
+    """Yield ``(scale, best_score, box)`` for each scale that fits the frame."""
+    for scale in scales:
         if abs(scale - 1.0) < 1e-3:
             templ = template
         else:
@@ -58,19 +146,126 @@ def locate_with_opencv(
         result = cv2.matchTemplate(screen_gray, templ, cv2.TM_CCOEFF_NORMED)
         _, max_val, _, max_loc = cv2.minMaxLoc(result)
 
+        x, y = max_loc
+        if origin:
+            x += origin[0]
+            y += origin[1]
+
+        yield scale, float(max_val), (x, y, templ.shape[1], templ.shape[0])
+
+
+def score_in_frame(
+    screen_gray: np.ndarray,
+    image_path: str,
+    *,
+    origin: tuple[int, int, int, int] | None = None,
+    scales: Sequence[float] | None = None,
+) -> list[tuple[float, float, tuple[int, int, int, int]]]:
+    """Return ``(scale, best_score, box)`` per scale, without any threshold."""
+    template = load_template(image_path)
+    if template is None:
+        return []
+    return list(_scan_scales(screen_gray, template, tuple(scales or config.DEFAULT_SCALES), origin))
+
+
+def _best_match(
+    screen_gray: np.ndarray,
+    image_path: str,
+    template: np.ndarray,
+    scales: Sequence[float],
+    confidence: float,
+    origin: tuple[int, int, int, int] | None,
+) -> tuple[float, tuple[int, int, int, int], float] | None:
+    """Best ``(score, box, scale)`` at or above ``confidence``, else ``None``."""
+    scanned = None
+    pool = _POOL
+    if pool is not None and len(scales) > 1:
+        try:
+            scanned = pool.scan(screen_gray, image_path, scales, origin)
+        except Exception as exc:
+            print(f"[WARN] Worker vision en echec ({exc}); analyse locale")
+    if scanned is None:
+        scanned = _scan_scales(screen_gray, template, scales, origin)
+
+    best_match = None
+    for scale, max_val, box in scanned:
         if max_val < confidence:
             continue
+        if not best_match or max_val > best_match[0]:
+            best_match = (max_val, box, scale)
+    return best_match
 
-        x, y = max_loc
-        if capture_region:
-            x += capture_region[0]
-            y += capture_region[1]
 
-        box = (x, y, templ.shape[1], templ.shape[0])
-        if not best_match or max_val > best_match[0]:
-            best_match = (max_val, box)
+def match_in_frame(
+    screen_gray: np.ndarray,
+    image_path: str,
+    confidence: float,
+    *,
+    origin: tuple[int, int, int, int] | None = None,
+    scales: Sequence[float] | None = None,
+    digest: bytes | None = None,
+) -> tuple[int, int, int, int] | None:
+    """Match a template against an already captured frame.
+
+    ``origin`` is the capture region of the frame; returned boxes are in
+    screen coordinates. When ``digest`` (see :func:`register_frame`) is given,
+    the previous result is reused if the frame content has not changed.
+    """
+    template = load_template(image_path)
+    if template is None:
+        return None
+
+    requested_scales = tuple(scales or config.DEFAULT_SCALES)
+    effective_confidence, candidate_scales = calibration.effective(image_path, confidence, requested_scales)
+    cache_key = (origin, image_path, effective_confidence, candidate_scales)
+    if digest is not None:
+        with _CACHE_LOCK:
+            cached = _MATCH_CACHE.get(cache_key)
+            if cached is not None and cached[0] == digest:
+                _MATCH_STATS["matches_reused"] += 1
+                return cached[1]
 
-    return best_match[1] if best_match else None
+    best_match = _best_match(screen_gray, image_path, template, candidate_scales, effective_confidence, origin)
+    if best_match is None and calibration.missed(image_path):
+        # Profil verrouillé qui ne détecte plus rien: vérification avec toutes les échelles
+        best_match = _best_match(screen_gray, image_path, template, requested_scales, confidence, origin)
+        if best_match is not None:
+            print(
+                f"[INFO] Calibration {os.path.basename(image_path)}: detecte hors profil "
+                f"(echelle {best_match[2]}, score {best_match[0]:.3f}), reapprentissage"
+            )
+            calibration.reset(image_path)
+
+    found = None
+    if best_match:
+        found = best_match[1]
+        calibration.observe(image_path, best_match[2], best_match[0])
+    with _CACHE_LOCK:
+        _MATCH_STATS["matches_run"] += 1
+        if digest is not None:
+            _MATCH_CACHE[cache_key] = (digest, found)
+    return found
+
+
+def locate_with_opencv(
+    image_path: str,
+    confidence: float,
+    *,
+    region: tuple[int, int, int, int] | None = None,
+    scales: Sequence[float] | None = None,
+) -> tuple[int, int, int, int] | None:
+    if load_template(image_path) is None:
+        return None
+
+    screen_gray, capture_region = capture_gray(region)
+    return match_in_frame(
+        screen_gray,
+        image_path,
+        confidence,
+        origin=capture_region,
+        scales=scales,
+        digest=register_frame(capture_region, screen_gray),
+    )
 
 
 def locate_on_screen(
@@ -92,11 +287,13 @@ def locate_on_screen(
     if box:
         return box
 
-    if not os.path.exists(image_path):
+    if _SCREEN_SOURCE is not None or not os.path.exists(image_path):
         return None
 
+    current = session.current()
+    search_region = current.capture_region(region) if region is not None or current.tiled else None
     try:
-        return pyautogui.locateOnScreen(image_path, region=region)
+        return pyautogui.locateOnScreen(image_path, region=search_region)
     except Exception as exc:
         print(f"[WARN] locateOnScreen a echoue pour {image_path}: {exc}")
         return None
@@ -104,6 +301,15 @@ def locate_on_screen(
 
 __all__ = [
     "load_template",
+    "set_screen_source",
+    "set_pool",
+    "capture_gray",
+    "frame_digest",
+    "register_frame",
+    "get_match_stats",
+    "reset_match_stats",
+    "score_in_frame",
+    "match_in_frame",
     "locate_with_opencv",
     "locate_on_screen",
 ]
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from queue import Queue
+from typing import Sequence
+
+import numpy as np
+import pyautogui
+
+from . import config
+from . import vision
+
+# --- côté worker ---
+_WORKER_SHM: shared_memory.SharedMemory | None = None
+_WORKER_SLOT_BYTES = 0
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Les workers partagent le resource tracker du parent (spawn), qui reste
+    # seul responsable de la libération du segment.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_init(shm_name: str, slot_bytes: int) -> None:
+    global _WORKER_SHM, _WORKER_SLOT_BYTES
+    _WORKER_SHM = _attach(shm_name)
+    _WORKER_SLOT_BYTES = slot_bytes
+
+
+def _worker_scan(
+    slot: int,
+    shape: tuple[int, int],
+    image_path: str,
+    scale: float,
+    origin: tuple[int, int, int, int] | None,
+):
+    frame = np.ndarray(shape, dtype=np.uint8, buffer=_WORKER_SHM.buf, offset=slot * _WORKER_SLOT_BYTES)
+    template = vision.load_template(image_path)
+    if template is None:
+        return []
+    return list(vision._scan_scales(frame, template, (scale,), origin))
+
+
+# --- côté processus principal ---
+class VisionPool:
+    """Pool of matching processes fed through a shared-memory frame ring.
+
+    Frames are copied once into a free slot of the ring; workers receive only
+    the slot index, the frame shape and the template/scale to try, and send
+    back ``(scale, score, box)`` tuples. Each scale of a lookup runs on its
+    own core.
+    """
+
+    def __init__(self, workers: int, *, slots: int = 4, slot_bytes: int | None = None) -> None:
+        self.workers = max(1, workers)
+        self.slots = max(1, slots)
+        self.slot_bytes = slot_bytes or self._default_slot_bytes()
+        self._shm: shared_memory.SharedMemory | None = None
+        self._executor: ProcessPoolExecutor | None = None
+        self._free: Queue[int] = Queue()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _default_slot_bytes() -> int:
+        try:
+            width, height = pyautogui.size()
+        except Exception:
+            width, height = 3840, 2160
+        # Retina: les captures macOS sont en pixels physiques (x2 par axe)
+        factor = 4 if sys.platform == "darwin" else 1
+        return int(width * height * factor)
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+            for slot in range(self.slots):
+                self._free.put(slot)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_worker_init,
+                initargs=(self._shm.name, self.slot_bytes),
+            )
+        print(f"[INFO] Vision: {self.workers} worker(s), anneau de {self.slots} image(s)")
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            shm, self._shm = self._shm, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if shm is not None:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._free = Queue()
+
+    def scan(
+        self,
+        screen_gray: np.ndarray,
+        image_path: str,
+        scales: Sequence[float],
+        origin: tuple[int, int, int, int] | None,
+    ) -> list[tuple[float, float, tuple[int, int, int, int]]] | None:
+        """Score a template at each scale in parallel.
+
+        Returns ``None`` when the pool cannot take the frame (stopped, frame
+        larger than a slot) so the caller can match in-process instead.
+        """
+        executor = self._executor
+        frame = np.ascontiguousarray(screen_gray, dtype=np.uint8)
+        if executor is None or self._shm is None or frame.nbytes > self.slot_bytes:
+            return None
+
+        slot = self._free.get()
+        try:
+            offset = slot * self.slot_bytes
+            view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._shm.buf, offset=offset)
+            view[:] = frame
+            futures = [
+                executor.submit(_worker_scan, slot, frame.shape, image_path, scale, origin)
+                for scale in scales
+            ]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+            return results
+        finally:
+            self._free.put(slot)
+
+
+_POOL: VisionPool | None = None
+# Sessions parallèles: un seul pool, démarré par la première qui en a besoin
+_POOL_LOCK = threading.Lock()
+
+
+def start(workers: int | None = None) -> VisionPool | None:
+    """Start the shared pool and route ``vision`` matching through it."""
+    global _POOL
+    workers = config.VISION_WORKERS if workers is None else workers
+    if workers <= 0:
+        return None
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = VisionPool(workers, slots=config.VISION_RING_SLOTS)
+        try:
+            _POOL.start()
+        except Exception as exc:
+            print(f"[WARN] Workers vision indisponibles, analyse dans le processus principal: {exc}")
+            _POOL.stop()
+            _POOL = None
+            return None
+        vision.set_pool(_POOL)
+        return _POOL
+
+
+def shutdown() -> None:
+    global _POOL
+    vision.set_pool(None)
+    if _POOL is not None:
+        _POOL.stop()
+        _POOL = None
+
+
+__all__ = [
+    "VisionPool",
+    "start",
+    "shutdown",
+]
@@ -1,26 +1,146 @@
 from __future__ import annotations
 
 import os
+import threading
 import time
-from typing import Sequence
+from typing import Iterator, Sequence
 
 from . import config
+from . import filesystem
+from . import hitstats
+from . import stats
 from . import vision
 
 
+class PollSchedule:
+    """Fixed polling interval (the historical behaviour of the waiters)."""
+
+    def __init__(self, interval: float = 0.6) -> None:
+        self.interval = interval
+
+    def delays(self) -> Iterator[float]:
+        while True:
+            yield self.interval
+
+
+class BackoffSchedule(PollSchedule):
+    """Poll fast right after an action, then back off geometrically.
+
+    Delays go ``initial, initial*factor, ...`` and are capped at ``maximum``.
+    """
+
+    def __init__(
+        self,
+        initial: float = config.POLL_INITIAL_INTERVAL,
+        factor: float = config.POLL_BACKOFF_FACTOR,
+        maximum: float = config.POLL_MAX_INTERVAL,
+    ) -> None:
+        super().__init__(maximum)
+        self.initial = initial
+        self.factor = factor
+
+    def delays(self) -> Iterator[float]:
+        delay = self.initial
+        while True:
+            yield min(delay, self.interval)
+            delay *= self.factor
+
+
+# Latence de détection (secondes depuis le début de l'attente) par template,
+# persistée entre les exécutions (config.DETECTION_HISTORY_FILE)
+DETECTION_LATENCIES = stats.LatencyRecorder()
+_LOADED = False
+_DIRTY = False
+_LOCK = threading.Lock()
+
+
+def _ensure_loaded() -> None:
+    global _LOADED
+    with _LOCK:
+        if _LOADED:
+            return
+        data = filesystem.load_json_state(config.DETECTION_HISTORY_FILE, default={}) or {}
+        DETECTION_LATENCIES.load(data.get("latencies", {}))
+        _LOADED = True
+
+
+def _as_schedule(interval: float | PollSchedule) -> PollSchedule:
+    if isinstance(interval, PollSchedule):
+        return interval
+    return PollSchedule(float(interval))
+
+
+def _latency_key(image_path: str) -> str:
+    return os.path.basename(image_path)
+
+
+def record_detection_latency(image_path: str, seconds: float) -> None:
+    global _DIRTY
+    _ensure_loaded()
+    DETECTION_LATENCIES.record(_latency_key(image_path), seconds)
+    _DIRTY = True
+
+
+def save_detection_latencies() -> None:
+    global _DIRTY
+    if not _DIRTY:
+        return
+    filesystem.save_json_state(config.DETECTION_HISTORY_FILE, {"latencies": DETECTION_LATENCIES.to_dict()})
+    _DIRTY = False
+
+
+def history_timeout(
+    image_paths: Sequence[str],
+    timeout: float,
+    *,
+    quantile: float = 0.99,
+    margin: float = 1.5,
+    min_samples: int = 10,
+    floor: float = 2.0,
+) -> float:
+    """Shorten ``timeout`` to what past detections of these templates needed.
+
+    The latencies of all ``image_paths`` (variants of one wait) are pooled.
+    Returns ``timeout`` unchanged until they hold ``min_samples`` values;
+    otherwise their quantile times ``margin``, never below ``floor`` nor
+    above ``timeout``.
+    """
+    _ensure_loaded()
+    observed = [
+        seconds
+        for path in image_paths
+        if path
+        for seconds in DETECTION_LATENCIES.samples(_latency_key(path))
+    ]
+    if len(observed) < min_samples:
+        return timeout
+    return min(timeout, max(floor, stats.percentile(observed, quantile) * margin))
+
+
+def _pause(delay: float, deadline: float, stop_event) -> None:
+    delay = max(0.0, min(delay, deadline - time.time()))
+    if stop_event is not None:
+        stop_event.wait(delay)
+    else:
+        time.sleep(delay)
 
 
 def wait_for_image_on_screen(
     image_path: str,
     *,
     timeout: float = 15.0,
-    interval: float = 0.6,
+    interval: float | PollSchedule = 0.6,
     confidence: float = config.IMAGE_CONFIDENCE,
     region: tuple[int, int, int, int] | None = None,
     scales: Sequence[float] | None = None,
     stop_event=None,
+    adaptive_timeout: bool = False,
 ):
-    deadline = time.time() + timeout
+    if adaptive_timeout:
+        timeout = history_timeout([image_path], timeout)
+    start = time.time()
+    deadline = start + timeout
+    delays = _as_schedule(interval).delays()
     while time.time() < deadline:
         if stop_event is not None and stop_event.is_set():
             return None
@@ -31,8 +151,9 @@ def wait_for_image_on_screen(
             scales=scales,
         )
         if box:
+            record_detection_latency(image_path, time.time() - start)
             return box
-        time.sleep(interval)
+        _pause(next(delays), deadline, stop_event)
     return None
 
 
@@ -40,18 +161,32 @@ def wait_for_any_image_on_screen(
     image_paths: Sequence[str],
     *,
     timeout: float = 15.0,
-    interval: float = 0.6,
+    interval: float | PollSchedule = 0.6,
     confidence: float = config.IMAGE_CONFIDENCE,
     region: tuple[int, int, int, int] | None = None,
     scales: Sequence[float] | None = None,
     stop_event=None,
+    adaptive_timeout: bool = False,
+    hit_key: str | None = None,
 ):
+    """Wait for the first of ``image_paths``; returns ``(index, box)``.
+
+    Variants are scanned in order of past hit frequency (``hitstats``) under
+    ``hit_key`` (derived from the file names by default); the returned index
+    is always the position in ``image_paths``.
+    """
     print(f"   Attente de l'image: {image_paths}")
+    if adaptive_timeout:
+        timeout = history_timeout(image_paths, timeout)
+    hit_key = hit_key or hitstats.list_key(image_paths)
+    scan_order = hitstats.ordered(hit_key, image_paths)
     start = time.time()
-    while time.time() - start < timeout:
+    deadline = start + timeout
+    delays = _as_schedule(interval).delays()
+    while time.time() < deadline:
         if stop_event is not None and stop_event.is_set():
             return None, None
-        for idx, path in enumerate(image_paths):
+        for idx, path in scan_order:
             if not path or not os.path.exists(path):
                 continue
             box = vision.locate_on_screen(
@@ -61,12 +196,34 @@ def wait_for_any_image_on_screen(
                 scales=scales,
             )
             if box:
+                record_detection_latency(path, time.time() - start)
+                hitstats.record_hit(hit_key, path)
                 return idx, box
-        time.sleep(interval)
+        _pause(next(delays), deadline, stop_event)
     return None, None
 
 
+def print_detection_latencies() -> None:
+    _ensure_loaded()
+    report = DETECTION_LATENCIES.summary()
+    if not report:
+        return
+    print("[INFO] Latence de detection par template (s):")
+    for key, values in sorted(report.items()):
+        print(
+            f"   {key}: n={values['count']} p50={values['p50']:.2f} "
+            f"p95={values['p95']:.2f} max={values['max']:.2f}"
+        )
+
+
 __all__ = [
+    "PollSchedule",
+    "BackoffSchedule",
+    "DETECTION_LATENCIES",
+    "record_detection_latency",
+    "history_timeout",
+    "save_detection_latencies",
     "wait_for_image_on_screen",
     "wait_for_any_image_on_screen",
+    "print_detection_latencies",
 ]
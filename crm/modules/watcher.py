@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Sequence
+
+from . import config
+from . import hitstats
+from . import session
+from . import vision
+from . import waiters
+
+
+class Subscription:
+    """A "first of these templates" condition registered on the watcher.
+
+    Resolved by the watcher thread with the index of the winning template
+    (in ``image_paths`` order) and its box in screen coordinates.
+    """
+
+    def __init__(
+        self,
+        image_paths: Sequence[str],
+        *,
+        confidence: float,
+        region: tuple[int, int, int, int] | None,
+        scales: Sequence[float] | None,
+        hit_key: str | None = None,
+    ) -> None:
+        self.image_paths = tuple(image_paths)
+        self.hit_key = hit_key or hitstats.list_key(self.image_paths)
+        # Ordre d'évaluation: variantes les plus fréquentes d'abord
+        self.scan_order = hitstats.ordered(self.hit_key, self.image_paths)
+        self.confidence = confidence
+        self.region = region
+        self.scales = tuple(scales) if scales else None
+        self.index: int | None = None
+        self.image_path: str | None = None
+        self.box: tuple[int, int, int, int] | None = None
+        self.created = time.time()
+        self.resolved: float | None = None
+        self.scans = 0
+        self._event = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def matched(self) -> bool:
+        return self.box is not None
+
+    @property
+    def event(self) -> threading.Event:
+        """Set once matched or cancelled (usable as another wait's ``stop_event``)."""
+        return self._event
+
+    def _resolve(self, index: int, box: tuple[int, int, int, int]) -> None:
+        if self._event.is_set():
+            return
+        self.index = index
+        self.image_path = self.image_paths[index]
+        self.box = box
+        self.resolved = time.time()
+        self._event.set()
+        waiters.record_detection_latency(self.image_path, self.resolved - self.created)
+        hitstats.record_hit(self.hit_key, self.image_path)
+
+    def cancel(self) -> None:
+        """Stop evaluating this condition; pending waits return no match."""
+        self._event.set()
+
+    def wait(
+        self,
+        timeout: float | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> tuple[int | None, tuple[int, int, int, int] | None]:
+        """Block until the condition matches, times out or ``stop_event`` is set.
+
+        Returns ``(index, box)`` like ``waiters.wait_for_any_image_on_screen``,
+        or ``(None, None)`` when nothing matched.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while not self._event.is_set():
+            if stop_event is not None and stop_event.is_set():
+                break
+            step = 0.05 if stop_event is not None else None
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                step = remaining if step is None else min(step, remaining)
+            self._event.wait(step)
+        if self.box is None:
+            return None, None
+        return self.index, self.box
+
+
+class VisionWatcher:
+    """Single long-lived thread evaluating every subscription on each frame.
+
+    One screenshot is taken per distinct region and per tick, whatever the
+    number of registered conditions, and a template shared by several
+    conditions is matched only once per frame.
+    """
+
+    def __init__(self, *, interval: float = 0.25) -> None:
+        self.interval = interval
+        self._subscriptions: list[Subscription] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="vision-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        self._thread = None
+        with self._lock:
+            pending, self._subscriptions = self._subscriptions, []
+        for sub in pending:
+            sub.cancel()
+
+    def watch_first(
+        self,
+        image_paths: Sequence[str],
+        *,
+        confidence: float = config.IMAGE_CONFIDENCE,
+        region: tuple[int, int, int, int] | None = None,
+        scales: Sequence[float] | None = None,
+        hit_key: str | None = None,
+    ) -> Subscription:
+        """Register a "first of these templates" condition and return it.
+
+        ``region`` is in the calling thread's session coordinates; it is
+        resolved to a screen region here, the scans run on the watcher thread.
+        """
+        region = session.current().capture_region(region)
+        sub = Subscription(image_paths, confidence=confidence, region=region, scales=scales, hit_key=hit_key)
+        with self._lock:
+            self._subscriptions.append(sub)
+        self.start()
+        self._wakeup.set()
+        return sub
+
+    def wait_first(
+        self,
+        image_paths: Sequence[str],
+        *,
+        timeout: float = 15.0,
+        confidence: float = config.IMAGE_CONFIDENCE,
+        region: tuple[int, int, int, int] | None = None,
+        scales: Sequence[float] | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> tuple[int | None, tuple[int, int, int, int] | None]:
+        sub = self.watch_first(image_paths, confidence=confidence, region=region, scales=scales)
+        try:
+            return sub.wait(timeout, stop_event)
+        finally:
+            sub.cancel()
+
+    def _active(self) -> list[Subscription]:
+        with self._lock:
+            self._subscriptions = [sub for sub in self._subscriptions if not sub.done]
+            return list(self._subscriptions)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            subs = self._active()
+            if not subs:
+                self._wakeup.wait()
+                continue
+            try:
+                self._scan(subs)
+            except Exception as exc:
+                print(f"[WARN] Watcher: capture/analyse echouee: {exc}")
+            self._stop.wait(self._next_delay(subs))
+
+    def _next_delay(self, subs: Sequence[Subscription]) -> float:
+        # Cadence rapide juste après une nouvelle souscription (souvent juste
+        # après un clic), puis retour progressif à l'intervalle nominal.
+        scans = min(sub.scans for sub in subs)
+        return min(self.interval, config.POLL_INITIAL_INTERVAL * config.POLL_BACKOFF_FACTOR ** scans)
+
+    def _scan(self, subs: Sequence[Subscription]) -> None:
+        frames: dict[tuple | None, tuple] = {}
+        matches: dict[tuple, tuple[int, int, int, int] | None] = {}
+        for sub in subs:
+            if sub.done:
+                continue
+            frame_key = sub.region or config.SEARCH_SCAN_REGION
+            if frame_key not in frames:
+                screen_gray, origin = vision.capture_gray(sub.region)
+                frames[frame_key] = (screen_gray, origin, vision.register_frame(origin, screen_gray))
+            screen_gray, origin, digest = frames[frame_key]
+            sub.scans += 1
+
+            for idx, path in sub.scan_order:
+                if sub.done:
+                    break
+                if not path or not os.path.exists(path):
+                    continue
+                match_key = (frame_key, path, sub.confidence, sub.scales)
+                if match_key not in matches:
+                    matches[match_key] = vision.match_in_frame(
+                        screen_gray,
+                        path,
+                        sub.confidence,
+                        origin=origin,
+                        scales=sub.scales,
+                        digest=digest,
+                    )
+                box = matches[match_key]
+                if box:
+                    sub._resolve(idx, box)
+                    break
+
+
+_WATCHER: VisionWatcher | None = None
+_WATCHER_LOCK = threading.Lock()
+
+
+def get_watcher() -> VisionWatcher:
+    """Return the shared watcher (one for all sessions), starting it if needed."""
+    global _WATCHER
+    with _WATCHER_LOCK:
+        if _WATCHER is None:
+            _WATCHER = VisionWatcher()
+        watcher = _WATCHER
+    watcher.start()
+    return watcher
+
+
+def shutdown() -> None:
+    global _WATCHER
+    if _WATCHER is not None:
+        _WATCHER.stop()
+        _WATCHER = None
+
+
+__all__ = [
+    "Subscription",
+    "VisionWatcher",
+    "get_watcher",
+    "shutdown",
+]
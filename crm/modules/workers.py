@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Iterable, List, Mapping
+
+import pyautogui
+
+from . import cache
+from . import config
+from . import filesystem
+from . import journal as run_journal
+from . import scheduler as phone_scheduler
+from . import session
+from . import ui_actions
+from . import workflow
+
+
+def tile(count: int, screen: tuple[int, int] | None = None) -> List[session.Session]:
+    """``count`` sessions on a grid covering the screen (side by side, then 2 per row)."""
+    width, height = screen or pyautogui.size()
+    columns = 1 if count <= 1 else 2
+    rows = (count + columns - 1) // columns
+    tile_width, tile_height = width // columns, height // rows
+    return [
+        session.Session(
+            f"w{index + 1}",
+            ((index % columns) * tile_width, (index // columns) * tile_height, tile_width, tile_height),
+        )
+        for index in range(count)
+    ]
+
+
+def _from_layout(entries: list) -> List[session.Session]:
+    sessions = []
+    for index, entry in enumerate(entries):
+        region = entry.get("region") if isinstance(entry, dict) else None
+        if not region or len(region) != 4:
+            raise ValueError(f"Session {index + 1} sans region [x, y, w, h] dans {config.WORKER_LAYOUT_FILE}")
+        sessions.append(
+            session.Session(
+                str(entry.get("name") or f"w{index + 1}"),
+                tuple(int(value) for value in region),
+                title=entry.get("title"),
+                focus_point=entry.get("focus"),
+                cdp_port=entry.get("cdp_port"),
+            )
+        )
+    return sessions
+
+
+def layout(count: int | None = None) -> List[session.Session]:
+    """Sessions of the run: ``config.WORKER_LAYOUT_FILE`` if present, else ``count`` screen tiles.
+
+    ``count`` defaults to ``config.WORKERS``; one session is the default
+    (untiled) session, as without workers.
+    """
+    entries = filesystem.load_json_state(config.WORKER_LAYOUT_FILE, default=None)
+    if entries:
+        sessions = _from_layout(list(entries))
+    else:
+        count = config.WORKERS if count is None else count
+        if count <= 1:
+            return [session.DEFAULT]
+        sessions = tile(min(count, config.WORKERS_MAX))
+    if len(sessions) > config.WORKERS_MAX:
+        print(f"[WARN] {len(sessions)} sessions demandees, limitees a {config.WORKERS_MAX}")
+        sessions = sessions[:config.WORKERS_MAX]
+    names = [item.name for item in sessions]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Noms de session en double: {', '.join(names)}")
+    return sessions
+
+
+def run(
+    phone_numbers: Iterable[str],
+    company_info_map: Mapping = None,
+    *,
+    sessions: List[session.Session],
+    journal: run_journal.Journal,
+    refresh: bool | None = None,
+    resume: bool = False,
+) -> int:
+    """Search ``phone_numbers`` with one thread per session; returns the rows journaled.
+
+    Sessions take their phones from one shared ``scheduler.Scheduler`` and
+    run ``workflow.process_phone_numbers`` in their own tile, each with its
+    own part of ``journal`` (:meth:`journal.Journal.worker`). Keyboard,
+    mouse and clipboard go to one session at a time
+    (``session.input_section``); captures and result waits overlap.
+    """
+    store = cache.open_cache()
+    schedule = phone_scheduler.Scheduler(
+        phone_numbers,
+        company_info_map,
+        history=store.last_checked if store is not None else None,
+    )
+    written: Dict[str, int] = {}
+    failures: Dict[str, str] = {}
+
+    def work(current: session.Session) -> None:
+        part = journal.worker(current.name).open(resume=True, input_file=str(journal.path))
+        try:
+            with session.use(current):
+                ui_actions.calibrate_search_region()
+                written[current.name] = workflow.process_phone_numbers(
+                    phone_numbers,
+                    company_info_map,
+                    refresh=refresh,
+                    journal=part,
+                    resume=resume,
+                    schedule=schedule,
+                    shared=True,
+                )
+        except Exception as exc:
+            failures[current.name] = str(exc)
+            print(f"[WARN] Session {current.name} arretee: {exc}")
+        finally:
+            part.close()
+
+    print(f"[INFO] {len(sessions)} session(s) en parallele: " + ", ".join(f"{item.name} {item.region}" for item in sessions))
+    start = time.monotonic()
+    threads = [
+        threading.Thread(target=work, args=(current,), name=f"crm-{current.name}", daemon=True)
+        for current in sessions
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        elapsed = time.monotonic() - start
+        schedule.print_report()
+        if store is not None:
+            store.close()
+        for current in sessions:
+            status = f"arretee ({failures[current.name]})" if current.name in failures else "terminee"
+            print(f"[INFO] Session {current.name}: {written.get(current.name, 0)} ligne(s), {status}")
+        print(f"[INFO] {len(sessions)} session(s) en {elapsed / 60:.1f} min")
+        workflow.close_services()
+    return sum(written.values())
+
+
+__all__ = [
+    "tile",
+    "layout",
+    "run",
+]
@@ -1,59 +1,35 @@
 from __future__ import annotations
 
-import threading
 import time
-import signal
-import sys
-from typing import Dict, List, Sequence
+from typing import Dict, Iterable, Iterator, List, Mapping, Sized
 
 import pyautogui
  
 
+from . import batch as batch_engine
+from . import cache
+from . import calibration
+from . import channel as result_channel
 from . import config
+from . import hitstats
+from . import journal as run_journal
+from . import lookup as crm_lookup
+from . import outcomes
+from . import pipeline
+from . import scheduler as phone_scheduler
+from . import session
 from . import snippets
+from . import sync
+from . import text_entry
 from . import ui_actions
+from . import vision
+from . import vision_pool
 from . import waiters
+from . import watcher as screen_watcher
 import pyperclip
-import json
-import pandas as pd
 import datetime
-import os
-from crm_search import _cleanup_callback
+from pathlib import Path
 
-# Variable globale pour stocker les résultats au fur et à mesure
-_global_results: List[Dict] = []
-_save_on_interrupt = True
-
-def _save_partial_results():
-    """Sauvegarde des résultats partiels en cas d'interruption"""
-
-    global _global_results
-    if _global_results and _save_on_interrupt:
-        try:
-            df = pd.DataFrame(_global_results)
-            date_str = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            base_name = config.OUTPUT_FILE.replace('.xlsx', f'_partial_{date_str}.xlsx')
-            partial_file = base_name
-            counter = 2
-            while os.path.exists(partial_file):
-                partial_file = base_name.replace('.xlsx', f'_{counter}.xlsx')
-                counter += 1
-            df.to_excel(partial_file, index=False)
-            print(f"\n[SAUVEGARDE PARTIELLE] Résultats sauvegardés dans: {partial_file}")
-            print(f"[SAUVEGARDE PARTIELLE] {len(_global_results)} résultats sauvegardés")
-        except Exception as e:
-            print(f"[ERREUR SAUVEGARDE PARTIELLE] {e}")
-
-def _signal_handler(signum, frame):
-    """Gestionnaire de signal pour les interruptions"""
-    print(f"\n[INTERRUPTION DÉTECTÉE] Signal {signum} reçu")
-    _save_partial_results()
-    # Appeler le callback de nettoyage du module parent (clavier, etc.)
-    if _cleanup_callback:
-        _cleanup_callback()
-
-    
-    sys.exit(0)
 
 def _clean_text(value: object) -> str:
     text = "" if value is None else str(value)
@@ -92,261 +68,507 @@ def _normalize_contact(raw: Dict) -> Dict[str, str]:
     }
 
 
-def _run_interlocutor_search(stop_event: threading.Event, flag: Dict[str, bool]) -> None:
-    try:
-        idx, box = waiters.wait_for_any_image_on_screen(
-            config.INTERLOCUTOR_BUTTON_IMAGES,
-            timeout=20.0,
-            interval=0.5,
-            confidence=0.8,
-            stop_event=stop_event,
-        )
-        if box:
-            x, y, w, h = box
-            center_x = x + w // 2
-            center_y = y + h // 2
-            variant_num = (idx + 1) if idx is not None else "?"
-            print(f"   [OK] Bouton 'Interlocuteur' trouve (variante {variant_num}) a: {box}")
-            pyautogui.click(center_x, center_y)
-            time.sleep(0.8)
-            print("   [OK] Bouton 'Interlocuteur' clique - Resultat trouve")
-            flag["found"] = True
-            stop_event.set()
-            return
-    except Exception as exc:
-        print(f"   Erreur recherche 'Interlocuteur': {exc}")
+def _click_interlocutor(idx: int | None, box) -> None:
+    x, y, w, h = box
+    center_x = x + w // 2
+    center_y = y + h // 2
+    variant_num = (idx + 1) if idx is not None else "?"
+    print(f"   [OK] Bouton 'Interlocuteur' trouve (variante {variant_num}) a: {box}")
+    with session.input_section():
+        pyautogui.click(center_x, center_y)
+    snippets.page_changed()
+    sync.settle("after_click")
+    print("   [OK] Bouton 'Interlocuteur' clique - Resultat trouve")
 
-def _run_pre_fetch_search(stop_event: threading.Event, flag: Dict[str, bool]) -> None:
+
+def _run_pre_fetch() -> list:
     """
-    Déclenche le clic sur le premier résultat via le snippet DOM, mais seulement
-    après une période de grâce pendant laquelle on laisse une chance au bouton
-    'Interlocuteur' d'apparaître naturellement. Ne s'appuie pas sur des images
-    (peu fiables dans cet état transitoire) et ne considère pas le pré-fetch
-    comme un état terminal (ne stoppe pas les autres threads).
+    Déclenche le clic sur le premier résultat via le snippet DOM. Appelé
+    uniquement après la période de grâce pendant laquelle on laisse une
+    chance au bouton 'Interlocuteur' d'apparaître naturellement. Ne s'appuie
+    pas sur des images (peu fiables dans cet état transitoire).
     """
     try:
-        start = time.time()
-        grace_seconds = 13.0  # délai adaptable sans dépendre d'un pattern visuel fragile
-        # Attente coopérative: sort si un autre thread a trouvé/terminé (stop_event)
-        while not stop_event.is_set() and (time.time() - start) < grace_seconds:
-            time.sleep(0.1)
-
-        if not stop_event.is_set():
-            print("   [..] Pré-fetch: déclenchement du clic 1er résultat (DOM)")
-            snippets.run_dom_get_first_interlocuteurs_snippet()
-            # Le snippet affiche un prompt avec le JSON des résultats.
-            # Copie réalisée côté snippets._execute_snippet via Ctrl+A/C, on récupère ici.
-            try:
+        print("   [..] Pré-fetch: déclenchement du clic 1er résultat (DOM)")
+        raw = snippets.run_dom_get_first_interlocuteurs_snippet()
+        # Le snippet affiche un prompt avec le JSON des résultats: renvoyé
+        # par le pont DevTools ou copié (Ctrl+A/C) par la console GUI.
+        try:
+            if raw is None:
                 raw = pyperclip.paste()
-                data = json.loads(raw) if raw else []
-            except Exception:
-                data = []
-            flag["data"] = data
-            flag["found"] = True
-            # Si le pré-fetch a réellement retourné des données, on considère
-            # cela comme un état terminal et on stoppe les autres threads.
-            if data:
-                stop_event.set()
-            time.sleep(0.5)
+            data = snippets.decode_result(raw, "pre-fetch")
+        except Exception:
+            data = []
+        return data
     except Exception as exc:
         print(f"   Erreur recherche 'Pre-Fetch': {exc}")
+        return []
 
-def _run_no_result_search(stop_event: threading.Event, flag: Dict[str, bool]) -> None:
+
+def _wait_for_search_outcome() -> tuple[bool, bool, list]:
+    """Attend l'issue de la recherche via le watcher partagé.
+
+    Une seule souscription "premier de" couvre les variantes du bouton
+    'Interlocuteur' et le message '0 resultat'; le pré-fetch DOM n'est
+    déclenché que si rien n'est apparu pendant la période de grâce.
+    La grâce et le timeout global sont dérivés de l'historique des
+    latences (``outcomes``) et chaque issue y est enregistrée, y compris
+    un bouton ou un '0 resultat' apparu pendant le pré-fetch (sinon
+    seules les latences inférieures à la grâce seraient connues). Une
+    anomalie à l'écran (``lookup.Guard``) interrompt l'attente au lieu
+    d'en consommer tout le délai: ``lookup.Anomaly`` est levée.
+
+    Retourne ``(interlocutor_found, no_result_found, pre_fetch_data)``.
+    """
+    interlocutor_images = tuple(config.INTERLOCUTOR_BUTTON_IMAGES)
+    no_result_index = len(interlocutor_images)
+    delays = outcomes.derive()
+    start_time = time.time()
+
+    outcome = screen_watcher.get_watcher().watch_first(
+        (*interlocutor_images, config.NO_RESULT_IMAGE),
+        confidence=config.OUTCOME_CONFIDENCE,
+    )
+    guard = crm_lookup.Guard()
+    pre_fetch_data: list = []
     try:
-        box = waiters.wait_for_image_on_screen(
-            config.NO_RESULT_IMAGE,
-            timeout=20.0,
-            interval=0.5,
-            confidence=0.8,
-            stop_event=stop_event,
-        )
-        if box:
-            print(f"   [X] Message '0 resultat' detecte a: {box}")
-            print("   [X] Aucun resultat trouve")
-            flag["found"] = True
-            stop_event.set()
-            return
-    except Exception as exc:
-        print(f"   Erreur recherche message '0 resultat': {exc}")
+        idx, box = outcome.wait(timeout=delays["pre_fetch_grace"], stop_event=guard.event)
+        if box is None:
+            guard.check()
+            # Le prompt du pré-fetch (copie manuelle) n'est pas une anomalie
+            guard.cancel()
+            pre_fetch_start = time.time()
+            pre_fetch_data = _run_pre_fetch()
+            if pre_fetch_data:
+                outcomes.record(outcomes.PRE_FETCH, time.time() - pre_fetch_start)
+                if outcome.matched:
+                    # L'issue visuelle est arrivée après la grâce: latence réelle
+                    visual = outcomes.NO_RESULT if outcome.index == no_result_index else outcomes.INTERLOCUTOR
+                    outcomes.record(visual, outcome.resolved - start_time)
+                print("   ✅ [OK] Pré-fetch: résultats du snippet confirmés, on continue")
+                sync.settle("after_click")
+                return False, False, pre_fetch_data
+            print("   [...] Pré-fetch déclenché mais aucun résultat JSON confirmé…")
+            remaining = max(0.0, delays["result_timeout"] - (time.time() - start_time))
+            guard = crm_lookup.Guard()
+            idx, box = outcome.wait(timeout=remaining, stop_event=guard.event)
+            if box is None:
+                guard.check()
+    finally:
+        outcome.cancel()
+        guard.cancel()
+
+    if box is None:
+        print(f"   [WARN] Aucune issue detectee en {time.time() - start_time:.1f}s")
+        outcomes.record_timeout()
+        return False, False, pre_fetch_data
+    elapsed = outcome.resolved - start_time
+    if idx == no_result_index:
+        outcomes.record(outcomes.NO_RESULT, elapsed)
+        print(f"   [X] Message '0 resultat' detecte a: {box}")
+        print("   [X] Aucun resultat - Message '0 resultat' detecte")
+        return False, True, pre_fetch_data
+
+    outcomes.record(outcomes.INTERLOCUTOR, elapsed)
+    _click_interlocutor(idx, box)
+    print("   ✅ [OK] Resultat trouve via bouton 'Interlocuteur'")
+    return True, False, pre_fetch_data
+
+
+def _contact_rows(phone: str, company_info: Dict, infos: list, has_result: bool) -> List[Dict]:
+    """Result rows of a lookup: one per contact, else a single NOT_FOUND/NO_CONTACT_FOUND row."""
+    if not infos:
+        status = "NOT_FOUND" if not has_result else "NO_CONTACT_FOUND"
+        print(f"   Aucun contact pertinent pour {phone}")
+        # On fixe explicitement toutes les colonnes attendues, même si vides
+        return [{
+            "phone_searched": phone,
+            "company": company_info.get('company', ''),
+            "siret": company_info.get('siret', ''),
+            "name": "",
+            "mobile": "",
+            "fix": "",
+            "email": "",
+            "fonction": "",
+            "status": status,
+        }]
+    print(f"   {len(infos)} contact(s) Direction/Dir. Generale pour {phone}")
+    print(f"   Infos detaillees: {infos}")
+    rows: List[Dict] = []
+    for info in infos:
+        normalized = _normalize_contact(info if isinstance(info, dict) else {})
+        rows.append({
+            "phone_searched": phone,
+            "company": company_info.get('company', ''),
+            "siret": company_info.get('siret', ''),
+            "name": normalized.get("name", ""),
+            "mobile": normalized.get("mobile", ""),
+            "fix": normalized.get("fix", ""),
+            "email": normalized.get("email", ""),
+            "fonction": normalized.get("fonction", ""),
+            "category": info.get("category", ""),
+            "status": "FOUND",
+        })
+    return rows
+
 
+def _error_row(phone: str, company_info: Dict, exc: object) -> Dict:
+    return {
+        "phone_searched": phone,
+        "company": company_info.get('company', ''),
+        "siret": company_info.get('siret', ''),
+        "name": "",
+        "mobile": "",
+        "fix": "",
+        "email": "",
+        "fonction": "",
+        "status": f"Erreur: {exc}",
+    }
 
-def _process_single_phone(phone: str, is_last: bool, company_info_map: Dict = None) -> List[Dict]:
-    results: List[Dict] = []
-    
+
+def _decode_interlocutors(text: str | None) -> list | None:
+    """Contacts of the extraction's JSON; ``None`` when it is missing or unreadable."""
+    # Sinon, récupérer le contenu du presse-papiers (clipboard)
+    if text is None:
+        text = pyperclip.paste()
+    if not (text or "").strip():
+        print("   Erreur: resultat de l'extraction vide")
+        return None
+    try:
+        return snippets.decode_result(text, "interlocuteurs")
+    except Exception as e:
+        print(f"   Erreur lors de la lecture du presse-papiers: {e}")
+        return None
+
+
+def _extraction_rows(extraction: pipeline.Extraction, text: str | None) -> List[Dict]:
+    """Result rows of an extraction finished in the background (pipeline mode)."""
+    phone = extraction.phone
+    if text is None:
+        print(f"   [WARN] Extraction en arriere-plan sans resultat pour {phone}")
+        return [_error_row(phone, extraction.company_info, "extraction en arriere-plan sans resultat")]
+    print(f"\nResultat de l'extraction en arriere-plan: {phone}")
+    infos = _decode_interlocutors(text)
+    if infos is None:
+        # Erreur (TTL 0): jamais reprise du cache comme une fiche sans contact
+        return [_error_row(phone, extraction.company_info, "resultat de l'extraction illisible")]
+    return _contact_rows(phone, extraction.company_info, infos, True)
+
+
+def _lookup_steps(
+    machine: crm_lookup.Lookup,
+    phone: str,
+    company_info: Dict,
+    is_last: bool,
+    pipe: pipeline.Pipeline | None,
+) -> List[Dict] | None:
+    """One attempt at ``phone``, from the search field back to it (see ``lookup``)."""
+    started = time.time()
+    machine.ensure_ready()
+    # Clic, saisie et validation d'un seul tenant (sessions parallèles)
+    with session.input_section():
+        try:
+            ui_actions.focus_search_field()
+        except RuntimeError as exc:
+            raise crm_lookup.StateError(crm_lookup.READY, str(exc)) from exc
+        if not text_entry.enter(str(phone), target="search"):
+            raise crm_lookup.StateError(crm_lookup.READY, "saisie du numero non confirmee")
+        ui_actions.submit_search()
+    snippets.page_changed()
+    machine.advance(crm_lookup.TYPED)
+
+    print("   Surveillance des resultats...")
+    interlocutor_found, no_result_found, pre_fetch_data = _wait_for_search_outcome()
+    if interlocutor_found:
+        machine.advance(crm_lookup.RESULTS)
+    elif pre_fetch_data:
+        # Succès aussi si le pré-fetch a retourné des résultats JSON
+        machine.advance(crm_lookup.PREFETCH)
+    elif no_result_found:
+        machine.advance(crm_lookup.NO_RESULT)
+    else:
+        raise crm_lookup.StateError(crm_lookup.TYPED, "aucune issue de recherche detectee")
+
+    if machine.state == crm_lookup.NO_RESULT:
+        rows = _contact_rows(phone, company_info, [], False)
+        ui_actions.open_console_and_close_window()
+    else:
+        # Si on n'a pas cliqué le bouton, le pré-fetch a déjà chargé la fiche.
+        # On ouvre directement l'onglet Interlocuteur via snippet JS (sans dépendre d'images).
+        print("   Ouverture de l'onglet Interlocuteur via snippet JS...")
+        snippets.open_interlocuteur_tab()
+        machine.advance(crm_lookup.INTERLOCUTOR)
+        if pipe is not None and pipe.launch(phone, company_info, time.time() - started, wait_ready=not is_last):
+            machine.advance(crm_lookup.CLOSED)
+            return None
+        # Plus de pause fixe: le snippet DOM attend l'affichage de la page Interlocuteur
+        print("   Execution du snippet DOM Interlocuteur...")
+        infos = _decode_interlocutors(snippets.run_dom_interlocuteurs_snippet())
+        if infos is None:
+            # Erreur (TTL 0): jamais reprise du cache comme une fiche sans contact
+            rows = [_error_row(phone, company_info, "resultat de l'extraction illisible")]
+        else:
+            machine.advance(crm_lookup.EXTRACTED)
+            rows = _contact_rows(phone, company_info, infos, True)
+
+    if not is_last:
+        print("Attente du champ de recherche... (vous pouvez reprendre le controle si necessaire)")
+        if not machine.close():
+            print("   [WARN] Champ de recherche non detecte, on poursuit")
+    return rows
+
+
+def _process_single_phone(
+    phone: str,
+    is_last: bool,
+    company_info_map: Dict = None,
+    pipe: pipeline.Pipeline | None = None,
+    supervisor: crm_lookup.Supervisor | None = None,
+) -> List[Dict] | None:
+    """Search ``phone`` in the CRM and extract its interlocutors.
+
+    The lookup runs as a state machine (``lookup.Lookup``): when a step
+    fails, the anomaly on screen (dialog, modal, stray tab) or the failed
+    state is recovered and the lookup restarts from the search field, up
+    to ``config.LOOKUP_MAX_RECOVERIES`` times; then an error row is
+    returned. ``lookup.LookupAborted`` (expired CRM session,
+    ``config.LOOKUP_MAX_FAILURES`` failures in a row) is raised to stop the
+    run. With ``pipe`` the extraction is left running in its tab and
+    ``None`` is returned: its rows come back from
+    :meth:`pipeline.Pipeline.collect`.
+    """
     # Récupérer les infos entreprise depuis le mapping (nom société + SIRET)
     company_info = {}
     if company_info_map and phone in company_info_map:
         company_info = company_info_map[phone]
 
-    try:
+    supervisor = supervisor or crm_lookup.Supervisor()
+    machine = supervisor.start(phone)
+    while True:
         try:
-            ui_actions.focus_search_field()
-        except RuntimeError as exc:
-            print(f"[X] ERREUR CRITIQUE: {exc}")
-            print("[X] Le script s'arrete car le champ de recherche est introuvable")
-            return []
+            rows = _lookup_steps(machine, phone, company_info, is_last, pipe)
+        except Exception as exc:
+            if machine.recover(exc):
+                continue
+            if isinstance(exc, crm_lookup.LookupAborted):
+                raise
+            print(f"   Erreur pour {phone}: {exc}")
+            supervisor.finish(machine, ok=False)
+            return [_error_row(phone, company_info, exc)]
+        supervisor.finish(machine, ok=True)
+        return rows
+
+
+def _cached_rows(rows: List[Dict], checked_at: float, company_info: Dict) -> List[Dict]:
+    """Rows of a cached lookup, re-stamped with the current company info."""
+    stamp = datetime.datetime.fromtimestamp(checked_at).isoformat(timespec="seconds")
+    merged = []
+    for row in rows:
+        row = dict(row)
+        if company_info:
+            row["company"] = company_info.get("company", row.get("company", ""))
+            row["siret"] = company_info.get("siret", row.get("siret", ""))
+        row["checked_at"] = stamp
+        merged.append(row)
+    return merged
+
+
+def _skipped_row(phone: str, company_info: Dict, reason: str) -> Dict:
+    return {
+        "phone_searched": phone,
+        "company": company_info.get("company", ""),
+        "siret": company_info.get("siret", ""),
+        "status": "SKIPPED",
+        "skip_reason": reason,
+        "checked_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
 
-        pyautogui.typewrite(str(phone), interval=0.05)
-        time.sleep(0.5)
-        ui_actions.submit_search()
 
-        print("   Lancement de la recherche parallele...")
+def _batch_rows(phone: str, record: Dict, company_info: Dict) -> List[Dict]:
+    """Result rows of a batch-mode record (same columns as a GUI lookup)."""
+    status = record.get("status")
+    print(f"   Mode lot: {status} en {record.get('ms', 0)} ms")
+    return _contact_rows(phone, company_info, list(record.get("contacts") or []), status != "NOT_FOUND")
 
-        interlocutor_found = {"found": False}
-        no_result_found = {"found": False}
-        pre_fetch_found = {"found": False}
-        stop_event = threading.Event()
 
-        thread_interlocutor = threading.Thread(
-            target=_run_interlocutor_search,
-            args=(stop_event, interlocutor_found),
-            daemon=True,
-        )
-        thread_no_result = threading.Thread(
-            target=_run_no_result_search,
-            args=(stop_event, no_result_found),
-            daemon=True,
-        )
-        thread_pre_fetch = threading.Thread(
-            target=_run_pre_fetch_search,
-            args=(stop_event, pre_fetch_found),
-            daemon=True,
+def _with_last_flag(items: Iterable[str]) -> Iterator[tuple[str, bool]]:
+    """Yield ``(item, is_last)``; works on streams of unknown length."""
+    iterator = iter(items)
+    try:
+        current = next(iterator)
+    except StopIteration:
+        return
+    for following in iterator:
+        yield current, False
+        current = following
+    yield current, True
+
+
+def process_phone_numbers(
+    phone_numbers: Iterable[str],
+    company_info_map: Mapping = None,
+    *,
+    refresh: bool | None = None,
+    journal: run_journal.Journal | None = None,
+    resume: bool = False,
+    schedule: phone_scheduler.Scheduler | None = None,
+    shared: bool = False,
+) -> int:
+    """Search each phone in the CRM and journal its result rows; returns the rows journaled.
+
+    ``phone_numbers`` may be a stream still loading. ``resume`` skips the
+    phones already in ``journal``, ``refresh`` bypasses the cache, and
+    ``schedule``/``shared`` are passed by ``workers`` for parallel sessions.
+    """
+    own_journal = journal is None
+    if own_journal:
+        journal = run_journal.Journal(Path(config.JOURNAL_DIR) / "crm_run.jsonl").open(resume=resume)
+    done = journal.done_phones() if resume else set()
+    if done:
+        print(f"[INFO] Reprise: {len(done)} numero(s) deja traite(s) dans {journal.path}")
+
+    refresh = config.CACHE_REFRESH if refresh is None else refresh
+    store = cache.open_cache()
+    total = len(phone_numbers) if isinstance(phone_numbers, Sized) else None
+    if schedule is None:
+        schedule = phone_scheduler.Scheduler(
+            phone_numbers,
+            company_info_map,
+            history=store.last_checked if store is not None else None,
         )
 
-        thread_interlocutor.start()
-        thread_no_result.start()
-        thread_pre_fetch.start()
+    engine = batch_engine.BatchEngine.create()
+    pipe = pipeline.Pipeline.create()
+    supervisor = crm_lookup.Supervisor()
+
+    def upcoming() -> List[str]:
+        # Prochains numéros à rechercher, envoyés au mode lot avec le courant
+        return [
+            other
+            for other in schedule.upcoming(config.BATCH_CHUNK)
+            if other not in done
+            and not schedule.skip_reason(other)
+            and (refresh or store is None or store.get(other) is None)
+        ]
+
+    written = 0
+    searched = 0
+    gui_searches = 0
+    reused = 0
+
+    def journal_search(phone: str, rows: List[Dict], seconds: float) -> None:
+        nonlocal written
+        checked_at = time.time()
+        if store is not None and rows:
+            store.put(phone, rows, now=checked_at)
+        rows = _cached_rows(rows, checked_at, {})
+        schedule.record(phone, rows, seconds)
+        journal.append(phone, rows)
+        written += len(rows)
+
+    def collect(**wait) -> None:
+        # Extractions terminées en arrière-plan (mode pipeline)
+        if pipe is None:
+            return
+        for extraction, text, waited in pipe.collect(**wait):
+            journal_search(extraction.phone, _extraction_rows(extraction, text), extraction.search_seconds + waited)
 
-        start_time = time.time()
-        # Donne plus de marge pour: recherche -> éventuel pré-fetch -> chargement fiche -> bouton
-        timeout = 30.0
-        while time.time() - start_time < timeout:
-            if interlocutor_found["found"]:
-                print("   ✅ [OK] Resultat trouve via bouton 'Interlocuteur'")
-                break
-            if no_result_found["found"]:
-                print("   [X] Aucun resultat - Message '0 resultat' detecte")
-                time.sleep(0.5)
+    try:
+        for position, (phone, is_last) in enumerate(_with_last_flag(schedule), 1):
+            if phone in done:
+                continue
+            company_info = (company_info_map or {}).get(phone, {})
+            # Entreprise encore en extraction: son résultat peut la régler
+            collect(keys=phone_scheduler.company_keys(phone, company_info))
+            skip_reason = schedule.skip_reason(phone)
+            if skip_reason:
+                schedule.skip(phone, skip_reason)
+                rows = [_skipped_row(phone, company_info, skip_reason)]
+                journal.append(phone, rows)
+                written += len(rows)
+                continue
+            entry = store.get(phone) if store is not None and not refresh else None
+            if entry is not None:
+                rows, checked_at = entry
+                rows = _cached_rows(rows, checked_at, company_info)
+                reused += 1
+                schedule.record(phone, rows)
+                journal.append(phone, rows)
+                written += len(rows)
+                continue
+            if schedule.out_of_budget():
+                print("\n[INFO] Budget de temps atteint, arret avant la prochaine recherche (reprise avec --resume)")
                 break
-            if pre_fetch_found["found"]:
-                data = pre_fetch_found.get("data") or []
-                if data:
-                    print("   ✅ [OK] Pré-fetch: résultats du snippet confirmés, on continue")
-                    time.sleep(1)
+            searched += 1
+            print(f"\nRecherche {searched} (numero {position}/{total or '?'}): {phone}")
+            # Place pour une extraction de plus (mode pipeline)
+            collect(room=True)
+            search_start = time.time()
+            record = engine.lookup(phone, upcoming) if engine is not None else None
+            if record is not None:
+                rows = _batch_rows(phone, record, company_info)
+            else:
+                if not gui_searches:
+                    vision_pool.start()
+                gui_searches += 1
+                try:
+                    rows = _process_single_phone(
+                        phone,
+                        is_last=is_last,
+                        company_info_map=company_info_map,
+                        pipe=pipe,
+                        supervisor=supervisor,
+                    )
+                except crm_lookup.LookupAborted as exc:
+                    # Numéro non journalisé: repris par --resume
+                    print(f"\n[X] {exc} (reprise avec --resume)")
                     break
-                else:
-                    # Pré-fetch déclenché mais aucun résultat JSON confirmé
-                    print("   [...] Pré-fetch détecté mais aucun résultat JSON encore confirmé…")
-            time.sleep(0.1)
-
-        stop_event.set()
-        # Attendre la terminaison réelle des threads afin d'éviter
-        # toute interférence avec le numéro suivant.
-        thread_interlocutor.join()
-        thread_no_result.join()
-        thread_pre_fetch.join()
-
-        # Succès si bouton trouvé OU si le pré-fetch a retourné des résultats JSON
-        has_result = interlocutor_found["found"] or bool(pre_fetch_found.get("data"))
-
-        if has_result:
-            # Si on n'a pas cliqué le bouton, le pré-fetch a déjà chargé la fiche.
-            # On ouvre directement l'onglet Interlocuteur via snippet JS (sans dépendre d'images).
-            print("   Ouverture de l'onglet Interlocuteur via snippet JS...")
-            snippets.open_interlocuteur_tab()
-            time.sleep(2)
-            print("   Execution du snippet DOM Interlocuteur...")
-            snippets.run_dom_interlocuteurs_snippet()
-            # Récupérer le contenu du presse-papiers (clipboard)
-            clipboard_content = pyperclip.paste()
-            try:
-                infos = json.loads(clipboard_content)
-            except Exception as e:
-                print(f"   Erreur lors de la lecture du presse-papiers: {e}")
-                infos = []
-            time.sleep(1)
-            # OCR-based fallback supprimé (non utilisé)
-        else:
-            infos = []
-
-        if not infos:
-            status = "NOT_FOUND" if not has_result else "NO_CONTACT_FOUND"
-            print(f"   Aucun contact pertinent pour {phone}")
-            # On fixe explicitement toutes les colonnes attendues, même si vides
-            results.append({
-                "phone_searched": phone,
-                "company": company_info.get('company', ''),
-                "siret": company_info.get('siret', ''),
-                "name": "",
-                "mobile": "",
-                "fix": "",
-                "email": "",
-                "fonction": "",
-                "status": status,
-            })
-            time.sleep(0.5)
-            if not has_result :
-                ui_actions.open_console_and_close_window()
-        else:
-            print(f"   {len(infos)} contact(s) Direction/Dir. Generale pour {phone}")
-            print(f"   Infos detaillees: {infos}")
-            for info in infos:
-                normalized = _normalize_contact(info if isinstance(info, dict) else {})
-                results.append({
-                    "phone_searched": phone,
-                    "company": company_info.get('company', ''),
-                    "siret": company_info.get('siret', ''),
-                    "name": normalized.get("name", ""),
-                    "mobile": normalized.get("mobile", ""),
-                    "fix": normalized.get("fix", ""),
-                    "email": normalized.get("email", ""),
-                    "fonction": normalized.get("fonction", ""),
-                    "category": info.get("category", ""),
-                    "status": "FOUND",
-                })
-
-        if not is_last:
-            print("Pause de 2 secondes... (vous pouvez reprendre le controle si necessaire)")
-            time.sleep(2)
-
-    except Exception as exc:
-        print(f"   Erreur pour {phone}: {exc}")
-        results.append({
-            "phone_searched": phone,
-            "company": company_info.get('company', ''),
-            "siret": company_info.get('siret', ''),
-            "name": "",
-            "mobile": "",
-            "fix": "",
-            "email": "",
-            "fonction": "",
-            "status": f"Erreur: {exc}",
-        })
-
-    # Ajouter les résultats à la liste globale pour sauvegarde d'urgence
-    global _global_results
-    _global_results.extend(results)
-    
-    return results
-
-
-def process_phone_numbers(phone_numbers: Sequence[str], company_info_map: Dict = None) -> List[Dict]:
-    # Configurer le gestionnaire de signal pour les interruptions
-    signal.signal(signal.SIGINT, _signal_handler)
-    signal.signal(signal.SIGTERM, _signal_handler)
-    
-    # Réinitialiser la liste globale des résultats
-    global _global_results
-    _global_results.clear()
-    
-    aggregated: List[Dict] = []
-    for index, phone in enumerate(phone_numbers):
-        print(f"\nRecherche {index + 1}/{len(phone_numbers)}: {phone}")
-        aggregated.extend(_process_single_phone(phone, is_last=index == len(phone_numbers) - 1, company_info_map=company_info_map))
-    return aggregated
-
-
-__all__ = ["process_phone_numbers"]
+                if rows is None:
+                    # Extraction en cours dans son onglet: journalisée par collect()
+                    continue
+            journal_search(phone, rows, time.time() - search_start)
+        collect(drain=True)
+    finally:
+        if store is not None:
+            store.close()
+            mode = " (rafraichissement force)" if refresh else ""
+            print(f"[INFO] Cache{mode}: {reused} numero(s) repris, {searched} recherche(s) CRM")
+        if not shared:
+            schedule.print_report()
+        if engine is not None:
+            engine.print_report()
+        if pipe is not None:
+            pipe.print_report()
+        supervisor.print_report()
+        if own_journal:
+            journal.close()
+        if not shared:
+            close_services()
+    return written
+
+
+def close_services() -> None:
+    """Stop the shared watcher, channel and vision pool; report and save learned state."""
+    screen_watcher.shutdown()
+    result_channel.shutdown()
+    vision_pool.shutdown()
+    stats = vision.get_match_stats()
+    print(
+        f"[INFO] Vision: {stats['frames_matched']} image(s) analysee(s), "
+        f"{stats['frames_skipped']} inchangee(s) ignoree(s) "
+        f"({stats['matches_run']} matchTemplate, {stats['matches_reused']} reutilise(s))"
+    )
+    waiters.print_detection_latencies()
+    outcomes.print_report()
+    text_entry.print_report()
+    outcomes.save()
+    waiters.save_detection_latencies()
+    calibration.save()
+    hitstats.save()
+    text_entry.save()
+
+
+__all__ = ["process_phone_numbers", "close_services"]
 
 
 
@@ -13,6 +13,7 @@ import locale
 import platform
 import subprocess
 import ctypes
+import multiprocessing
 import time
 
 from security_utils import load_expected_hash, ensure_trial
@@ -131,5 +132,7 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    # Requis pour les workers vision (spawn) dans l'exécutable PyInstaller
+    multiprocessing.freeze_support()
     main()
 
@@ -0,0 +1,22 @@
+(async()=>{
+  // Moteur de recherche par lot: window.__crmArgs = {phones, searchUrl, selectors, concurrency, maxPages}
+  const H=window.__crmChannel;delete window.__crmChannel;const G=window.__crmArgs||{};delete window.__crmArgs;
+  //@include lib/interlocuteurs_extract.js
+  const S=G.selectors||{},send=m=>H?fetch(H.url,{method:"POST",headers:{"Content-Type":"text/plain"},body:JSON.stringify({id:H.id,...m})}).catch(()=>{}):Promise.resolve();
+  const fill=(t,v)=>t.replace(/\{(\w+)\}/g,(_,k)=>encodeURIComponent(v[k]??""));
+  const get=async(u,base)=>{const r=await fetch(new URL(u,base||location.href),{credentials:"include"});if(!r.ok)throw new Error(`HTTP ${r.status} ${u}`);return{doc:new DOMParser().parseFromString(await r.text(),"text/html"),url:r.url}};
+  const lookup=async phone=>{const s=performance.now(),ms=()=>Math.round(performance.now()-s);try{
+    const q=await get(fill(G.searchUrl,{phone})),R=[...q.doc.querySelectorAll(S.result||".listResults .result")];
+    // Sans résultat dans le HTML: NOT_FOUND seulement devant le message "0 résultat" (sinon rendu côté client: GUI)
+    if(!R.length){if((S.no_result&&q.doc.querySelector(S.no_result))||(S.no_result_text&&new RegExp(S.no_result_text,"i").test(q.doc.body?.textContent||"")))return{phone,status:"NOT_FOUND",contacts:[],ms:ms()};throw new Error("ni resultat ni message '0 resultat' dans la page")}
+    const a=R[0].querySelector(S.result_link||"a[href]");if(!a)throw new Error("lien de fiche introuvable");
+    const f=await get(a.getAttribute("href"),q.url),src=f.doc.querySelector(S.interlocutor_frame||"#interlocuteur")?.getAttribute("src");
+    if(!src)throw new Error("iframe Interlocuteur introuvable dans la fiche");
+    let p=await get(src,f.url),pages=0;const A=[];
+    for(;;){pages++;A.push(...extractInterlocuteurs(p.doc));const n=p.doc.querySelector("li.page-item:not(.disabled) a[aria-label='Next']")?.getAttribute("href");if(!n||n==="#"||/^javascript:/i.test(n)||pages>=(G.maxPages||20))break;p=await get(n,p.url)}
+    const L=selectInterlocuteurs(A);return{phone,status:L.length?"FOUND":"NO_CONTACT_FOUND",contacts:L,pages,ms:ms()};
+  }catch(e){return{phone,status:"ERROR",error:String(e&&e.message||e),ms:ms()}}};
+  const Q=[...(G.phones||[])],out=[],worker=async()=>{for(;Q.length;){const r=await lookup(Q.shift());out.push(r);await send({payload:JSON.stringify(r)})}};
+  await Promise.all(Array.from({length:Math.max(1,Math.min(G.concurrency||4,Q.length))},worker));await send({done:!0});
+  return out;
+})();
@@ -1 +1,14 @@
-(()=>{const s=Date.now(),t=2e4,i=setInterval(()=>{let f=!1;(function e(n){n.shadowRoot&&e(n.shadowRoot),n.querySelectorAll?.('span').forEach(x=>{/clients\s+trouvés/i.test(x.textContent.trim())&&(f=!0)}),n.childNodes.forEach(e)})(document);if(f){clearInterval(i);console.info('✅ clients trouvés, run...');const a=new Set;(function e(n){n.shadowRoot&&e(n.shadowRoot),n.querySelectorAll?.('.listResults .result').forEach(a.add,a),n.childNodes.forEach(e)})(document);const l=[...a];if(!l.length)return console.warn('no result');const d=l.map(r=>({n:r.querySelector('.resultName')?.textContent.trim(),a:[...r.querySelectorAll('.resultAdresse')].map(x=>x.textContent.trim()).join(', '),s:r.querySelector('.resultSiret')?.textContent.trim(),m:r.querySelector('.resultMarche')?.textContent.trim(),g:r.querySelector('.resultSiege')?.textContent.trim()||'Non',t:r.querySelector('.resultInseeStatus')?.textContent.trim()})),u=[...new Map(d.map(o=>[o.n+o.s,o])).values()];console.table(u);try{prompt('📋 PREFETCH: Ctrl+C puis Entrée',JSON.stringify(u));}catch(_e){};l[0].click();console.info('clicked:',u[0])}else Date.now()-s>t&&(clearInterval(i),console.warn('❌ pas trouvé après 20s'))},500)})();
+(async()=>{
+  const H=window.__crmChannel;delete window.__crmChannel;const P=(j,f)=>H?fetch(H.url,{method:"POST",headers:{"Content-Type":"text/plain"},body:JSON.stringify({id:H.id,payload:j})}).then(r=>{if(!r.ok)throw r.status}).catch(f):Promise.resolve(f());
+  //@include lib/dom_watch.js
+  // Résultats dès que "N clients trouvés" et la liste sont rendus (0 client: liste vide), sans balayage périodique
+  const s=performance.now(),ms=t=>Math.round(t-s),l=await domWatch.until(()=>{const c=domWatch.qsa("span").map(x=>x.textContent.trim()).find(x=>/clients\s+trouvés/i.test(x));if(c==null)return null;const r=[...new Set(domWatch.qsa(".listResults .result"))];return r.length?r:/^0\s/.test(c)?[]:null},{timeout:2e4,quiet:50}),w=performance.now();
+  // Échec: canal seulement (pas de prompt), valeur du snippet pour le pont DevTools
+  const none=o=>P(JSON.stringify(o),()=>{}).then(()=>o);
+  if(!l){console.warn('❌ pas trouvé après 20s');return none({items:[],timing:{waitMs:ms(w),totalMs:ms(w),timeout:!0}})}
+  console.info('✅ clients trouvés, run...');
+  const d=l.map(r=>({n:r.querySelector('.resultName')?.textContent.trim(),a:[...r.querySelectorAll('.resultAdresse')].map(x=>x.textContent.trim()).join(', '),s:r.querySelector('.resultSiret')?.textContent.trim(),m:r.querySelector('.resultMarche')?.textContent.trim(),g:r.querySelector('.resultSiege')?.textContent.trim()||'Non',t:r.querySelector('.resultInseeStatus')?.textContent.trim()})),u=[...new Map(d.map(o=>[o.n+o.s,o])).values()],e=performance.now();
+  if(!u.length){console.warn('no result');return none({items:[],timing:{waitMs:ms(w),extractMs:Math.round(e-w),totalMs:ms(e)}})}
+  console.table(u);const J=JSON.stringify({items:u,timing:{waitMs:ms(w),extractMs:Math.round(e-w),totalMs:ms(e)}});
+  await P(J,()=>{try{prompt('📋 PREFETCH: Ctrl+C puis Entrée',J);}catch(_e){}});l[0].click();console.info('clicked:',u[0]);
+})();
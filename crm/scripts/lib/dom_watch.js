@@ -0,0 +1,6 @@
+// Observation du DOM (partagée: //@include lib/dom_watch.js): index des shadow roots en cache par page (window.__crmDom), attentes par MutationObserver
+const domWatch=window.__crmDom||(window.__crmDom=(()=>{const R=new Set([document]),L=new Set(),O={childList:!0,subtree:!0,characterData:!0,attributes:!0},M=new MutationObserver(m=>{for(const r of m)for(const n of r.addedNodes)n.nodeType===1&&scan(n);L.forEach(f=>f())}),add=r=>{if(R.has(r))return;R.add(r);M.observe(r,O);scan(r)},scan=n=>{n.shadowRoot&&add(n.shadowRoot);const w=document.createTreeWalker(n,1);for(let e=w.nextNode();e;e=w.nextNode())e.shadowRoot&&add(e.shadowRoot)};M.observe(document,O);scan(document);
+const qsa=s=>{const a=[];for(const r of R){if(r.host&&!r.host.isConnected){R.delete(r);continue}a.push(...r.querySelectorAll(s))}return a};
+// until(f,{timeout,quiet}): première valeur non nulle de f() après une mutation (stable depuis quiet ms), null à l'expiration; re-scan lent pour les attachShadow non observés
+const until=(f,{timeout:t=1e4,quiet:q=0}={})=>new Promise(res=>{let p=0,k=0;const ok=v=>v!=null&&v!==!1,end=v=>{L.delete(tick);clearTimeout(p);clearTimeout(k);clearTimeout(x);clearInterval(i);res(v)},test=()=>{p=0;clearTimeout(k);const v=f();ok(v)&&(q?k=setTimeout(()=>{const w=f();ok(w)&&end(w)},q):end(v))},tick=()=>{p||(p=setTimeout(test,16))},x=setTimeout(()=>end(null),t),i=setInterval(()=>{scan(document);tick()},1e3);L.add(tick);test()});
+return{qsa,until,scan:()=>scan(document)}})());